@@ -1,2 +1,8 @@
+from . import controllers
 from . import models
-from . import wizards
\ No newline at end of file
+from . import wizards
+
+
+def post_init_hook(env):
+    """Build the daily sales summary of the documents already in the database."""
+    env['vendus.sales.summary']._rebuild()
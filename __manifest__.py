@@ -1,6 +1,6 @@
 {
     'name': 'AlertaB Vendus',
-    'version': '17.0.1.1',
+    'version': '17.0.1.3',
     'category': 'Accounting/Localizations',
     'summary': 'Integrate Vendus with Odoo for Portuguese localization',
     'description': """
@@ -26,12 +26,19 @@
         'views/room_views.xml',
         'views/table_views.xml',
         'views/sync_views.xml',
+        'views/payload_views.xml',
+        'views/response_cache_views.xml',
         'views/res_config_settings_views.xml',
         'views/dashboard_views.xml',
+        'views/sales_summary_views.xml',
         'views/saft_import_wizard_views.xml',
+        'views/saft_import_job_views.xml',
+        'views/posting_job_views.xml',
+        'data/cron_jobs.xml',
         'data/account_tax_report.xml',
     ],
     'demo': [],
+    'post_init_hook': 'post_init_hook',
     'installable': True,
     'application': False,
     'auto_install': False,
@@ -0,0 +1,163 @@
+"""
+Benchmark the SAF-T import on generated files.
+
+A file is generated with `saft_generator.py` (or an existing one is used), the
+journals it references are created in the company when missing, and the file is
+imported with `account.saft.import.wizard._import_stream`, the engine of the
+background import jobs. The wall time of each phase of the import, the peak
+memory of the process (and of the conversion workers) and the moves/s are
+printed and appended as one JSON line to the results file, so that successive
+runs can be compared.
+
+The import is rolled back at the end unless --commit is given, so the same
+database can be reused from run to run.
+
+Usage:
+    python benchmarks/bench_saft.py -c odoo.conf -d saft_bench --size 500M --customers 20000 --workers 4 \\
+        --label my-change
+    python benchmarks/bench_saft.py -c odoo.conf -d saft_bench --file year_end.xml --company 2
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+from common import (
+    RESULTS_DIR,
+    current_rss_mb,
+    format_comparison,
+    load_baseline,
+    peak_rss_mb,
+    save_result,
+)
+from saft_generator import SaftGenerator, parse_size, transactions_for_size
+
+DEFAULT_RESULTS = os.path.join(RESULTS_DIR, 'saft.jsonl')
+COMPARED_METRICS = ('moves_per_second', 'duration', 'peak_rss_mb')
+PHASES = ('parse', 'accounts', 'partners', 'convert', 'write')
+
+
+def generate(args: argparse.Namespace, path: str) -> Dict[str, Any]:
+    """Generate the benchmark file, and describe it."""
+    generator = SaftGenerator(accounts=args.accounts, customers=args.customers, journals=args.journals,
+                              lines=args.lines, seed=args.seed)
+    transactions = args.transactions or transactions_for_size(generator, args.size)
+    started = time.monotonic()
+    with open(path, 'w', encoding='utf-8', buffering=2 ** 20) as out:
+        generator.write(out, transactions)
+    return {
+        'transactions': transactions,
+        'journals': generator.journal_ids(),
+        'generate_seconds': time.monotonic() - started,
+    }
+
+
+def run_import(args: argparse.Namespace, path: str, journal_codes: Optional[list]) -> Dict[str, Any]:
+    """Import the file in the database, and collect the timings of the import."""
+    import odoo
+    from odoo import SUPERUSER_ID, api
+
+    odoo.tools.config.parse_config((['-c', args.config] if args.config else []) + ['-d', args.database])
+    registry = odoo.registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        company = env['res.company'].browse(args.company) if args.company else env.company
+        env = env(context=dict(env.context, allowed_company_ids=[company.id]))
+        Journal = env['account.journal']
+        for code in journal_codes or []:
+            if not Journal.search_count([('company_id', '=', company.id), ('code', '=', code)]):
+                Journal.create({'name': f'Diario {code}', 'code': code, 'type': 'general', 'company_id': company.id})
+
+        Move = env['account.move']
+        moves_before = Move.search_count([('company_id', '=', company.id)])
+        wizard = env['account.saft.import.wizard'].create({'company_id': company.id, 'workers': args.workers})
+        rss_before = current_rss_mb()
+        started = time.monotonic()
+        with open(path, 'rb') as stream:
+            index = wizard._import_stream(stream)
+        duration = time.monotonic() - started
+        moves = Move.search_count([('company_id', '=', company.id)]) - moves_before
+        if args.commit:
+            cr.commit()
+        else:
+            cr.rollback()
+
+    entries = sum(index.transactions.values())
+    return {
+        'duration': duration,
+        'phases': {phase: index.timings.get(phase, 0.0) for phase in PHASES},
+        'entries': entries,
+        'moves': moves,
+        'moves_per_second': moves / duration if duration else 0.0,
+        'entries_per_second': entries / duration if duration else 0.0,
+        'accounts': len(index.accounts),
+        'customers': len(index.customers),
+        'rss_before_mb': rss_before,
+        'peak_rss_mb': peak_rss_mb(),
+        'workers_peak_rss_mb': peak_rss_mb(children=True) if args.workers else 0.0,
+    }
+
+
+def report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    print(f"Imported {result['entries']} entries ({result['moves']} new moves, "
+          f"{result['file_size_mb']:.1f} MB) in {result['duration']:.1f}s")
+    for metric in COMPARED_METRICS:
+        print(format_comparison(metric, result[metric], baseline))
+    baseline_phases = None
+    if baseline and baseline.get('phases'):
+        baseline_phases = {f'{phase} (s)': seconds for phase, seconds in baseline['phases'].items()}
+        baseline_phases.update(label=baseline.get('label'), revision=baseline.get('revision'))
+    for phase, seconds in result['phases'].items():
+        print(format_comparison(f'{phase} (s)', seconds, baseline_phases))
+    if result['workers_peak_rss_mb']:
+        print(f"  workers peak RSS {result['workers_peak_rss_mb']:.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-c', '--config', help='Odoo configuration file.')
+    parser.add_argument('-d', '--database', required=True, help='Database with the module installed.')
+    parser.add_argument('--company', type=int, help='ID of the company importing the file. Defaults to the main company.')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes converting the entries.')
+    parser.add_argument('--commit', action='store_true', help='Keep the imported records instead of rolling back.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--file', help='Existing SAF-T file to import. Its journals must exist in the company.')
+    source.add_argument('--transactions', type=int, help='Generate a file with this number of journal entries.')
+    source.add_argument('--size', type=parse_size, help='Generate a file of about this size, e.g. 500M or 2G.')
+    parser.add_argument('--accounts', type=int, default=500, help='Movement accounts of the generated file.')
+    parser.add_argument('--customers', type=int, default=1000, help='Customers of the generated file.')
+    parser.add_argument('--journals', type=int, default=4, help='Journals of the generated file.')
+    parser.add_argument('--lines', type=int, default=4, help='Lines per entry of the generated file.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep-file', action='store_true', help='Do not delete the generated file.')
+    parser.add_argument('--label', help='Name of this result, e.g. the change being measured.')
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help='JSON lines file the result is appended to.')
+    parser.add_argument('--baseline', help='Results file to compare with. Defaults to the output file.')
+    parser.add_argument('--baseline-label', help='Compare with the last result with this label.')
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline or args.output, args.baseline_label)
+    generated: Dict[str, Any] = {}
+    path = args.file
+    if not path:
+        handle, path = tempfile.mkstemp(suffix='.xml', prefix='saft_bench_')
+        os.close(handle)
+        generated = generate(args, path)
+        print(f"Generated {generated['transactions']} entries in {generated['generate_seconds']:.1f}s: {path}")
+    try:
+        result = run_import(args, path, generated.get('journals'))
+        result['file_size_mb'] = os.path.getsize(path) / 2 ** 20
+    finally:
+        if generated and not args.keep_file:
+            os.unlink(path)
+
+    save_result(args.output, result, args.label, {
+        key: value for key, value in vars(args).items()
+        if key not in ('config', 'database', 'output', 'baseline', 'baseline_label', 'label', 'keep_file')
+    })
+    report(result, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark `vendus.sync.sync_all` against the local Vendus stub.
+
+The stub (see `vendus_stub.py`) is started in its own process with the chosen
+volumes, latency and 429 rate, the Vendus settings of the database are pointed
+at it, and a full sync is run. In the staged apply mode, the payloads it
+staged are then applied in the benchmark process, as the payload workers would,
+and counted in the duration and queries. The records/s, SQL queries per record
+and peak RSS of the run, with the metrics of each entity from `vendus.sync.run`,
+are printed and appended as one JSON line to the results file, so that each
+change can be compared with a baseline.
+
+The sync commits its pages: use a throwaway database with the module
+installed.
+
+Usage:
+    python benchmarks/bench_sync.py -c odoo.conf -d vendus_bench --products 100000 --documents 1000000 \\
+        --latency 0.02 --error-rate 0.01 --label my-change --baseline benchmarks/results/sync.jsonl
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from common import (
+    BENCHMARK_DIR,
+    RESULTS_DIR,
+    current_rss_mb,
+    format_comparison,
+    load_baseline,
+    peak_rss_mb,
+    save_result,
+)
+from vendus_stub import add_stub_arguments, stub_arguments
+
+DEFAULT_RESULTS = os.path.join(RESULTS_DIR, 'sync.jsonl')
+COMPARED_METRICS = ('records_per_second', 'queries_per_record', 'peak_rss_mb', 'duration')
+
+
+def start_stub(args: argparse.Namespace) -> subprocess.Popen:
+    """Start the stub in its own process, and wait until it accepts connections."""
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARK_DIR, 'vendus_stub.py'), '--port', str(args.port)]
+        + stub_arguments(args))
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', args.port), timeout=1).close()
+            return stub
+        except OSError:
+            if stub.poll() is not None:
+                break
+            time.sleep(0.1)
+    stub.kill()
+    raise RuntimeError('The Vendus stub did not start')
+
+
+def run_sync(args: argparse.Namespace, api_url: str) -> Dict[str, Any]:
+    """Run a full sync on the database, and collect its metrics."""
+    import odoo
+    from odoo import SUPERUSER_ID, api
+
+    odoo.tools.config.parse_config((['-c', args.config] if args.config else []) + ['-d', args.database])
+    registry = odoo.registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        params = env['ir.config_parameter']
+        params.set_param('vendus_integration.api_url', api_url)
+        params.set_param('vendus_integration.api_key', 'benchmark')
+        params.set_param('vendus_integration.sync_apply_mode', args.apply_mode)
+        if not args.incremental:
+            env['vendus.sync.state'].search([]).action_reset()
+        cr.commit()
+
+        rss_before = current_rss_mb()
+        started = time.monotonic()
+        sync_run = env['vendus.sync'].sync_all()
+        fetch_seconds = time.monotonic() - started
+        queries_before = cr.sql_log_count
+        if args.apply_mode == 'staged':
+            env['vendus.payload']._cron_apply_payloads(max_batches=sys.maxsize)
+        duration = time.monotonic() - started
+        queries = sync_run.query_count + cr.sql_log_count - queries_before
+        records = sync_run.created + sync_run.updated + sync_run.unchanged + sync_run.staged
+        return {
+            'duration': duration,
+            'fetch_seconds': fetch_seconds,
+            'apply_seconds': duration - fetch_seconds,
+            'records': records,
+            'records_per_second': records / duration if duration else 0.0,
+            'queries': queries,
+            'queries_per_record': queries / records if records else 0.0,
+            'api_calls': sync_run.api_calls,
+            'retries': sync_run.retries,
+            'throttled_seconds': sync_run.throttled_seconds,
+            'latency_p50': sync_run.latency_p50,
+            'latency_p95': sync_run.latency_p95,
+            'bytes_received': sync_run.bytes_received,
+            'rss_before_mb': rss_before,
+            'peak_rss_mb': peak_rss_mb(),
+            'errors': sync_run.error or None,
+            'entities': {
+                line.entity: {
+                    'duration': line.duration,
+                    'records_per_second': line.records_per_second,
+                    'queries_per_record': line.queries_per_record,
+                    'api_calls': line.api_calls,
+                    'created': line.created,
+                    'updated': line.updated,
+                    'unchanged': line.unchanged,
+                    'staged': line.staged,
+                }
+                for line in sync_run.line_ids
+            },
+        }
+
+
+def report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    print(f"Synced {result['records']} records in {result['duration']:.1f}s "
+          f"(fetch {result['fetch_seconds']:.1f}s, apply after fetch {result['apply_seconds']:.1f}s)")
+    for metric in COMPARED_METRICS:
+        print(format_comparison(metric, result[metric], baseline))
+    print(f"  api calls {result['api_calls']}, retries {result['retries']}, "
+          f"p50 {result['latency_p50']:.2f}s, p95 {result['latency_p95']:.2f}s")
+    for entity, metrics in result['entities'].items():
+        print(f"  {entity:<20} {metrics['duration']:8.1f}s {metrics['records_per_second']:10.1f} rec/s "
+              f"{metrics['queries_per_record']:6.2f} q/rec")
+    if result['errors']:
+        print(f"  errors: {result['errors']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-c', '--config', help='Odoo configuration file.')
+    parser.add_argument('-d', '--database', required=True, help='Database with the module installed.')
+    parser.add_argument('--port', type=int, default=8765, help='Port of the stub.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Keep the sync cursors, to measure an incremental run instead of a full one.')
+    parser.add_argument('--apply-mode', choices=('staged', 'direct'), default='staged',
+                        help='Stage the records for the payload workers, or store them during the sync.')
+    parser.add_argument('--label', help='Name of this result, e.g. the change being measured.')
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help='JSON lines file the result is appended to.')
+    parser.add_argument('--baseline', help='Results file to compare with. Defaults to the output file.')
+    parser.add_argument('--baseline-label', help='Compare with the last result with this label.')
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline or args.output, args.baseline_label)
+    stub = start_stub(args)
+    try:
+        result = run_sync(args, f'http://127.0.0.1:{args.port}/')
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    save_result(args.output, result, args.label, {
+        key: value for key, value in vars(args).items()
+        if key not in ('config', 'database', 'output', 'baseline', 'baseline_label', 'label')
+    })
+    report(result, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Check that the lookups of the sync and the dashboard queries use the indexes of the Vendus models.
+
+Each query is explained on the database with sequential scans disabled, which
+only leaves the planner a sequential scan when no index can serve the query.
+The plan of every query is printed, and the script exits with status 1 when a
+query still scans a Vendus table sequentially. With --analyze, the queries are
+also run with sequential scans allowed, and their actual plan and time are
+printed: on small tables the planner rightly prefers a sequential scan.
+
+Usage:
+    python benchmarks/check_query_plans.py -c odoo.conf -d vendus_bench
+    python benchmarks/check_query_plans.py -c odoo.conf -d vendus_bench --analyze
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+# The tables of the models whose `vendus_id` is looked up by the batch upsert
+LOOKUP_TABLES = (
+    'vendus_product',
+    'vendus_customer',
+    'vendus_document',
+    'vendus_payment_method',
+    'vendus_store',
+    'vendus_supplier',
+    'vendus_room',
+    'vendus_table',
+)
+
+# Number of IDs looked up at once, as in a page of the sync
+LOOKUP_SIZE = 100
+
+
+def get_queries(cr) -> List[Tuple[str, str, Tuple[Any, ...]]]:
+    """Get the name, SQL and parameters of the checked queries."""
+    queries = []
+    for table in LOOKUP_TABLES:
+        cr.execute(f"SELECT coalesce(max(vendus_id), 0) FROM {table}")
+        top = cr.fetchone()[0]
+        vendus_ids = list(range(max(1, top - LOOKUP_SIZE + 1), top + 1))
+        queries.append((
+            f'{table} upsert lookup',
+            f"SELECT id, vendus_id, vendus_hash FROM {table} WHERE vendus_id = ANY(%s)",
+            (vendus_ids,),
+        ))
+    cr.execute("SELECT max(date) FROM vendus_document")
+    last_date = cr.fetchone()[0] or '2000-01-01'
+    queries += [
+        (
+            'dashboard sales over time',
+            """SELECT date, sum(total_amount) FROM vendus_sales_summary
+                WHERE date >= %s::date - 30 AND date <= %s AND type IN ('FT', 'FR', 'FS')
+                GROUP BY 1""",
+            (last_date, last_date),
+        ),
+        (
+            'sales summary upkeep of a page',
+            """SELECT date, store_id, type, payment_method_id, count(*), sum(total_amount) FROM vendus_document
+                WHERE id = ANY(%s) AND state = 'final' GROUP BY 1, 2, 3, 4""",
+            (list(range(1, LOOKUP_SIZE + 1)),),
+        ),
+        (
+            'dashboard documents of a day',
+            "SELECT id FROM vendus_document WHERE date = %s AND type = 'FT' AND state = 'final'",
+            (last_date,),
+        ),
+        (
+            'lines of a page of documents',
+            "SELECT id, document_id, sequence FROM vendus_document_line WHERE document_id = ANY(%s)",
+            (list(range(1, LOOKUP_SIZE + 1)),),
+        ),
+        (
+            'documents of a customer',
+            "SELECT id FROM vendus_document WHERE customer_id = (SELECT min(id) FROM vendus_customer)",
+            (),
+        ),
+    ]
+    return queries
+
+
+def iter_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from iter_nodes(child)
+
+
+def explain(cr, query: str, params: Tuple[Any, ...], analyze: bool = False) -> Dict[str, Any]:
+    cr.execute(f"EXPLAIN (FORMAT JSON{', ANALYZE' if analyze else ''}) {query}", params)
+    result = cr.fetchone()[0]
+    return (json.loads(result) if isinstance(result, str) else result)[0]
+
+
+def describe(plan: Dict[str, Any]) -> str:
+    return ', '.join(
+        f"{node['Node Type']}" + (f" on {node['Relation Name']}" if 'Relation Name' in node else '')
+        + (f" using {node['Index Name']}" if 'Index Name' in node else '')
+        for node in iter_nodes(plan['Plan'])
+        if 'Relation Name' in node
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-c', '--config', help='Odoo configuration file.')
+    parser.add_argument('-d', '--database', required=True, help='Database with the module installed.')
+    parser.add_argument('--analyze', action='store_true', help='Also run the queries and print their actual plan.')
+    args = parser.parse_args()
+
+    import odoo
+
+    odoo.tools.config.parse_config((['-c', args.config] if args.config else []) + ['-d', args.database])
+    registry = odoo.registry(args.database)
+    failures = []
+    with registry.cursor() as cr:
+        for name, query, params in get_queries(cr):
+            cr.execute("SET LOCAL enable_seqscan = off")
+            plan = explain(cr, query, params)
+            cr.execute("SET LOCAL enable_seqscan = on")
+            scanned = [node['Relation Name'] for node in iter_nodes(plan['Plan'])
+                       if node['Node Type'] == 'Seq Scan' and node.get('Relation Name', '').startswith('vendus_')]
+            status = 'FAIL' if scanned else 'ok'
+            if scanned:
+                failures.append(name)
+            print(f"{status:<4} {name}: {describe(plan)}")
+            if args.analyze:
+                actual = explain(cr, query, params, analyze=True)
+                print(f"       actual: {describe(actual)} in {actual['Execution Time']:.2f} ms")
+        cr.rollback()
+
+    if failures:
+        print(f"{len(failures)} queries cannot use an index: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
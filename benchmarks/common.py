@@ -0,0 +1,71 @@
+"""
+Helpers shared by the benchmarks: memory readings, result files and baselines.
+
+Results are stored as JSON lines, one per run, so that successive runs of a
+benchmark can be compared with `load_baseline` and `format_comparison`.
+"""
+import json
+import os
+import resource
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+
+def current_rss_mb() -> float:
+    """Get the resident memory of the process, in MB."""
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    """Get the peak resident memory of the process, or of its largest waited-for child, in MB."""
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    return resource.getrusage(who).ru_maxrss / 2 ** 10
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARK_DIR, stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_baseline(path: str, label: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Get the last result of a results file, optionally the last one with a label."""
+    if not os.path.exists(path):
+        return None
+    baseline = None
+    with open(path) as results:
+        for line in results:
+            result = json.loads(line)
+            if label is None or result.get('label') == label:
+                baseline = result
+    return baseline
+
+
+def save_result(path: str, result: Dict[str, Any], label: Optional[str], parameters: Dict[str, Any]) -> None:
+    """Append a result to a results file, stamped with its label, revision, date and parameters."""
+    result.update({
+        'label': label,
+        'revision': git_revision(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'parameters': parameters,
+    })
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a') as results:
+        results.write(json.dumps(result) + '\n')
+
+
+def format_comparison(metric: str, value: float, baseline: Optional[Dict[str, Any]]) -> str:
+    """Format a metric, with its change from the baseline when there is one."""
+    line = f'  {metric:<20} {value:12.2f}'
+    if baseline and baseline.get(metric):
+        name = baseline.get('label') or baseline.get('revision')
+        line += f'  ({(value - baseline[metric]) / baseline[metric]:+.1%} vs {name})'
+    return line
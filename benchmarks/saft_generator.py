@@ -0,0 +1,241 @@
+"""
+Generate synthetic Portuguese SAF-T (PT 1.04_01) accounting files.
+
+The files follow the layout read by `account.saft.import.wizard`: a Header,
+the SNC chart of accounts (aggregation and movement accounts) and customers in
+MasterFiles, and balanced journal entries in GeneralLedgerEntries. Entries are
+written as they are generated, so files of several GB are produced in constant
+memory. The same seed always produces the same file.
+
+Usage:
+    python benchmarks/saft_generator.py saft_2g.xml --size 2G --accounts 2000 --customers 50000 \\
+        --journals 8 --lines 4
+    python benchmarks/saft_generator.py saft_small.xml --transactions 10000
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+from typing import IO, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+SAFT_NAMESPACE = 'urn:OECD:StandardAuditFile-Tax:PT_1.04_01'
+FISCAL_YEAR = 2024
+COMPANY_VAT = '500000000'
+
+# SNC classes and the account prefixes movement accounts are spread over
+ACCOUNT_PREFIXES = (
+    ('11', 'Caixa'), ('12', 'Depositos a ordem'), ('211', 'Clientes c/c'), ('221', 'Fornecedores c/c'),
+    ('2432', 'IVA dedutivel'), ('2433', 'IVA liquidado'), ('311', 'Compras de mercadorias'),
+    ('432', 'Ativos fixos tangiveis'), ('51', 'Capital subscrito'), ('622', 'Fornecimentos e servicos'),
+    ('711', 'Vendas de mercadorias'), ('72', 'Prestacoes de servicos'),
+)
+UNITS = {'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30}
+
+
+def parse_size(value: str) -> int:
+    """Parse a file size such as 500M or 2G."""
+    value = value.strip().upper()
+    if value[-1:] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+
+class SaftGenerator:
+    """Write a synthetic SAF-T file.
+
+    Args:
+        accounts: Number of movement (GM) accounts.
+        customers: Number of customers.
+        journals: Number of journals the entries are spread over.
+        lines: Number of lines per entry, split between debit and credit.
+        seed: Seed of the amounts and of the customers of the entries.
+    """
+
+    def __init__(self, accounts: int = 500, customers: int = 1000, journals: int = 4, lines: int = 4, seed: int = 1) -> None:
+        self.accounts = max(len(ACCOUNT_PREFIXES), accounts)
+        self.customers = max(1, customers)
+        self.journals = max(1, min(99, journals))
+        self.lines = max(2, lines)
+        self.seed = seed
+
+    def account_codes(self) -> List[Tuple[str, str]]:
+        """Get the (AccountID, description) of the movement accounts."""
+        codes = []
+        for number in range(self.accounts):
+            prefix, description = ACCOUNT_PREFIXES[number % len(ACCOUNT_PREFIXES)]
+            sub = number // len(ACCOUNT_PREFIXES) + 1
+            codes.append((f'{prefix}{sub:04d}', f'{description} {sub}'))
+        return codes
+
+    def journal_ids(self) -> List[str]:
+        """Get the JournalIDs, which must exist as journal codes in the company importing the file."""
+        return [f'SJ{number:02d}' for number in range(1, self.journals + 1)]
+
+    def entries(self, transactions: int) -> Iterator[Tuple[int, str, date, str, List[Tuple[str, str, int]]]]:
+        """Generate the entries: (number, JournalID, date, CustomerID, [(side, AccountID, cents)])."""
+        rng = random.Random(self.seed)
+        codes = [code for code, _description in self.account_codes()]
+        journals = self.journal_ids()
+        debit_count = self.lines // 2
+        credit_count = self.lines - debit_count
+        for number in range(1, transactions + 1):
+            # Entries are written journal by journal, and dated in order within each journal
+            journal = journals[(number - 1) * len(journals) // transactions]
+            day = date(FISCAL_YEAR, 1, 1) + timedelta(days=number * 365 // (transactions + 1))
+            customer = f'C{rng.randrange(1, self.customers + 1):07d}'
+            debits = [rng.randrange(100, 1000000) for _index in range(debit_count)]
+            credits = self.split(sum(debits), credit_count, rng)
+            lines = [('Debit', rng.choice(codes), cents) for cents in debits]
+            lines += [('Credit', rng.choice(codes), cents) for cents in credits]
+            yield number, journal, day, customer, lines
+
+    @staticmethod
+    def split(total: int, parts: int, rng: random.Random) -> List[int]:
+        """Split an amount in cents in `parts` non-negative amounts with the same total."""
+        cuts = sorted(rng.randrange(0, total + 1) for _index in range(parts - 1))
+        bounds = [0] + cuts + [total]
+        return [bounds[index + 1] - bounds[index] for index in range(parts)]
+
+    def totals(self, transactions: int) -> int:
+        """Get the total debit (and credit) of the entries, in cents, without writing them."""
+        return sum(cents for *_entry, lines in self.entries(transactions) for side, _code, cents in lines if side == 'Debit')
+
+    def write(self, out: IO[str], transactions: int) -> None:
+        """Write the file with the given number of entries."""
+        total = self.totals(transactions)
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        out.write(f'<AuditFile xmlns="{SAFT_NAMESPACE}">\n')
+        self.write_header(out)
+        out.write('<MasterFiles>\n')
+        self.write_accounts(out)
+        self.write_customers(out)
+        out.write('</MasterFiles>\n')
+        out.write('<GeneralLedgerEntries>\n')
+        out.write(f'<NumberOfEntries>{transactions}</NumberOfEntries>\n')
+        out.write(f'<TotalDebit>{amount(total)}</TotalDebit>\n<TotalCredit>{amount(total)}</TotalCredit>\n')
+        current_journal: Optional[str] = None
+        for number, journal, day, customer, lines in self.entries(transactions):
+            if journal != current_journal:
+                if current_journal:
+                    out.write('</Journal>\n')
+                out.write(f'<Journal><JournalID>{journal}</JournalID><Description>Diario {journal}</Description>\n')
+                current_journal = journal
+            self.write_transaction(out, number, journal, day, customer, lines)
+        if current_journal:
+            out.write('</Journal>\n')
+        out.write('</GeneralLedgerEntries>\n</AuditFile>\n')
+
+    def write_header(self, out: IO[str]) -> None:
+        out.write(
+            '<Header>'
+            '<AuditFileVersion>1.04_01</AuditFileVersion>'
+            f'<CompanyID>{COMPANY_VAT}</CompanyID>'
+            f'<TaxRegistrationNumber>{COMPANY_VAT}</TaxRegistrationNumber>'
+            '<TaxAccountingBasis>C</TaxAccountingBasis>'
+            '<CompanyName>Empresa Sintetica, Lda</CompanyName>'
+            '<CompanyAddress><AddressDetail>Rua Principal 1</AddressDetail><City>Lisboa</City>'
+            '<PostalCode>1000-001</PostalCode><Country>PT</Country></CompanyAddress>'
+            f'<FiscalYear>{FISCAL_YEAR}</FiscalYear>'
+            f'<StartDate>{FISCAL_YEAR}-01-01</StartDate><EndDate>{FISCAL_YEAR}-12-31</EndDate>'
+            '<CurrencyCode>EUR</CurrencyCode>'
+            f'<DateCreated>{FISCAL_YEAR + 1}-01-15</DateCreated>'
+            '<TaxEntity>Global</TaxEntity>'
+            '<ProductCompanyTaxID>500000000</ProductCompanyTaxID>'
+            '<SoftwareCertificateNumber>0</SoftwareCertificateNumber>'
+            '<ProductID>SaftGenerator/Benchmark</ProductID><ProductVersion>1.0</ProductVersion>'
+            '</Header>\n')
+
+    def write_accounts(self, out: IO[str]) -> None:
+        out.write('<GeneralLedgerAccounts><TaxonomyReference>S</TaxonomyReference>\n')
+        for prefix, description in ACCOUNT_PREFIXES:
+            out.write(self.account(prefix, description, 'GR'))
+        for code, description in self.account_codes():
+            out.write(self.account(code, description, 'GM'))
+        out.write('</GeneralLedgerAccounts>\n')
+
+    @staticmethod
+    def account(code: str, description: str, category: str) -> str:
+        return (
+            f'<Account><AccountID>{code}</AccountID><AccountDescription>{escape(description)}</AccountDescription>'
+            '<OpeningDebitBalance>0.00</OpeningDebitBalance><OpeningCreditBalance>0.00</OpeningCreditBalance>'
+            '<ClosingDebitBalance>0.00</ClosingDebitBalance><ClosingCreditBalance>0.00</ClosingCreditBalance>'
+            f'<GroupingCategory>{category}</GroupingCategory>'
+            + (f'<GroupingCode>{code[:2]}</GroupingCode>' if category == 'GM' else '')
+            + '</Account>\n')
+
+    def write_customers(self, out: IO[str]) -> None:
+        for number in range(1, self.customers + 1):
+            # Every 20th customer shares the VAT of the previous one, as branches of a company do
+            vat = 500000000 + number - (1 if number % 20 == 0 else 0)
+            out.write(
+                f'<Customer><CustomerID>C{number:07d}</CustomerID><AccountID>2110001</AccountID>'
+                f'<CustomerTaxID>{vat}</CustomerTaxID><CompanyName>Cliente {number}</CompanyName>'
+                f'<BillingAddress><AddressDetail>Rua {number}</AddressDetail><City>Lisboa</City>'
+                '<PostalCode>1000-001</PostalCode><Country>PT</Country></BillingAddress>'
+                '<SelfBillingIndicator>0</SelfBillingIndicator></Customer>\n')
+
+    @staticmethod
+    def write_transaction(out: IO[str], number: int, journal: str, day: date, customer: str,
+                          lines: List[Tuple[str, str, int]]) -> None:
+        transaction_id = f'{day.isoformat()} {journal} {number}'
+        out.write(
+            f'<Transaction><TransactionID>{transaction_id}</TransactionID><Period>{day.month}</Period>'
+            f'<TransactionDate>{day.isoformat()}</TransactionDate><SourceID>bench</SourceID>'
+            f'<Description>Lancamento {number}</Description><DocArchivalNumber>{number}</DocArchivalNumber>'
+            f'<TransactionType>N</TransactionType><GLPostingDate>{day.isoformat()}</GLPostingDate>'
+            f'<CustomerID>{customer}</CustomerID><Lines>')
+        for record, (side, code, cents) in enumerate(lines, 1):
+            out.write(
+                f'<{side}Line><RecordID>{record}</RecordID><AccountID>{code}</AccountID>'
+                f'<SystemEntryDate>{day.isoformat()}T12:00:00</SystemEntryDate>'
+                f'<Description>Linha {record}</Description><{side}Amount>{amount(cents)}</{side}Amount></{side}Line>')
+        out.write('</Lines></Transaction>\n')
+
+
+def amount(cents: int) -> str:
+    return f'{cents // 100}.{cents % 100:02d}'
+
+
+def transactions_for_size(generator: SaftGenerator, size: int) -> int:
+    """Estimate the number of entries making a file of `size` bytes, from a sample entry."""
+    class Counter:
+        length = 0
+
+        def write(self, text: str) -> None:
+            self.length += len(text)
+
+    master = Counter()
+    generator.write_header(master)
+    generator.write_accounts(master)
+    generator.write_customers(master)
+    sample = Counter()
+    for entry in generator.entries(1000):
+        generator.write_transaction(sample, *entry)
+    return max(1, (size - master.length) * 1000 // max(1, sample.length))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='Path of the generated file.')
+    volume = parser.add_mutually_exclusive_group(required=True)
+    volume.add_argument('--transactions', type=int, help='Number of journal entries.')
+    volume.add_argument('--size', type=parse_size, help='Approximate file size, e.g. 500M or 2G.')
+    parser.add_argument('--accounts', type=int, default=500, help='Number of movement accounts.')
+    parser.add_argument('--customers', type=int, default=1000, help='Number of customers.')
+    parser.add_argument('--journals', type=int, default=4, help='Number of journals (at most 99).')
+    parser.add_argument('--lines', type=int, default=4, help='Number of lines per journal entry.')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    generator = SaftGenerator(accounts=args.accounts, customers=args.customers, journals=args.journals,
+                              lines=args.lines, seed=args.seed)
+    transactions = args.transactions or transactions_for_size(generator, args.size)
+    with open(args.output, 'w', encoding='utf-8', buffering=2 ** 20) as out:
+        generator.write(out, transactions)
+    print(f'Wrote {transactions} entries in journals {", ".join(generator.journal_ids())} '
+          f'to {args.output} ({os.path.getsize(args.output) / 2 ** 20:.1f} MB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,330 @@
+"""
+A local stub of the Vendus API serving synthetic data, for benchmarking the sync.
+
+Records are generated from their ID when a page is requested, so the stub
+serves millions of records without holding them in memory. Pagination
+(`page`, `per_page`), the `-id` sort and the `since` date filter behave like
+the Vendus API, and latency and 429 responses can be injected. With
+--etags, responses carry an ETag and requests repeating it with
+If-None-Match are answered 304 Not Modified.
+
+Usage:
+    python benchmarks/vendus_stub.py --port 8765 --products 100000 --documents 1000000 \\
+        --latency 0.05 --error-rate 0.01
+
+The API URL to configure is then `http://127.0.0.1:8765/`.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_VOLUMES = {
+    'products': 10000,
+    'customers': 10000,
+    'documents': 100000,
+    'stores': 10,
+    'suppliers': 100,
+    'rooms': 10,
+    'tables': 100,
+    'paymentmethods': 8,
+}
+DEFAULT_DAYS = 365
+DEFAULT_PER_PAGE = 100
+FIRST_DATE = date(2024, 1, 1)
+DOCUMENT_TYPES = ('FT', 'FR', 'FS', 'NC', 'ND')
+
+
+class SyntheticData:
+    """Deterministic Vendus payloads, generated from their ID.
+
+    Documents are dated in ID order over `days` days from `FIRST_DATE`, so that
+    the `since` filter can be answered with a bisection on the IDs.
+    """
+
+    def __init__(self, volumes: Dict[str, int], days: int = DEFAULT_DAYS) -> None:
+        self.volumes = volumes
+        self.days = max(1, days)
+        self.builders: Dict[str, Callable[[int], Dict[str, Any]]] = {
+            'products': self.product,
+            'customers': self.customer,
+            'documents': self.document,
+            'stores': self.store,
+            'suppliers': self.supplier,
+            'rooms': self.room,
+            'tables': self.table,
+            'paymentmethods': self.payment_method,
+        }
+
+    def product(self, vendus_id: int) -> Dict[str, Any]:
+        return {
+            'id': vendus_id,
+            'title': f'Product {vendus_id}',
+            'reference': f'REF{vendus_id:08d}',
+            'price': round(1 + (vendus_id * 7919) % 50000 / 100.0, 2),
+            'type': 'S' if vendus_id % 10 == 0 else 'P',
+            'unit': 'UN',
+        }
+
+    def customer(self, vendus_id: int) -> Dict[str, Any]:
+        return {
+            'id': vendus_id,
+            'name': f'Customer {vendus_id}',
+            'email': f'customer{vendus_id}@example.com',
+            'phone': f'2{vendus_id:08d}'[-9:],
+            'vat': f'{500000000 + vendus_id}',
+            'address': f'Rua {vendus_id % 997}, {vendus_id % 200}',
+            'city': 'Lisboa' if vendus_id % 2 else 'Porto',
+            'postal_code': f'{1000 + vendus_id % 8999}-{vendus_id % 999:03d}',
+        }
+
+    def document_date(self, vendus_id: int) -> date:
+        total = max(1, self.volumes['documents'])
+        return FIRST_DATE + timedelta(days=(vendus_id - 1) * self.days // total)
+
+    def document(self, vendus_id: int) -> Dict[str, Any]:
+        document_type = DOCUMENT_TYPES[vendus_id % len(DOCUMENT_TYPES)]
+        customers = self.volumes['customers']
+        return {
+            'id': vendus_id,
+            'number': f'{document_type} {vendus_id // 100000 + 1}/{vendus_id}',
+            'date': self.document_date(vendus_id).isoformat(),
+            'customer_id': (vendus_id * 31) % customers + 1 if customers and vendus_id % 5 else None,
+            'total': round((vendus_id * 104729) % 100000 / 100.0, 2),
+            'status': 'N' if vendus_id % 50 == 0 else 'F',
+            'type': document_type,
+            'store_id': vendus_id % max(1, self.volumes['stores']) + 1,
+            'payments': [{'id': vendus_id % max(1, self.volumes['paymentmethods']) + 1}],
+        }
+
+    def document_detail(self, vendus_id: int) -> Dict[str, Any]:
+        """A document with its items, as returned by `documents/<id>`: 1 to 15 items, 8 on average."""
+        products = max(1, self.volumes['products'])
+        items = []
+        for index in range(1 + (vendus_id * 7) % 15):
+            quantity = 1 + (vendus_id + index) % 3
+            price = round(1 + ((vendus_id + index) * 7919) % 5000 / 100.0, 2)
+            items.append({
+                'id': (vendus_id * 13 + index * 101) % products + 1,
+                'title': f'Item {index + 1}',
+                'qty': quantity,
+                'gross_price': price,
+                'amounts': {'gross_unit': price, 'gross_total': round(quantity * price, 2)},
+            })
+        return dict(self.document(vendus_id), items=items)
+
+    def store(self, vendus_id: int) -> Dict[str, Any]:
+        return {
+            'id': vendus_id,
+            'title': f'Store {vendus_id}',
+            'type': 'warehouse' if vendus_id % 5 == 0 else 'store',
+            'address': f'Avenida {vendus_id}',
+            'city': 'Lisboa',
+            'postalcode': '1000-001',
+            'country': 'PT',
+            'email': f'store{vendus_id}@example.com',
+            'phone': '210000000',
+            'status': 'on',
+        }
+
+    def supplier(self, vendus_id: int) -> Dict[str, Any]:
+        return {
+            'id': vendus_id,
+            'name': f'Supplier {vendus_id}',
+            'contact_name': f'Contact {vendus_id}',
+            'email': f'supplier{vendus_id}@example.com',
+            'phone': '220000000',
+            'address': f'Rua do Fornecedor {vendus_id}',
+            'city': 'Braga',
+            'postal_code': '4700-001',
+            'country': 'PT',
+        }
+
+    def room(self, vendus_id: int) -> Dict[str, Any]:
+        return {'id': vendus_id, 'title': f'Room {vendus_id}', 'capacity': 20, 'status': 'on'}
+
+    def table(self, vendus_id: int) -> Dict[str, Any]:
+        return {'id': vendus_id, 'title': f'Table {vendus_id}', 'capacity': 4, 'status': 'on'}
+
+    def payment_method(self, vendus_id: int) -> Dict[str, Any]:
+        return {
+            'id': vendus_id,
+            'title': f'Payment Method {vendus_id}',
+            'change': '1' if vendus_id == 1 else '0',
+            'type': 'NU' if vendus_id == 1 else 'CC',
+            'status': 'on',
+            'order': vendus_id,
+        }
+
+    def first_document_since(self, since: date) -> int:
+        """Get the lowest document ID dated on or after `since`."""
+        low, high = 1, self.volumes['documents'] + 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.document_date(middle) < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def page(self, entity: str, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Get a page of an entity, honouring `page`, `per_page`, `sort` and `since`."""
+        total = self.volumes[entity]
+        per_page = int(params.get('per_page', DEFAULT_PER_PAGE))
+        page = max(1, int(params.get('page', 1)))
+        first_id = 1
+        if entity == 'documents' and params.get('since'):
+            first_id = self.first_document_since(date.fromisoformat(params['since']))
+        ids = range(first_id, total + 1)
+        if params.get('sort') == '-id':
+            ids = ids[::-1]
+        build = self.builders[entity]
+        return [build(vendus_id) for vendus_id in ids[(page - 1) * per_page:page * per_page]]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer the Vendus endpoints from `server.data`."""
+
+    server: 'StubServer'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency * random.uniform(0.5, 1.5))
+        if server.error_rate and random.random() < server.error_rate:
+            server.count('throttled')
+            self._send(429, {'errors': [{'message': 'Too Many Requests'}]},
+                       {'Retry-After': str(server.retry_after)})
+            return
+
+        url = urlparse(self.path)
+        path = url.path.strip('/')
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        server.count('requests')
+        body = self._route(path, params)
+        if body is None:
+            self._send(404, {'errors': [{'message': 'Not Found'}]})
+        elif server.etags:
+            etag = '"%s"' % hashlib.sha1(json.dumps(body).encode()).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                server.count('not_modified')
+                self._send(304, None, {'ETag': etag})
+            else:
+                self._send(200, body, {'ETag': etag})
+        else:
+            self._send(200, body)
+
+    def _route(self, path: str, params: Dict[str, str]) -> Optional[Any]:
+        data = self.server.data
+        if path == 'documents/paymentmethods':
+            return data.page('paymentmethods', params)
+        if path == 'documents/types':
+            return [{'id': index + 1, 'type': document_type} for index, document_type in enumerate(DOCUMENT_TYPES)]
+        match = re.fullmatch(r'(customers|products|documents)/(\d+)', path)
+        if match:
+            entity, vendus_id = match.group(1), int(match.group(2))
+            if not 1 <= vendus_id <= data.volumes[entity]:
+                return None
+            if entity == 'documents':
+                return data.document_detail(vendus_id)
+            return data.builders[entity](vendus_id)
+        if path in data.builders:
+            return data.page(path, params)
+        return None
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body).encode() if status != 304 else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """The stub Vendus API, with its injected latency and error rate."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple,
+        data: SyntheticData,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: int = 1,
+        etags: bool = False,
+    ) -> None:
+        super().__init__(address, StubHandler)
+        self.data = data
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.etags = etags
+        self.counters = {'requests': 0, 'throttled': 0, 'not_modified': 0}
+        self._lock = threading.Lock()
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options of the stub (volumes, latency, errors) to a parser."""
+    for entity, volume in DEFAULT_VOLUMES.items():
+        parser.add_argument(f'--{entity}', type=int, default=volume, help=f'Number of {entity} served (default {volume}).')
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help='Number of days the documents are spread over.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean latency added to every response, in seconds.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of the requests answered with 429.')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After sent with the 429 responses, in seconds.')
+    parser.add_argument('--etags', action='store_true', help='Send ETags and answer If-None-Match with 304.')
+
+
+def stub_arguments(args: argparse.Namespace) -> List[str]:
+    """Convert the stub options parsed by `add_stub_arguments` back to a command line."""
+    argv = []
+    for entity in DEFAULT_VOLUMES:
+        argv += [f'--{entity}', str(getattr(args, entity))]
+    argv += ['--days', str(args.days), '--latency', str(args.latency),
+             '--error-rate', str(args.error_rate), '--retry-after', str(args.retry_after)]
+    if args.etags:
+        argv.append('--etags')
+    return argv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    data = SyntheticData({entity: getattr(args, entity) for entity in DEFAULT_VOLUMES}, days=args.days)
+    server = StubServer((args.host, args.port), data, latency=args.latency,
+                        error_rate=args.error_rate, retry_after=args.retry_after, etags=args.etags)
+    print(f'Vendus stub listening on http://{args.host}:{args.port}/', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served {server.counters['requests']} requests, {server.counters['throttled']} throttled, "
+              f"{server.counters['not_modified']} not modified", flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+from . import webhook
+
+# Check for bugs
+if not webhook:
+    raise ValueError("webhook is null")
@@ -0,0 +1,76 @@
+import hmac
+import json
+import logging
+from typing import Any, Dict, List
+
+from odoo import http
+from odoo.http import request
+
+_logger = logging.getLogger(__name__)
+
+# Header carrying the shared secret of the webhook
+SECRET_HEADER = 'X-Vendus-Webhook-Secret'
+
+
+class VendusWebhook(http.Controller):
+    """
+    Receives the change notifications of Vendus, e.g. for documents and customers.
+
+    The notifications are authenticated with the shared secret configured in
+    `vendus_integration.webhook_secret`, given in the `X-Vendus-Webhook-Secret`
+    header. It is not accepted in the URL, which ends up in access and proxy
+    logs. Their records are staged in
+    `vendus.payload` and applied in batches by its worker crons, so the response
+    does not wait for the upsert. The polling syncs remain as a reconciliation
+    fallback.
+    """
+
+    def _check_secret(self) -> bool:
+        """Check the shared secret of the request against the configured one."""
+        secret = request.env['ir.config_parameter'].sudo().get_param('vendus_integration.webhook_secret')
+        if not secret:
+            return False
+        given = request.httprequest.headers.get(SECRET_HEADER) or ''
+        return hmac.compare_digest(given.encode(), secret.encode())
+
+    @staticmethod
+    def _parse_records(body: bytes) -> List[Dict[str, Any]]:
+        """Get the records of a notification.
+
+        The body may be a record, a list of records, or an object with the
+        records under `data`.
+
+        Raises:
+            ValueError: If the body is not JSON, or a record has no ID.
+        """
+        data = json.loads(body or b'null')
+        if isinstance(data, dict) and 'data' in data:
+            data = data['data']
+        records = data if isinstance(data, list) else [data]
+        if not all(isinstance(record, dict) and str(record.get('id', '')).isdigit() for record in records):
+            raise ValueError("Every record must be an object with a numeric id")
+        return records
+
+    @http.route('/vendus/webhook/<string:entity>', type='http', auth='public', methods=['POST'], csrf=False)
+    def receive(self, entity: str, **kwargs) -> http.Response:
+        """Queue the records of a Vendus notification.
+
+        Args:
+            entity: The entity of the records, e.g. documents or customers.
+
+        Returns:
+            202 with the number of queued records, 400 for an invalid body,
+            403 for a wrong secret and 404 for an unknown entity.
+        """
+        if not self._check_secret():
+            return request.make_json_response({'error': 'invalid secret'}, status=403)
+        Payload = request.env['vendus.payload'].sudo()
+        if entity not in Payload._get_entity_models():
+            return request.make_json_response({'error': f'unknown entity {entity}'}, status=404)
+        try:
+            records = self._parse_records(request.httprequest.get_data())
+        except ValueError as e:
+            return request.make_json_response({'error': str(e)}, status=400)
+        count = Payload._enqueue(entity, records)
+        _logger.debug("Queued %d Vendus %s payloads from the webhook", count, entity)
+        return request.make_json_response({'queued': count}, status=202)
@@ -0,0 +1,3 @@
+from .scheduler import SyncTask, run_tasks
+from .sync_run import EntityMetrics, LRUCache, SyncRun
+from .vendus_client import ConditionalResponse, VendusClient, get_client
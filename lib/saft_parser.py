@@ -0,0 +1,81 @@
+"""Pure SAF-T conversion helpers.
+
+Nothing here uses the Odoo environment, so the functions can run in the
+worker processes of a `ProcessPoolExecutor` while the Odoo process keeps
+reading the file and writing moves.
+"""
+from typing import Any, Dict, List, Tuple
+
+from lxml import etree
+
+# Worker process state, set once by `init_worker`
+_worker_maps: Dict[str, Any] = {}
+
+
+class UnknownAccountError(Exception):
+    """A transaction line uses an account missing from the file."""
+
+    def __init__(self, account_code: str, transaction_id: str) -> None:
+        super().__init__(account_code, transaction_id)
+        self.account_code = account_code
+        self.transaction_id = transaction_id
+
+
+def prepare_transaction(
+    transaction: etree._Element,
+    journal_id: int,
+    map_accounts: Dict[str, int],
+    map_partners: Dict[str, int],
+    nsmap: Dict[str, str],
+) -> Dict[str, Any]:
+    """Convert one 'Transaction' node to the values of an account.move.
+
+    Raises:
+        UnknownAccountError: If a line uses an account that is not mapped.
+    """
+    partner_ref = transaction.findtext('saft:CustomerID', None, nsmap) or transaction.findtext('saft:SupplierID', None, nsmap)
+    partner_id = map_partners.get(partner_ref, False)
+
+    move_lines: List[Tuple[int, int, Dict[str, Any]]] = []
+    for line_tag, amount_tag, side in (('DebitLine', 'DebitAmount', 'debit'), ('CreditLine', 'CreditAmount', 'credit')):
+        for line in transaction.iterfind(f'saft:Lines/saft:{line_tag}', nsmap):
+            account_code = line.findtext('saft:AccountID', '', nsmap).strip()
+            if account_code not in map_accounts:
+                raise UnknownAccountError(account_code, transaction.findtext('saft:TransactionID', '', nsmap))
+            move_lines.append((0, 0, {
+                'name': line.findtext('saft:Description', None, nsmap),
+                'account_id': map_accounts[account_code],
+                'partner_id': partner_id,
+                side: float(line.findtext(f'saft:{amount_tag}', '0', nsmap)),
+            }))
+
+    return {
+        'move_type': 'entry',
+        'journal_id': journal_id,
+        'date': transaction.findtext('saft:TransactionDate', None, nsmap),
+        'ref': transaction.findtext('saft:TransactionID', None, nsmap),
+        'narration': transaction.findtext('saft:Description', None, nsmap),
+        'line_ids': move_lines,
+    }
+
+
+def init_worker(map_accounts: Dict[str, int], map_partners: Dict[str, int], nsmap: Dict[str, str]) -> None:
+    """Store the maps in a worker process, so shards do not carry them."""
+    _worker_maps.update(accounts=map_accounts, partners=map_partners, nsmap=nsmap)
+
+
+def prepare_shard(shard: List[Tuple[int, bytes]]) -> List[Dict[str, Any]]:
+    """Convert a shard of serialized transactions, in a worker process.
+
+    Args:
+        shard: (Odoo journal ID, serialized 'Transaction' node) pairs.
+
+    Returns:
+        The move values, in the order of the shard.
+    """
+    parser = etree.XMLParser(huge_tree=True)
+    return [
+        prepare_transaction(etree.fromstring(xml, parser), journal_id, _worker_maps['accounts'],
+                            _worker_maps['partners'], _worker_maps['nsmap'])
+        for journal_id, xml in shard
+    ]
@@ -0,0 +1,163 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+_logger = logging.getLogger(__name__)
+
+# Number of batches a task may fetch ahead of the batches applied
+DEFAULT_BUFFER_SIZE = 20
+
+# How often a blocked producer checks whether its task was cancelled, in seconds
+_PUT_TIMEOUT = 0.2
+
+
+class SyncTask:
+    """A unit of work of `run_tasks`.
+
+    Args:
+        name: The name of the task, referenced by the `depends` of other tasks.
+        fetch: Returns the batches of the task. It is iterated in a worker
+            thread, so it must not use the Odoo environment.
+        apply: Stores a batch. Called in the calling thread, in batch order.
+        finish: Called in the calling thread once every batch was applied.
+        depends: The tasks whose batches must all be applied before the
+            batches of this one. Tasks that are not scheduled are ignored.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[], Iterable[Any]],
+        apply: Callable[[Any], None],
+        finish: Optional[Callable[[], None]] = None,
+        depends: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.fetch = fetch
+        self.apply = apply
+        self.finish = finish
+        self.depends = tuple(depends)
+
+
+def topological_order(tasks: Sequence[SyncTask]) -> List[SyncTask]:
+    """Sort tasks after their dependencies, keeping the given order otherwise.
+
+    Raises:
+        ValueError: If the dependencies have a cycle.
+    """
+    by_name = {task.name: task for task in tasks}
+    ordered: List[SyncTask] = []
+    state: Dict[str, str] = {}
+
+    def visit(task: SyncTask) -> None:
+        if state.get(task.name) == 'done':
+            return
+        if state.get(task.name) == 'visiting':
+            raise ValueError(f"Sync tasks have a dependency cycle through {task.name}")
+        state[task.name] = 'visiting'
+        for name in task.depends:
+            if name in by_name:
+                visit(by_name[name])
+        state[task.name] = 'done'
+        ordered.append(task)
+
+    for task in tasks:
+        visit(task)
+    return ordered
+
+
+def run_tasks(
+    tasks: Sequence[SyncTask],
+    max_workers: Optional[int] = None,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    on_error: Optional[Callable[[SyncTask, BaseException], None]] = None,
+) -> None:
+    """Fetch tasks concurrently, and apply their batches in dependency order.
+
+    The `fetch` of every task runs in a pool of worker threads, started in
+    dependency order, and hands its batches over through a bounded queue of
+    `buffer_size` batches. The calling thread is the only one applying batches:
+    it applies the batches of every task whose dependencies are finished, as
+    they arrive, so the network time of the tasks overlaps and the total time
+    approaches the one of the slowest task.
+
+    A task failing to fetch or apply a batch is stopped, and `on_error` is
+    called with the exception in the calling thread. The task then counts as
+    finished for its dependents. Without `on_error`, or when it raises, the
+    remaining tasks are cancelled and the exception is raised.
+
+    Args:
+        tasks: The tasks to run.
+        max_workers: The number of tasks fetched at once. Defaults to all.
+        buffer_size: The number of batches a task fetches ahead.
+        on_error: Handles the failure of a task.
+    """
+    ordered = topological_order(tasks)
+    if not ordered:
+        return
+    queues = {task.name: queue.Queue(maxsize=max(1, buffer_size)) for task in ordered}
+    cancelled = {task.name: threading.Event() for task in ordered}
+    # Released once per message put in any queue, so the calling thread can wait for one
+    arrivals = threading.Semaphore(0)
+
+    def put(task: SyncTask, message: tuple) -> bool:
+        while not cancelled[task.name].is_set():
+            try:
+                queues[task.name].put(message, timeout=_PUT_TIMEOUT)
+            except queue.Full:
+                continue
+            arrivals.release()
+            return True
+        return False
+
+    def produce(task: SyncTask) -> None:
+        if cancelled[task.name].is_set():
+            return
+        try:
+            for batch in task.fetch():
+                if not put(task, ('batch', batch)):
+                    return
+        except Exception as e:
+            put(task, ('error', e))
+        else:
+            put(task, ('end', None))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(ordered), thread_name_prefix='vendus_sync')
+    pending = list(ordered)
+    finished = set()
+    try:
+        for task in ordered:
+            executor.submit(produce, task)
+        while pending:
+            progressed = False
+            for task in list(pending):
+                if not all(name in finished or name not in queues for name in task.depends):
+                    continue
+                try:
+                    kind, payload = queues[task.name].get_nowait()
+                except queue.Empty:
+                    continue
+                progressed = True
+                try:
+                    if kind == 'error':
+                        raise payload
+                    if kind == 'batch':
+                        task.apply(payload)
+                        continue
+                    if task.finish:
+                        task.finish()
+                except Exception as e:
+                    cancelled[task.name].set()
+                    if on_error is None:
+                        raise
+                    on_error(task, e)
+                pending.remove(task)
+                finished.add(task.name)
+            if pending and not progressed:
+                arrivals.acquire()
+    finally:
+        for event in cancelled.values():
+            event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
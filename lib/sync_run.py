@@ -0,0 +1,173 @@
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+from .vendus_client import ClientStats, VendusClient, latency_percentile, stats_delta
+
+DEFAULT_CUSTOMER_CACHE_SIZE = 10000
+
+
+class LRUCache:
+    """A bounded mapping dropping the least recently used entries first."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class EntityMetrics:
+    """The metrics of one entity sync in a `SyncRun`.
+
+    API calls made with `stats` passed to the client are counted here, and the
+    SQL queries, upserted or staged records and detail calls are added by `SyncRun.measure`. The wall
+    time runs from the creation of the metrics until `stop`.
+    """
+
+    def __init__(self, entity: str, model_name: Optional[str] = None) -> None:
+        self.entity = entity
+        self.model_name = model_name
+        self.stats = ClientStats()
+        self.started = time.monotonic()
+        self.ended: Optional[float] = None
+        self.query_count = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.staged = 0
+        self.detail_calls = 0
+        self.error: Any = False
+
+    def stop(self) -> None:
+        if self.ended is None:
+            self.ended = time.monotonic()
+
+    @property
+    def duration(self) -> float:
+        return (self.ended or time.monotonic()) - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        stats = self.stats.snapshot()
+        return {
+            'entity': self.entity,
+            'duration': self.duration,
+            'api_calls': stats['calls'],
+            'retries': stats['retries'],
+            'throttled_seconds': stats['throttled_seconds'],
+            'bytes_received': stats['bytes_received'],
+            'latency_p50': latency_percentile(stats['latency_buckets'], 50),
+            'latency_p95': latency_percentile(stats['latency_buckets'], 95),
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'staged': self.staged,
+            'detail_calls': self.detail_calls,
+            'query_count': self.query_count,
+            'error': self.error,
+        }
+
+
+class SyncRun:
+    """State shared by the entity syncs of one `vendus.sync` run.
+
+    It holds the API client and caches that are only valid for the duration of
+    the run, such as the Odoo IDs of the customers already resolved, and the
+    number of records created, updated, left unchanged or staged per model.
+
+    The metrics of each entity sync are kept in `entities`, in the order the
+    entities were started.
+    """
+
+    def __init__(self, client: VendusClient, customer_cache_size: Optional[int] = None) -> None:
+        self.client = client
+        self.customer_ids = LRUCache(customer_cache_size or DEFAULT_CUSTOMER_CACHE_SIZE)
+        self.upserts: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {'created': 0, 'updated': 0, 'unchanged': 0, 'staged': 0})
+        self.detail_calls: Dict[str, int] = defaultdict(int)
+        self.entities: Dict[str, EntityMetrics] = {}
+        self.started = time.monotonic()
+        self._client_stats_start = client.stats.snapshot()
+
+    def count_upserts(
+        self, model_name: str, created: int = 0, updated: int = 0, unchanged: int = 0, staged: int = 0,
+    ) -> None:
+        """Add the outcome of a batch upsert, or the records staged for one, to the counters of the run."""
+        counts = self.upserts[model_name]
+        counts['created'] += created
+        counts['updated'] += updated
+        counts['unchanged'] += unchanged
+        counts['staged'] += staged
+
+    def count_detail_calls(self, model_name: str, count: int) -> None:
+        """Add the API calls made to read the details of single records to the counters of the run."""
+        self.detail_calls[model_name] += count
+
+    def start_entity(self, entity: str, model_name: Optional[str] = None) -> 'EntityMetrics':
+        """Start measuring the sync of an entity, see `EntityMetrics`."""
+        metrics = self.entities[entity] = EntityMetrics(entity, model_name)
+        return metrics
+
+    @contextmanager
+    def measure(self, metrics: 'EntityMetrics', query_count: Optional[Callable[[], int]] = None) -> Iterator[None]:
+        """Count the SQL queries and the records upserted or staged by a block in the metrics of an entity.
+
+        The blocks measured for different entities must not overlap, which holds
+        since they all run in the thread owning the cursor.
+
+        Args:
+            metrics: The metrics of the entity.
+            query_count: Returns the number of queries run so far by the cursor.
+        """
+        queries_start = query_count() if query_count else 0
+        upserts_start = dict(self.upserts[metrics.model_name]) if metrics.model_name else None
+        detail_calls_start = self.detail_calls[metrics.model_name] if metrics.model_name else 0
+        try:
+            yield
+        finally:
+            if query_count:
+                metrics.query_count += query_count() - queries_start
+            if upserts_start is not None:
+                counts = self.upserts[metrics.model_name]
+                metrics.created += counts['created'] - upserts_start['created']
+                metrics.updated += counts['updated'] - upserts_start['updated']
+                metrics.unchanged += counts['unchanged'] - upserts_start['unchanged']
+                metrics.staged += counts['staged'] - upserts_start['staged']
+                metrics.detail_calls += self.detail_calls[metrics.model_name] - detail_calls_start
+
+    def elapsed(self) -> float:
+        """Get the wall time since the run started, in seconds."""
+        return time.monotonic() - self.started
+
+    def latency_percentile(self, percentile: float) -> float:
+        """Estimate a percentile of the API latency since the run started, see `latency_percentile`."""
+        return latency_percentile(self.client_stats()['latency_buckets'], percentile)
+
+    def client_stats(self) -> Dict[str, Any]:
+        """Get the API calls, retries, seconds spent throttled, bytes received and
+        latency histogram since the run started.
+
+        The client is shared by the worker, so calls made concurrently by other
+        runs of the same worker are included.
+        """
+        return stats_delta(self._client_stats_start, self.client.stats.snapshot())
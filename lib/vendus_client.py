@@ -0,0 +1,457 @@
+import atexit
+import bisect
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from odoo import _
+from odoo.exceptions import UserError, ValidationError
+
+from .rate_limit import TokenBucket
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_RATE_LIMIT = 10.0
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 60.0
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD')
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_clients: Dict[Tuple, 'VendusClient'] = {}
+_clients_lock = threading.Lock()
+
+
+# Upper bounds, in seconds, of the buckets of the latency histogram
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+
+class ClientStats:
+    """Thread-safe counters of a client, see `VendusClient.stats`.
+
+    The latency of every HTTP call is counted in a fixed histogram (see
+    `LATENCY_BUCKETS`), so that the stats of a long-lived client stay bounded
+    and the latency of a part of a run is the difference of two snapshots.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.bytes_received = 0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self._lock = threading.Lock()
+
+    def add(self, calls: int = 0, retries: int = 0, throttled_seconds: float = 0.0) -> None:
+        with self._lock:
+            self.calls += calls
+            self.retries += retries
+            self.throttled_seconds += throttled_seconds
+
+    def add_response(self, latency: float, size: int) -> None:
+        """Count the latency and the body size of an HTTP response."""
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, latency)
+        with self._lock:
+            self.bytes_received += size
+            self.latency_buckets[bucket] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'throttled_seconds': self.throttled_seconds,
+                'bytes_received': self.bytes_received,
+                'latency_buckets': tuple(self.latency_buckets),
+            }
+
+
+def stats_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Subtract two `ClientStats.snapshot`s."""
+    delta = {}
+    for key, value in after.items():
+        if isinstance(value, tuple):
+            delta[key] = tuple(a - b for a, b in zip(value, before[key]))
+        else:
+            delta[key] = value - before[key]
+    return delta
+
+
+def latency_percentile(buckets: Iterable[int], percentile: float) -> float:
+    """Estimate a latency percentile from a histogram, as the upper bound of its bucket.
+
+    Args:
+        buckets: The number of calls in each bucket of `LATENCY_BUCKETS`.
+        percentile: The percentile, between 0 and 100.
+
+    Returns:
+        The latency in seconds, 0 without calls. Calls slower than the last
+        finite bound are reported as that bound.
+    """
+    buckets = list(buckets)
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    threshold = total * percentile / 100.0
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        seen += count
+        if seen >= threshold and count:
+            return min(bound, LATENCY_BUCKETS[-2])
+    return LATENCY_BUCKETS[-2]
+
+
+class ConditionalResponse:
+    """The outcome of `VendusClient.get_conditional`.
+
+    Attributes:
+        modified: False when the server answered 304 Not Modified.
+        data: The JSON response, when modified.
+        body: The raw response body, when modified.
+        etag: The ETag of the response, if the server sent one.
+        last_modified: The Last-Modified date of the response, if the server sent one.
+        content_hash: The SHA-1 of the body, when modified.
+    """
+
+    def __init__(
+        self,
+        modified: bool,
+        data: Any = None,
+        body: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_hash: Optional[str] = None,
+    ) -> None:
+        self.modified = modified
+        self.data = data
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convert a Retry-After header, in seconds or as an HTTP date, to seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class VendusClient:
+    """HTTP client for the Vendus API.
+
+    The client keeps one `requests.Session` with a pool of keep-alive
+    connections, so consecutive calls skip the DNS, TCP and TLS setup. The
+    session is shared by the threads of the worker process (the Vendus API does
+    not use cookies), and every call is bounded by a connect and a read timeout.
+
+    Calls go through a token bucket limiting the rate of this process, which
+    the caller sizes to its share of the Vendus quota. Idempotent
+    requests answered with 429 or 5xx, or failing to connect, are retried with
+    jittered exponential backoff, waiting at least as long as the server's
+    Retry-After. After a 429, the wait happens in the paused token bucket, so
+    it is counted once. The time spent throttled, the latency of the calls and
+    the bytes received are counted in `stats`.
+
+    The client does not use the Odoo environment and can be used from any
+    thread. Use `get_client` to obtain the client of the current worker.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        rate_limit: float = DEFAULT_RATE_LIMIT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ) -> None:
+        self.api_url = api_url
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucket(rate_limit)
+        self.stats = ClientStats()
+        self.session = self._build_session()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+        })
+        return session
+
+    def request(
+        self,
+        endpoint: str,
+        method: str = 'GET',
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        allow_not_found: bool = False,
+        stats: Optional[ClientStats] = None,
+    ) -> Any:
+        """Make a request to the Vendus API.
+
+        Args:
+            endpoint: The endpoint to make the request to.
+            method: The HTTP method to use (GET, POST, PUT, DELETE). Defaults to GET.
+            params: The URL parameters to pass.
+            data: The JSON data to send in the request body.
+            headers: Extra headers to send with the request.
+            allow_not_found: Return None instead of raising on a 404 response.
+            stats: Extra counters the call is also counted in, besides `self.stats`.
+
+        Returns:
+            The JSON response from the API.
+
+        Raises:
+            UserError: If the API request fails.
+        """
+        response = self._call(endpoint, method, params, data, headers, allow_not_found, stats)
+        if response is None:
+            return None
+        try:
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            raise UserError(_(f'Error communicating with Vendus API: {str(e)}'))
+
+    def get_conditional(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        stats: Optional[ClientStats] = None,
+    ) -> ConditionalResponse:
+        """GET an endpoint unless it did not change since a previous response.
+
+        The validators of the previous response are sent as If-None-Match and
+        If-Modified-Since. Servers ignoring them answer with the full body, whose
+        hash can then be compared with the previous one.
+
+        Args:
+            endpoint: The endpoint to read.
+            params: The URL parameters to pass.
+            etag: The ETag of the previous response.
+            last_modified: The Last-Modified date of the previous response.
+            stats: Extra counters the call is also counted in.
+
+        Raises:
+            UserError: If the API request fails.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        response = self._call(endpoint, 'GET', params, None, headers, False, stats)
+        if response.status_code == 304:
+            return ConditionalResponse(False, etag=etag, last_modified=last_modified)
+        try:
+            data = response.json()
+        except requests.exceptions.RequestException as e:
+            raise UserError(_(f'Error communicating with Vendus API: {str(e)}'))
+        return ConditionalResponse(
+            True,
+            data=data,
+            body=response.text,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            content_hash=hashlib.sha1(response.content).hexdigest(),
+        )
+
+    def _call(
+        self,
+        endpoint: str,
+        method: str,
+        params: Optional[Dict[str, Any]],
+        data: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        allow_not_found: bool,
+        stats: Optional[ClientStats],
+    ) -> Optional[requests.Response]:
+        """Send a request, see `request`, and raise on an error response.
+
+        Returns:
+            The response, or None for a 404 when `allow_not_found` is set.
+        """
+        params = dict(params or {})
+        params['api_key'] = self.api_key
+
+        try:
+            response = self._send(method, f"{self.api_url}{endpoint}", headers, params, data, stats)
+
+            # Handle errors
+            if response.status_code == 404 and allow_not_found:
+                return None
+            if response.status_code == 400:
+                raise ValidationError(_('Bad Request: Could not parse request'))
+            elif response.status_code == 401:
+                raise UserError(_('Unauthorized: Authentication failed'))
+            elif response.status_code == 403:
+                raise UserError(_('Forbidden: Authenticated user does not have access'))
+            elif response.status_code == 404:
+                raise ValidationError(_('Not Found: Resource not found'))
+            elif response.status_code == 415:
+                raise ValidationError(_('Unsupported Media Type: Invalid content-type header'))
+            elif response.status_code == 422:
+                raise ValidationError(_('Unprocessable Entry: Validation error occurred'))
+            elif response.status_code == 429:
+                raise UserError(_('Too Many Requests: Request rejected due to rate limiting'))
+            elif response.status_code >= 500:
+                raise UserError(_('Internal Server Error: An unexpected error occurred'))
+
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            raise UserError(_(f'Error communicating with Vendus API: {str(e)}'))
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        params: Dict[str, Any],
+        data: Optional[Dict[str, Any]],
+        stats: Optional[ClientStats] = None,
+    ) -> requests.Response:
+        """Send a request through the rate limiter, retrying idempotent requests.
+
+        Returns the last response, which may still be an error once the retries
+        are exhausted. Connection errors are raised after the last attempt.
+        """
+        counters = [self.stats] + ([stats] if stats is not None else [])
+        retry = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            throttled = self.rate_limiter.acquire()
+            for counter in counters:
+                counter.add(calls=1, throttled_seconds=throttled)
+            try:
+                started = time.monotonic()
+                response = self.session.request(
+                    method, url, headers=headers, params=params, json=data, timeout=self.timeout)
+                latency = time.monotonic() - started
+                for counter in counters:
+                    counter.add_response(latency, len(response.content))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if not retry or attempt >= self.max_retries:
+                    raise
+                response = None
+            if response is not None and (
+                    not retry or response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries):
+                return response
+
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+            retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            _logger.info("Vendus API %s %s failed (%s), retrying in %.1fs",
+                         method, url, response.status_code if response is not None else 'connection error', delay)
+            attempt += 1
+            if response is not None and response.status_code == 429:
+                # every thread waits in the paused rate limiter, where the wait is counted as throttled
+                self.rate_limiter.pause(delay)
+                for counter in counters:
+                    counter.add(retries=1)
+            else:
+                time.sleep(delay)
+                for counter in counters:
+                    counter.add(retries=1, throttled_seconds=delay)
+
+    def get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        allow_not_found: bool = False,
+        stats: Optional[ClientStats] = None,
+    ) -> Any:
+        """Shortcut for a GET request, see `request`."""
+        return self.request(endpoint, params=params, allow_not_found=allow_not_found, stats=stats)
+
+    def get_many(self, endpoints: Iterable[str], allow_not_found: bool = True) -> List[Any]:
+        """GET several endpoints concurrently, over the pooled connections.
+
+        Args:
+            endpoints: The endpoints to read.
+            allow_not_found: Return None for the endpoints answering 404.
+
+        Returns:
+            The JSON responses, in the order of the endpoints.
+        """
+        endpoints = list(endpoints)
+        if len(endpoints) <= 1:
+            return [self.get(endpoint, allow_not_found=allow_not_found) for endpoint in endpoints]
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, len(endpoints)),
+                                thread_name_prefix='vendus_fetch') as executor:
+            return list(executor.map(
+                lambda endpoint: self.get(endpoint, allow_not_found=allow_not_found), endpoints))
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+
+def get_client(
+    api_url: str,
+    api_key: str,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    rate_limit: float = DEFAULT_RATE_LIMIT,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> VendusClient:
+    """Get the client of the current worker process for the given settings.
+
+    Clients are kept for the lifetime of the process, so that their pooled
+    connections are reused by the following sync runs, and its rate limiter
+    keeps counting across runs. A client whose settings changed is replaced,
+    but not closed: another thread may still be running a sync with it. Its
+    connections are released once it is garbage collected, and the cached
+    clients are closed when the process exits.
+    """
+    key = (api_url, api_key, pool_size, connect_timeout, read_timeout, rate_limit, max_retries)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            for old_key in [k for k in _clients if k[0] == api_url]:
+                del _clients[old_key]
+            client = _clients[key] = VendusClient(
+                api_url, api_key, pool_size=pool_size,
+                connect_timeout=connect_timeout, read_timeout=read_timeout,
+                rate_limit=rate_limit, max_retries=max_retries)
+        return client
+
+
+@atexit.register
+def _close_clients() -> None:
+    """Close the connections of the cached clients when the process exits."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,88 @@
+"""
+Deduplicate the Vendus records before their `unique(vendus_id)` constraints are created.
+
+Stores, suppliers, rooms, tables and payment methods had no uniqueness
+constraint, and concurrent syncs could insert a record twice. The constraints of
+the other models may also have failed to be created on databases already
+holding duplicates. For every Vendus table, the oldest row of each `vendus_id`
+is kept: the foreign keys pointing to the duplicates are moved to it, the
+duplicates are deleted, and its `vendus_hash` is cleared so that the next sync
+stores the latest Vendus data again.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+TABLES = (
+    'vendus_product',
+    'vendus_customer',
+    'vendus_document',
+    'vendus_invoice',
+    'vendus_payment_method',
+    'vendus_store',
+    'vendus_supplier',
+    'vendus_room',
+    'vendus_table',
+)
+
+
+def _get_references(cr, table):
+    """Get the (table, column) of the single-column foreign keys pointing to a table."""
+    cr.execute("""
+        SELECT source.relname, attribute.attname
+          FROM pg_constraint fk
+          JOIN pg_class source ON source.oid = fk.conrelid
+          JOIN pg_attribute attribute ON attribute.attrelid = fk.conrelid AND attribute.attnum = fk.conkey[1]
+         WHERE fk.contype = 'f' AND fk.confrelid = %s::regclass AND array_length(fk.conkey, 1) = 1
+    """, [table])
+    return cr.fetchall()
+
+
+def _has_column(cr, table, column):
+    cr.execute("""
+        SELECT 1 FROM information_schema.columns
+         WHERE table_name = %s AND column_name = %s
+    """, [table, column])
+    return bool(cr.fetchone())
+
+
+def _deduplicate(cr, table):
+    cr.execute(f"""
+        CREATE TEMPORARY TABLE vendus_duplicates AS
+        SELECT id, keep_id FROM (
+            SELECT id, min(id) OVER (PARTITION BY vendus_id) AS keep_id
+              FROM {table}
+             WHERE vendus_id IS NOT NULL
+        ) ranked
+         WHERE id != keep_id
+    """)
+    if not cr.rowcount:
+        cr.execute("DROP TABLE vendus_duplicates")
+        return 0
+    duplicates = cr.rowcount
+    for source, column in _get_references(cr, table):
+        cr.execute(f"""
+            UPDATE "{source}" SET "{column}" = duplicate.keep_id
+              FROM vendus_duplicates duplicate
+             WHERE "{source}"."{column}" = duplicate.id
+        """)
+    if _has_column(cr, table, 'vendus_hash'):
+        cr.execute(f"""
+            UPDATE {table} SET vendus_hash = NULL
+             WHERE id IN (SELECT keep_id FROM vendus_duplicates)
+        """)
+    cr.execute(f"DELETE FROM {table} WHERE id IN (SELECT id FROM vendus_duplicates)")
+    cr.execute("DROP TABLE vendus_duplicates")
+    return duplicates
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    for table in TABLES:
+        cr.execute("SELECT to_regclass(%s)", [table])
+        if not cr.fetchone()[0]:
+            continue
+        duplicates = _deduplicate(cr, table)
+        if duplicates:
+            _logger.info("Deleted %d duplicated Vendus records from %s", duplicates, table)
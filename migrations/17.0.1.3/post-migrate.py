@@ -0,0 +1,19 @@
+"""
+Fill the daily sales summary from the documents synced before it existed.
+
+The summary is kept up to date by the document writes, but the documents
+already stored when the module is upgraded have no summary rows yet.
+"""
+import logging
+
+from odoo import SUPERUSER_ID, api
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['vendus.sales.summary']._rebuild()
+    _logger.info("Rebuilt the Vendus sales summary of the existing documents")
@@ -1,28 +1,54 @@
 from . import res_config_settings
+from . import vendus_mixin
+from . import bulk_load
 from . import customer
 from . import document
+from . import document_line
 from . import invoice
+from . import payload
 from . import payment_method
+from . import posting_job
 from . import product
+from . import response_cache
+from . import sales_summary
+from . import saft_import_job
 from . import room
 from . import store
 from . import supplier
 from . import sync
+from . import sync_run
+from . import sync_state
 from . import table
 
 # Check for bugs
 if not res_config_settings:
     raise ValueError("res_config_settings is null")
+if not vendus_mixin:
+    raise ValueError("vendus_mixin is null")
+if not bulk_load:
+    raise ValueError("bulk_load is null")
 if not customer:
     raise ValueError("customer is null")
 if not document:
     raise ValueError("document is null")
+if not document_line:
+    raise ValueError("document_line is null")
 if not invoice:
     raise ValueError("invoice is null")
+if not payload:
+    raise ValueError("payload is null")
 if not payment_method:
     raise ValueError("payment_method is null")
+if not posting_job:
+    raise ValueError("posting_job is null")
 if not product:
     raise ValueError("product is null")
+if not response_cache:
+    raise ValueError("response_cache is null")
+if not sales_summary:
+    raise ValueError("sales_summary is null")
+if not saft_import_job:
+    raise ValueError("saft_import_job is null")
 if not room:
     raise ValueError("room is null")
 if not store:
@@ -31,5 +57,9 @@ if not supplier:
     raise ValueError("supplier is null")
 if not sync:
     raise ValueError("sync is null")
+if not sync_run:
+    raise ValueError("sync_run is null")
+if not sync_state:
+    raise ValueError("sync_state is null")
 if not table:
     raise ValueError("table is null")
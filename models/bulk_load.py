@@ -0,0 +1,216 @@
+import io
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# The entities of the initial load, in dependency order, and their model
+LOAD_ENTITIES = {
+    'products': 'vendus.product',
+    'customers': 'vendus.customer',
+    'documents': 'vendus.document',
+}
+
+# Number of records merged, and committed, at once
+DEFAULT_LOAD_CHUNK_SIZE = 10000
+
+
+def _copy_value(value: Any) -> str:
+    """Format a column value for the text format of COPY."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class VendusBulkLoad(models.AbstractModel):
+    """
+    Initial load of the Vendus history, for onboarding a store.
+
+    The products, customers and documents are read from the first page, and
+    stored without the ORM: the values of a chunk of records are prepared as
+    usual (see `_prepare_vendus_values`), streamed with `COPY` into a temporary
+    staging table, and merged into the table of the model with a single
+    `INSERT ... ON CONFLICT (vendus_id) DO UPDATE`. The ORM caches of the model
+    are invalidated afterwards, and the sales summary is rebuilt for the dates
+    of the merged documents.
+
+    A load is started from the settings, see `action_start`. Each chunk is
+    committed with the next page to read in `vendus.sync.state`, so that an
+    interrupted load resumes where it stopped. Once an entity is loaded, its
+    sync cursor is advanced and the regular syncs take over. The document lines
+    are not loaded: the list endpoint of Vendus leaves the items out. The
+    documents are therefore stored without `vendus_hash`, so that the syncs
+    and reconciliations reading them again fetch their items, and the older
+    ones get their lines when they are posted, see
+    `vendus.posting.job._fetch_missing_lines`.
+    """
+    _name = 'vendus.bulk.load'
+    _description = 'Vendus Initial Load'
+
+    @api.model
+    def _get_chunk_size(self) -> int:
+        return max(1, self.env['vendus.sync']._get_config_number(
+            'vendus_integration.load_chunk_size', DEFAULT_LOAD_CHUNK_SIZE))
+
+    @api.model
+    def _prepare_rows(self, model_name: str, payloads: List[Dict[str, Any]]) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Convert a chunk of payloads to the columns and rows of their table.
+
+        Payloads repeating a Vendus ID are merged, the last one wins, as in the
+        batch upsert. Records the batch upsert would store without hash, e.g.
+        the documents listed without items, get no hash either.
+
+        Returns:
+            The column names, and the column values of each record.
+        """
+        Model = self.env[model_name].sudo()
+        by_vendus_id = {Model._normalize_vendus_id(data['id']): data for data in payloads if data}
+        relations = Model._prefetch_vendus_relations(list(by_vendus_id.values()))
+        columns: List[str] = []
+        rows = []
+        for vendus_id, vendus_data in by_vendus_id.items():
+            vals = Model._prepare_vendus_values(vendus_data, relations)
+            vals['vendus_id'] = vendus_id
+            vals['vendus_hash'] = Model._hash_vendus_payload(vendus_data)
+            if Model._has_unresolved_vendus_references(vendus_data, relations):
+                # stored again, with its items, by a later sync
+                vals['vendus_hash'] = None
+            if not columns:
+                columns = sorted(vals)
+            rows.append(tuple(Model._fields[name].convert_to_column(vals.get(name), Model) for name in columns))
+        return columns, rows
+
+    @api.model
+    def _copy_rows(self, staging: str, columns: List[str], rows: Iterable[Tuple[Any, ...]]) -> None:
+        """Stream rows into a table with COPY."""
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(map(_copy_value, row)))
+            buffer.write('\n')
+        buffer.seek(0)
+        self.env.cr.copy_expert(f"COPY {staging} ({', '.join(columns)}) FROM STDIN", buffer)
+
+    @api.model
+    def _merge_rows(self, model_name: str, columns: List[str], rows: List[Tuple[Any, ...]]) -> Tuple[int, int]:
+        """Insert or update the rows of a model in its table, with set-based statements.
+
+        Rows whose `vendus_hash` did not change are left untouched, unless they
+        have no hash.
+
+        Returns:
+            The number of created and updated records.
+        """
+        Model = self.env[model_name]
+        table = Model._table
+        staging = f'{table}_load'
+        Model.flush_model()
+        self.env.cr.execute(f"""
+            CREATE TEMPORARY TABLE IF NOT EXISTS {staging} AS
+            SELECT {', '.join(columns)} FROM {table} WITH NO DATA
+        """)
+        self.env.cr.execute(f"TRUNCATE {staging}")
+        self._copy_rows(staging, columns, rows)
+
+        if model_name == 'vendus.document':
+            # the dates of the updated documents before the merge, whose summary changes too
+            self.env.cr.execute(f"""
+                SELECT least(min(d.date), min(s.date)), greatest(max(d.date), max(s.date))
+                  FROM {staging} s LEFT JOIN {table} d ON d.vendus_id = s.vendus_id
+            """)
+            date_range = self.env.cr.fetchone()
+
+        updated_columns = [name for name in columns if name != 'vendus_id']
+        self.env.cr.execute(f"""
+            INSERT INTO {table} ({', '.join(columns)}, create_uid, create_date, write_uid, write_date)
+            SELECT {', '.join(columns)}, %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+              FROM {staging}
+                ON CONFLICT (vendus_id) DO UPDATE
+               SET {', '.join(f'{name} = EXCLUDED.{name}' for name in updated_columns)},
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+             WHERE {table}.vendus_hash IS NULL OR {table}.vendus_hash IS DISTINCT FROM EXCLUDED.vendus_hash
+         RETURNING xmax = 0
+        """, {'uid': self.env.uid})
+        inserted = [row[0] for row in self.env.cr.fetchall()]
+        Model.invalidate_model()
+
+        if model_name == 'vendus.document' and date_range[0]:
+            self.env['vendus.sales.summary']._rebuild(*date_range)
+        created = sum(inserted)
+        return created, len(inserted) - created
+
+    @api.model
+    def _load_entity(self, entity: str, model_name: str) -> None:
+        """Load every record of an entity, resuming from the last committed chunk."""
+        Sync = self.env['vendus.sync']
+        state = self.env['vendus.sync.state']._get_state(entity)
+        client = Sync._get_client()
+        page = state.load_page
+        chunk_size = self._get_chunk_size()
+        chunk: List[Dict[str, Any]] = []
+        progress = {'max_id': 0, 'max_date': None, 'created': 0, 'updated': 0}
+
+        def merge(next_page: int) -> None:
+            for record in chunk:
+                progress['max_id'] = max(progress['max_id'], int(record['id']))
+                if record.get('date') and (not progress['max_date'] or record['date'] > progress['max_date']):
+                    progress['max_date'] = record['date']
+            columns, rows = self._prepare_rows(model_name, chunk)
+            if rows:
+                created, updated = self._merge_rows(model_name, columns, rows)
+                progress['created'] += created
+                progress['updated'] += updated
+            state.write({'load_page': next_page})
+            Sync._commit_progress()
+            chunk.clear()
+
+        for records in Sync._iter_api_pages(entity, entity, page=page, client=client):
+            chunk.extend(records)
+            page += 1
+            if len(chunk) >= chunk_size:
+                merge(page)
+        merge(page)
+        state.advance(vendus_id=progress['max_id'], date=progress['max_date'])
+        state.write({'date_loaded': fields.Datetime.now()})
+        Sync._commit_progress()
+        _logger.info("Vendus initial load of %s: %d created, %d updated",
+                     entity, progress['created'], progress['updated'])
+
+    @api.model
+    def load_history(self) -> None:
+        """Run the pending initial loads, started by `action_start`, see the class docstring.
+
+        The reference data (stores, payment methods, ...) is synced first, so
+        that documents can be linked to it.
+        """
+        States = self.env['vendus.sync.state']
+        pending = [
+            entity for entity in LOAD_ENTITIES
+            if States._get_state(entity).load_page and not States._get_state(entity).date_loaded
+        ]
+        if not pending:
+            return
+        Sync = self.env['vendus.sync']
+        Sync.sync_entities([entity for entity in Sync._get_sync_steps() if entity not in LOAD_ENTITIES])
+        for entity in pending:
+            self._load_entity(entity, LOAD_ENTITIES[entity])
+
+    @api.model
+    def _cron_load_history(self) -> None:
+        self.load_history()
+
+    @api.model
+    def action_start(self, entities: Optional[List[str]] = None) -> None:
+        """Load the history from the first page, in the background.
+
+        Args:
+            entities: The entities to load. Defaults to products, customers and documents.
+        """
+        for entity in entities or LOAD_ENTITIES:
+            self.env['vendus.sync.state']._get_state(entity).write({'load_page': 1, 'date_loaded': False})
+        self.env.ref(f'{self._module}.ir_cron_load_history')._trigger()
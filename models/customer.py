@@ -1,14 +1,17 @@
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 from odoo import api, fields, models
 from odoo.exceptions import ValidationError
 
+from ..lib.sync_run import SyncRun
+
 
 class VendusCustomer(models.Model):
     _name = 'vendus.customer'
+    _inherit = ['vendus.upsert.mixin']
     _description = 'Vendus Customer'
 
     name: fields.Char = fields.Char(string='Name', required=True, index=True)
-    vendus_id: fields.Integer = fields.Integer(string='Vendus ID', required=True, index=True)
+    vendus_id: fields.Integer = fields.Integer(string='Vendus ID', required=True)
     odoo_partner_id: fields.Many2one = fields.Many2one('res.partner', string='Odoo Partner', index=True)
     email: fields.Char = fields.Char(string='Email')
     phone: fields.Char = fields.Char(string='Phone')
@@ -25,22 +28,19 @@ class VendusCustomer(models.Model):
     ]
 
     @api.model
-    def create_or_update_from_vendus(self, vendus_data: dict) -> Optional['VendusCustomer']:
-        """Create or update a customer from Vendus data
+    def _prepare_vendus_values(self, vendus_data: dict, relations: dict) -> dict:
+        """Convert Vendus customer data to record values
 
         Args:
             vendus_data (dict): The data from Vendus.
+            relations (dict): Unused, customers have no related records to resolve.
 
         Returns:
-            Optional[VendusCustomer]: The created or updated customer, or None if no data was provided.
+            dict: The values of the customer.
         """
-        if not vendus_data:
-            return None
-        customer = self.env['vendus.customer'].sudo().with_context(active_test=False).search([
-            ('vendus_id', '=', vendus_data['id'])
-        ], limit=1)
-        values = {
+        return {
             'name': vendus_data['name'],
+            'vendus_id': vendus_data['id'],
             'email': vendus_data.get('email'),
             'phone': vendus_data.get('phone'),
             'vat': vendus_data.get('vat'),
@@ -48,8 +48,59 @@ class VendusCustomer(models.Model):
             'city': vendus_data.get('city'),
             'postal_code': vendus_data.get('postal_code'),
         }
-        if customer:
-            customer.sudo().write(values)
-        else:
-            customer = self.env['vendus.customer'].sudo().create(values)
-        return customer
+
+    @api.model
+    def batch_upsert_from_vendus(self, payloads: List[dict], run: Optional[SyncRun] = None) -> 'VendusCustomer':
+        """Create or update customers from Vendus data, as superuser
+
+        Args:
+            payloads (List[dict]): The data from Vendus.
+            run (Optional[SyncRun]): The current sync run, if any.
+
+        Returns:
+            VendusCustomer: The created or updated customers.
+        """
+        customers = super(VendusCustomer, self.sudo()).batch_upsert_from_vendus(payloads, run=run)
+        if run:
+            for customer in customers:
+                run.customer_ids.put(customer.vendus_id, customer.id)
+        return customers
+
+    @api.model
+    def _resolve_vendus_customers(self, vendus_ids: Iterable[int], run: Optional[SyncRun] = None) -> Dict[int, int]:
+        """Map Vendus customer IDs to customer IDs, for a whole page of documents
+
+        The IDs are looked up in the LRU cache of the sync run first, then in one
+        query. During a sync run, the customers still missing are fetched from
+        Vendus concurrently and created in one batch, so documents are not left
+        without their customer.
+
+        Args:
+            vendus_ids (Iterable[int]): The Vendus IDs of the customers.
+            run (Optional[SyncRun]): The current sync run, if any.
+
+        Returns:
+            Dict[int, int]: The customer IDs by Vendus ID. Unknown customers are left out.
+        """
+        result = {}
+        missing = []
+        for vendus_id in set(vendus_ids):
+            customer_id = run.customer_ids.get(vendus_id) if run else None
+            if customer_id:
+                result[vendus_id] = customer_id
+            else:
+                missing.append(vendus_id)
+        if not missing:
+            return result
+
+        found = self._get_vendus_records(missing)
+        result.update(found)
+        unknown = [vendus_id for vendus_id in missing if vendus_id not in found]
+        if unknown and run:
+            payloads = run.client.get_many(f'customers/{vendus_id}' for vendus_id in unknown)
+            created = self.batch_upsert_from_vendus([payload for payload in payloads if payload], run=run)
+            result.update({customer.vendus_id: customer.id for customer in created})
+        if run:
+            for vendus_id, customer_id in found.items():
+                run.customer_ids.put(vendus_id, customer_id)
+        return result
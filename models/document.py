@@ -1,5 +1,7 @@
-from typing import Dict, Optional
-from odoo import api, fields, models
+from typing import Any, Dict, List, Optional, Set, Tuple
+from odoo import api, fields, models, tools
+
+from ..lib.sync_run import SyncRun
 
 class VendusDocument(models.Model):
     """Vendus Document
@@ -13,17 +15,27 @@ class VendusDocument(models.Model):
     There is a unique constraint on the Vendus ID, so that we can't create two
     documents with the same Vendus ID.
 
-    The create_or_update_from_vendus method creates or updates a document from the
-    given data. If the document already exists, it updates it. If not, it creates it.
-    The data must contain the document number, the Vendus ID, the date, the customer
-    ID, the total amount, the status, and the type. The customer ID is used to find
-    the corresponding customer in the vendus.customer model. If the customer is not
-    found, the customer_id field is set to False.
+    Documents are stored through the batch upsert of `vendus.upsert.mixin`. The
+    data must contain the document number, the Vendus ID, the date, the customer
+    ID, the total amount, the status, and the type. The customers of a page are
+    resolved at once against the vendus.customer model, and fetched from Vendus
+    during a sync run when missing. If the customer is still not found, the
+    customer_id field is set to False. The store and the payment method are
+    resolved against the synced reference data, and left empty when missing.
+
+    The lines of the documents come from their `items`. The documents listed
+    without items are fetched from the `documents/<id>` endpoint during a sync
+    run, concurrently for a whole page, and so are the products of the items
+    not synced yet. The lines of a page are then stored with
+    `vendus.document.line._replace_document_lines`. Documents whose items or
+    products are unknown keep their lines, and are stored without hash so that
+    the next sync completes them.
 
-    The method returns the created or updated document.
+    The upsert keeps `vendus.sales.summary`, read by the dashboard, up to date.
     """
 
     _name = 'vendus.document'
+    _inherit = ['vendus.upsert.mixin']
 
     name: fields.Char = fields.Char(string='Document Number', required=True)
     vendus_id: fields.Integer = fields.Integer(string='Vendus ID', required=True)
@@ -31,8 +43,13 @@ class VendusDocument(models.Model):
         'account.move', string='Odoo Invoice')
     date: fields.Date = fields.Date(string='Document Date')
     customer_id: fields.Many2one = fields.Many2one(
-        'vendus.customer', string='Customer')
+        'vendus.customer', string='Customer', index='btree_not_null')
+    store_id: fields.Many2one = fields.Many2one('vendus.store', string='Store')
+    payment_method_id: fields.Many2one = fields.Many2one(
+        'vendus.payment.method', string='Payment Method',
+        help='The payment method of the first payment of the document.')
     total_amount: fields.Float = fields.Float(string='Total Amount')
+    line_ids: fields.One2many = fields.One2many('vendus.document.line', 'document_id', string='Lines')
     state: fields.Selection = fields.Selection([
         ('draft', 'Draft'),
         ('final', 'Final'),
@@ -53,40 +70,185 @@ class VendusDocument(models.Model):
         ('vendus_id_uniq', 'unique(vendus_id)', 'Vendus ID must be unique!')
     ]
 
+    def init(self) -> None:
+        # The dashboard graphs read the documents of a period, by type and status
+        tools.create_index(self._cr, 'vendus_document_date_type_state_idx', self._table, ['date', 'type', 'state'])
+
+    @api.model
+    def _prefetch_vendus_relations(
+        self, payloads: List[Dict[str, str]], run: Optional[SyncRun] = None,
+    ) -> Dict[str, Dict[int, int]]:
+        """Resolve the customers, stores, payment methods and items of a page of documents at once.
+
+        See `vendus.customer._resolve_vendus_customers`. The items missing from
+        the payloads are fetched from Vendus during a sync run, and the products
+        of all the items are resolved at once, see
+        `vendus.product._resolve_vendus_products`.
+
+        Args:
+            payloads (List[Dict[str, str]]): The data from Vendus.
+            run (Optional[SyncRun]): The current sync run, if any.
+
+        Returns:
+            Dict[str, Dict[int, int]]: The record IDs by Vendus ID, under `customers`,
+            `stores`, `payment_methods` and `products`, the items of the
+            documents by Vendus ID under `items`, and the Vendus IDs of the
+            documents whose lines are incomplete and whose items could not be
+            fetched under `missing_items`.
+        """
+        items, missing_items = self._get_vendus_items(payloads, run=run)
+        product_vendus_ids = {
+            int(item['id']) for document_items in items.values() for item in document_items if item.get('id')}
+        customer_vendus_ids = {int(data['customer_id']) for data in payloads if data.get('customer_id')}
+        store_vendus_ids = {int(data['store_id']) for data in payloads if data.get('store_id')}
+        payment_method_vendus_ids = {
+            vendus_id for vendus_id in map(self._get_payment_method_vendus_id, payloads) if vendus_id}
+        return {
+            'customers': self.env['vendus.customer']._resolve_vendus_customers(customer_vendus_ids, run=run),
+            'stores': self.env['vendus.store']._get_vendus_records(list(store_vendus_ids)),
+            'payment_methods': self.env['vendus.payment.method']._get_vendus_records(list(payment_method_vendus_ids)),
+            'products': self.env['vendus.product']._resolve_vendus_products(product_vendus_ids, run=run),
+            'items': items,
+            'missing_items': missing_items,
+        }
+
+    @api.model
+    def _get_vendus_items(
+        self, payloads: List[Dict[str, Any]], run: Optional[SyncRun] = None,
+    ) -> Tuple[Dict[int, List[Dict[str, Any]]], Set[int]]:
+        """Get the items of a page of changed documents, by Vendus ID.
+
+        The list endpoint of Vendus leaves the items out, and has no batch
+        detail endpoint. During a sync run, the documents without items are
+        fetched concurrently from `documents/<id>`, over the pooled connections
+        of the client, except the documents already stored with complete lines
+        (see `_with_complete_lines`): the items of an issued document do not
+        change, only its status does. The detail calls are counted in the run,
+        see `SyncRun.count_detail_calls`. Documents whose items are not fetched
+        are left out, and keep their lines.
+
+        Returns:
+            The items by Vendus ID, and the Vendus IDs of the documents whose
+            lines are incomplete and whose items could not be fetched.
+        """
+        items = {int(data['id']): data['items'] for data in payloads if isinstance(data.get('items'), list)}
+        missing = [int(data['id']) for data in payloads if int(data['id']) not in items]
+        if missing:
+            complete = self._with_complete_lines(missing)
+            missing = [vendus_id for vendus_id in missing if vendus_id not in complete]
+        if missing and run:
+            run.count_detail_calls(self._name, len(missing))
+            details = run.client.get_many(f'documents/{vendus_id}' for vendus_id in missing)
+            items.update({
+                vendus_id: detail['items'] for vendus_id, detail in zip(missing, details)
+                if detail and isinstance(detail.get('items'), list)
+            })
+        return items, {vendus_id for vendus_id in missing if vendus_id not in items}
+
+    @api.model
+    def _with_complete_lines(self, vendus_ids: List[int]) -> Set[int]:
+        """Get the Vendus IDs of the documents stored with lines that all have a product, in one query."""
+        self.env['vendus.document.line'].flush_model(['document_id', 'product_id'])
+        self.env.cr.execute(f"""
+            SELECT document.vendus_id
+              FROM {self._table} document
+             WHERE document.vendus_id = ANY(%s)
+               AND EXISTS (SELECT 1 FROM vendus_document_line line WHERE line.document_id = document.id)
+               AND NOT EXISTS (SELECT 1 FROM vendus_document_line line
+                                WHERE line.document_id = document.id AND line.product_id IS NULL)
+        """, [vendus_ids])
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _has_unresolved_items(self, vendus_id: int, relations: Dict[str, Any]) -> bool:
+        """Whether the lines of a document are incomplete: its items are unknown, or refer to unknown products."""
+        if vendus_id in relations['missing_items']:
+            return True
+        return any(
+            isinstance(item, dict) and item.get('id') and int(item['id']) not in relations['products']
+            for item in relations['items'].get(vendus_id) or []
+        )
+
+    @api.model
+    def _get_payment_method_vendus_id(self, vendus_data: Dict[str, Any]) -> Optional[int]:
+        """Get the Vendus ID of the payment method of the first payment of a document, if any."""
+        payments = vendus_data.get('payments') or []
+        if payments and isinstance(payments[0], dict) and payments[0].get('id'):
+            return int(payments[0]['id'])
+        return None
+
     @api.model
-    def create_or_update_from_vendus(self, vendus_data: Dict[str, str]) -> 'VendusDocument':
-        """Create or update a vendus document from the given data.
+    def _has_unresolved_vendus_references(self, vendus_data: Dict[str, Any], relations: Dict[str, Any]) -> bool:
+        """Whether the customer, store, payment method or line products of a document are not stored yet."""
+        customer_vendus_id = vendus_data.get('customer_id')
+        store_vendus_id = vendus_data.get('store_id')
+        payment_method_vendus_id = self._get_payment_method_vendus_id(vendus_data)
+        return bool(
+            self._has_unresolved_items(int(vendus_data['id']), relations)
+            or (customer_vendus_id and int(customer_vendus_id) not in relations['customers'])
+            or (store_vendus_id and int(store_vendus_id) not in relations['stores'])
+            or (payment_method_vendus_id and payment_method_vendus_id not in relations['payment_methods'])
+        )
+
+    @api.model
+    def _prepare_vendus_values(self, vendus_data: Dict[str, str], relations: Dict[str, Dict[int, int]]) -> Dict[str, str]:
+        """Convert Vendus document data to record values.
 
         Args:
             vendus_data (Dict[str, str]): The data from Vendus.
+            relations (Dict[str, Dict[int, int]]): The customers resolved for the page.
 
         Returns:
-            VendusDocument: The created or updated document.
+            Dict[str, str]: The values of the document.
         """
-        # Find the document in the database
-        vendus_document = self.search([('vendus_id', '=', vendus_data['id'])])
-
-        # Find the customer in the database
-        customer = self.env['vendus.customer'].search(
-            [('vendus_id', '=', vendus_data['customer_id'])])
-        
-        # Create the values to write to the database
-        vals = {
+        customer_vendus_id = vendus_data.get('customer_id')
+        store_vendus_id = vendus_data.get('store_id')
+        payment_method_vendus_id = self._get_payment_method_vendus_id(vendus_data)
+        return {
             'name': vendus_data['number'],
             'vendus_id': vendus_data['id'],
             'date': vendus_data['date'],
-            'customer_id': customer.id if customer else False,
+            'customer_id': relations['customers'].get(int(customer_vendus_id), False) if customer_vendus_id else False,
+            'store_id': relations['stores'].get(int(store_vendus_id), False) if store_vendus_id else False,
+            'payment_method_id': relations['payment_methods'].get(payment_method_vendus_id, False),
             'total_amount': vendus_data['total'],
             'state': 'final' if vendus_data['status'] == 'F' else 'draft',
             'type': vendus_data['type'],
         }
-        
-        # If the document already exists, update it
-        if vendus_document:
-            vendus_document.write(vals)
-        # If not, create it
-        else:
-            vendus_document = self.create(vals)
-        
-        # Return the created or updated document
-        return vendus_document
\ No newline at end of file
+
+    @api.model
+    def _post_vendus_upsert(
+        self,
+        changed: Dict[Any, Dict[str, Any]],
+        record_ids: Dict[Any, int],
+        relations: Dict[str, Any],
+        run: Optional[SyncRun] = None,
+    ) -> None:
+        """Replace the lines of the created or updated documents of a page whose items are known.
+
+        Documents with items of products that could not be resolved keep their
+        lines, their hash is not stored so that they are stored again later.
+        """
+        Line = self.env['vendus.document.line']
+        lines = {}
+        for vendus_id, vendus_data in changed.items():
+            items = relations['items'].get(vendus_id)
+            if items is None or self._has_unresolved_items(vendus_id, relations):
+                continue
+            payment_method_vendus_id = self._get_payment_method_vendus_id(vendus_data)
+            payment_method_id = relations['payment_methods'].get(payment_method_vendus_id)
+            lines[record_ids[vendus_id]] = [
+                Line._prepare_line_values(item, relations['products'], payment_method_id)
+                for item in items if isinstance(item, dict)
+            ]
+        Line._replace_document_lines(lines)
+
+    @api.model
+    def batch_upsert_from_vendus(self, payloads: List[Dict[str, Any]], run: Optional[SyncRun] = None) -> 'VendusDocument':
+        """Upsert a page of documents, and apply the change of their totals to the sales summary."""
+        Summary = self.env['vendus.sales.summary']
+        vendus_ids = [int(data['id']) for data in payloads if data]
+        before = Summary._get_contributions(self._get_vendus_records(vendus_ids).values())
+        documents = super().batch_upsert_from_vendus(payloads, run=run)
+        Summary._add_documents(before, Summary._get_contributions(documents.ids))
+        return documents
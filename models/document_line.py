@@ -0,0 +1,118 @@
+import json
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from odoo import api, fields, models
+
+# The fields compared to tell whether a line changed
+LINE_FIELDS = ('product_id', 'payment_method_id', 'name', 'quantity', 'price_unit', 'discount', 'price_subtotal')
+
+
+class VendusDocumentLine(models.Model):
+    """
+    A line of a Vendus document, i.e. an item of the document in Vendus.
+
+    Lines are stored with their document, by `vendus.document._post_vendus_upsert`:
+    the lines of a whole page of documents are compared with the existing ones
+    and replaced at once, see `_replace_document_lines`. A line is identified by
+    its document and its position in the document.
+    """
+    _name = 'vendus.document.line'
+    _description = 'Vendus Document Line'
+    _order = 'document_id, sequence, id'
+
+    document_id: fields.Many2one = fields.Many2one(
+        'vendus.document', string='Document', required=True, ondelete='cascade', index=True)
+    sequence: int = fields.Integer(string='Sequence', required=True, default=1)
+    product_id: fields.Many2one = fields.Many2one(
+        'vendus.product', string='Product', ondelete='set null', index='btree_not_null')
+    categ_id: fields.Many2one = fields.Many2one(
+        related='product_id.odoo_product_id.categ_id', string='Product Category', store=True)
+    payment_method_id: fields.Many2one = fields.Many2one(
+        'vendus.payment.method', string='Payment Method', ondelete='set null',
+        help='The payment method of the document.')
+    name: str = fields.Char(string='Description')
+    quantity: float = fields.Float(string='Quantity', default=1.0)
+    price_unit: float = fields.Float(string='Unit Price')
+    discount: float = fields.Float(string='Discount (%)')
+    price_subtotal: float = fields.Float(string='Subtotal')
+    date: fields.Date = fields.Date(related='document_id.date', string='Date')
+    state: str = fields.Selection(related='document_id.state', string='Status')
+
+    @api.model
+    def _prepare_line_values(
+        self, item: Dict[str, Any], products: Dict[int, int], payment_method_id: Optional[int],
+    ) -> Dict[str, Any]:
+        """Convert an item of a Vendus document to line values, without document and sequence.
+
+        Args:
+            item: The item, as returned by the `documents/<id>` endpoint.
+            products: The product IDs by Vendus ID, resolved for the page.
+            payment_method_id: The payment method of the document.
+        """
+        amounts = item.get('amounts') or {}
+        quantity = float(item.get('qty') or 1.0)
+        price_unit = float(item.get('gross_price') or amounts.get('gross_unit') or 0.0)
+        discount = float(item.get('discount_percentage') or 0.0)
+        subtotal = amounts.get('gross_total')
+        if subtotal is None:
+            subtotal = quantity * price_unit * (1 - discount / 100.0)
+        return {
+            'product_id': products.get(int(item['id']), False) if item.get('id') else False,
+            'payment_method_id': payment_method_id or False,
+            'name': item.get('title') or item.get('reference') or '',
+            'quantity': quantity,
+            'price_unit': price_unit,
+            'discount': discount,
+            'price_subtotal': float(subtotal),
+        }
+
+    @api.model
+    def _get_comparable_values(self, line: 'VendusDocumentLine') -> Dict[str, Any]:
+        values = {}
+        for name in LINE_FIELDS:
+            value = line[name]
+            values[name] = value.id if isinstance(value, models.BaseModel) else value
+        values['product_id'] = values['product_id'] or False
+        values['payment_method_id'] = values['payment_method_id'] or False
+        values['name'] = values['name'] or ''
+        return values
+
+    @api.model
+    def _replace_document_lines(self, lines: Dict[int, List[Dict[str, Any]]]) -> None:
+        """Replace the lines of several documents, touching only the lines that differ.
+
+        The existing lines are read in one query. Lines at a new position are
+        created with one multi-record `create`, lines that changed are written
+        grouped by identical values, and the surplus lines are deleted at once.
+
+        Args:
+            lines: The values of the new lines of each document, by document ID,
+                as returned by `_prepare_line_values`.
+        """
+        if not lines:
+            return
+        existing: Dict[Tuple[int, int], 'VendusDocumentLine'] = {
+            (line.document_id.id, line.sequence): line
+            for line in self.search_fetch([('document_id', 'in', list(lines))], ('document_id', 'sequence') + LINE_FIELDS)
+        }
+        to_create: List[Dict[str, Any]] = []
+        updates: Dict[str, List[int]] = defaultdict(list)
+        update_values: Dict[str, Dict[str, Any]] = {}
+        for document_id, document_lines in lines.items():
+            for sequence, vals in enumerate(document_lines, start=1):
+                line = existing.pop((document_id, sequence), None)
+                if line is None:
+                    to_create.append(dict(vals, document_id=document_id, sequence=sequence))
+                elif self._get_comparable_values(line) != vals:
+                    group = json.dumps(vals, sort_keys=True, default=str)
+                    updates[group].append(line.id)
+                    update_values[group] = vals
+
+        obsolete = self.browse([line.id for line in existing.values()])
+        if obsolete:
+            obsolete.unlink()
+        for group, ids in updates.items():
+            self.browse(ids).write(update_values[group])
+        if to_create:
+            self.create(to_create)
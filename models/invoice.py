@@ -1,6 +1,8 @@
-from typing import Optional, Dict
+from typing import Dict, List, Optional
 from odoo import api, fields, models
 
+from ..lib.sync_run import SyncRun
+
 
 class VendusInvoice(models.Model):
     """
@@ -8,9 +10,9 @@ class VendusInvoice(models.Model):
 
     This model is used to store and manage invoices from Vendus in Odoo.
 
-    The `create_or_update_from_vendus` method is used to create or update an
-    invoice from the given data. If an invoice with the same Vendus ID already
-    exists, it is updated. Otherwise, a new invoice is created.
+    Invoices are stored through the batch upsert of `vendus.upsert.mixin`. If an
+    invoice with the same Vendus ID already exists, it is updated. Otherwise, a
+    new invoice is created.
 
     The `state` field is used to keep track of the invoice's state. The possible
     states are 'draft', 'posted', and 'paid'.
@@ -19,6 +21,7 @@ class VendusInvoice(models.Model):
     model. The only constraint is that the `vendus_id` must be unique.
     """
     _name = 'vendus.invoice'
+    _inherit = ['vendus.upsert.mixin']
     _description = 'Vendus Invoice'
 
     name: fields.Char = fields.Char(
@@ -58,37 +61,66 @@ class VendusInvoice(models.Model):
     ]
 
     @api.model
-    def create_or_update_from_vendus(self, vendus_data: Dict[str, str]) -> Optional['VendusInvoice']:
+    def _prefetch_vendus_relations(
+        self, payloads: List[Dict[str, str]], run: Optional[SyncRun] = None,
+    ) -> Dict[str, Dict[int, int]]:
+        """
+        Resolve the customers of a page of invoices at once.
+
+        See `vendus.customer._resolve_vendus_customers`.
+
+        Args:
+            payloads: The data from Vendus.
+            run: The current sync run, if any.
+
+        Returns:
+            The customer IDs by Vendus ID, under `customers`.
+        """
+        customer_vendus_ids = {int(data['customer_id']) for data in payloads if data.get('customer_id')}
+        return {'customers': self.env['vendus.customer']._resolve_vendus_customers(customer_vendus_ids, run=run)}
+
+    @api.model
+    def _has_unresolved_vendus_references(self, vendus_data: Dict[str, str], relations: Dict[str, Dict[int, int]]) -> bool:
+        """Whether the customer of an invoice is not stored yet."""
+        customer_vendus_id = vendus_data.get('customer_id')
+        return bool(customer_vendus_id and int(customer_vendus_id) not in relations['customers'])
+
+    @api.model
+    def _prepare_vendus_values(self, vendus_data: Dict[str, str], relations: Dict[str, Dict[int, int]]) -> Dict[str, str]:
         """
-        Create or update a vendus invoice from the given data.
+        Convert Vendus invoice data to the values of a new invoice.
+
+        Args:
+            vendus_data: The data from Vendus.
+            relations: The customers resolved for the page.
+
+        Returns:
+            The values of the invoice.
+        """
+        customer_vendus_id = vendus_data.get('customer_id')
+        return dict(
+            self._prepare_vendus_update_values(vendus_data, relations),
+            vendus_id=vendus_data['id'],
+            customer_id=relations['customers'].get(int(customer_vendus_id), False) if customer_vendus_id else False,
+        )
+
+    @api.model
+    def _prepare_vendus_update_values(self, vendus_data: Dict[str, str], relations: Dict[str, Dict[int, int]]) -> Dict[str, str]:
+        """
+        Convert Vendus invoice data to the values written on an existing invoice.
+
+        The customer of an existing invoice is left untouched.
 
         Args:
             vendus_data: The data from Vendus.
+            relations: The customers resolved for the page.
 
         Returns:
-            The created or updated invoice, or None if no data was provided.
+            The values of the invoice.
         """
-        # Search for an invoice with the same Vendus ID
-        vendus_invoice = self.search([('vendus_id', '=', vendus_data['id'])])
-
-        if vendus_invoice:
-            # If an invoice with the same Vendus ID already exists, update it
-            vendus_invoice.write({
-                'name': vendus_data['number'],
-                'date': vendus_data['date'],
-                'total_amount': vendus_data['total_amount'],
-                'state': vendus_data['state'],
-            })
-        else:
-            # If no invoice with the same Vendus ID exists, create a new one
-            customer = self.env['vendus.customer'].search([('vendus_id', '=', vendus_data['customer_id'])])
-            vendus_invoice = self.create({
-                'name': vendus_data['number'],
-                'vendus_id': vendus_data['id'],
-                'date': vendus_data['date'],
-                'customer_id': customer.id if customer else False,
-                'total_amount': vendus_data['total_amount'],
-                'state': vendus_data['state'],
-            })
-
-        return vendus_invoice
\ No newline at end of file
+        return {
+            'name': vendus_data['number'],
+            'date': vendus_data['date'],
+            'total_amount': vendus_data['total_amount'],
+            'state': vendus_data['state'],
+        }
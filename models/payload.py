@@ -0,0 +1,325 @@
+import json
+import logging
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from odoo import api, fields, models, tools, _
+from odoo.exceptions import UserError
+
+from ..lib.sync_run import SyncRun
+
+_logger = logging.getLogger(__name__)
+
+# Number of payloads claimed and applied at once by a worker
+DEFAULT_APPLY_BATCH_SIZE = 1000
+
+# Number of batches a worker applies before handing over to the next cron run
+BATCHES_PER_RUN = 50
+
+# Number of times a payload is applied before it is marked failed
+MAX_ATTEMPTS = 5
+
+# Minutes before a payload failing to apply is tried again, per attempt made
+RETRY_DELAY_MINUTES = 5
+
+# The crons draining the queue. Each one can run in its own Odoo worker.
+WORKER_CRONS = ('ir_cron_apply_payloads', 'ir_cron_apply_payloads_2', 'ir_cron_apply_payloads_3')
+
+
+class VendusPayload(models.Model):
+    """
+    A raw Vendus record staged until it is stored in its model.
+
+    Fetching and storing are decoupled through this queue: the syncs and the
+    webhook only insert the raw payloads, in bulk, and the worker crons of
+    `WORKER_CRONS` drain it in large batches with `batch_upsert_from_vendus`.
+    The workers claim their batches with `FOR UPDATE SKIP LOCKED`, so several
+    Odoo workers apply in parallel without waiting for each other.
+
+    When a record was staged several times, only its latest payload is
+    applied, the older ones are superseded, whatever the worker holding them.
+    Payloads failing to apply are kept with their error and tried again later,
+    up to MAX_ATTEMPTS times, after which they are failed until retried by hand.
+    """
+    _name = 'vendus.payload'
+    _description = 'Vendus Payload'
+    _order = 'id'
+    _rec_name = 'vendus_id'
+
+    # Listed after the entities they depend on, which are drained first
+    entity: str = fields.Selection([
+        ('products', 'Products'),
+        ('customers', 'Customers'),
+        ('payment_methods', 'Payment Methods'),
+        ('stores', 'Stores'),
+        ('documents', 'Documents'),
+        ('suppliers', 'Suppliers'),
+        ('rooms', 'Rooms'),
+        ('tables', 'Tables'),
+    ], string='Entity', required=True, readonly=True)
+    vendus_id: int = fields.Integer(string='Vendus ID', readonly=True)
+    payload: str = fields.Text(string='Payload', required=True, readonly=True)
+    source: str = fields.Selection([
+        ('sync', 'Sync'),
+        ('webhook', 'Webhook'),
+    ], string='Source', required=True, readonly=True, default='sync')
+    state: str = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Applied'),
+        ('superseded', 'Superseded'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, readonly=True, index=True)
+    attempts: int = fields.Integer(string='Attempts', readonly=True)
+    date_retry: fields.Datetime = fields.Datetime(string='Retry After', readonly=True)
+    error: str = fields.Text(string='Error', readonly=True)
+    date_done: fields.Datetime = fields.Datetime(string='Applied On', readonly=True)
+
+    def init(self) -> None:
+        # Claiming scans the pending payloads only, and superseding looks up the
+        # payloads of a record
+        tools.create_index(self._cr, 'vendus_payload_pending_idx', self._table, ['id'],
+                           where="state = 'pending'")
+        tools.create_index(self._cr, 'vendus_payload_entity_vendus_id_idx', self._table, ['entity', 'vendus_id'])
+
+    @api.model
+    def _stage(self, entity: str, records: List[Dict[str, Any]], source: str = 'sync') -> int:
+        """Insert raw Vendus records in the queue, with one query.
+
+        Args:
+            entity: The entity of the records, e.g. documents.
+            records: The Vendus records.
+            source: Where the records come from, sync or webhook.
+
+        Returns:
+            The number of staged records.
+        """
+        records = [record for record in records if record]
+        if not records:
+            return 0
+        self.env.cr.execute(f"""
+            INSERT INTO {self._table}
+                (entity, vendus_id, payload, source, state, attempts,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT %s, vendus_id, payload, %s, 'pending', 0,
+                   %s, now() AT TIME ZONE 'UTC', %s, now() AT TIME ZONE 'UTC'
+              FROM unnest(%s::int[], %s::text[]) AS staged(vendus_id, payload)
+        """, [
+            entity, source, self.env.uid, self.env.uid,
+            [int(record['id']) for record in records],
+            [json.dumps(record) for record in records],
+        ])
+        return len(records)
+
+    @api.model
+    def _get_pending_vendus_ids(self, entity: str, vendus_ids: List[int]) -> Set[int]:
+        """Get the Vendus IDs among `vendus_ids` that have a payload waiting to be applied."""
+        if not vendus_ids:
+            return set()
+        self.env.cr.execute(f"""
+            SELECT DISTINCT vendus_id FROM {self._table}
+             WHERE state = 'pending' AND entity = %s AND vendus_id = ANY(%s)
+        """, [entity, [int(vendus_id) for vendus_id in vendus_ids]])
+        return {row[0] for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _trigger_workers(self) -> None:
+        """Wake the worker crons draining the queue, unless they are already due to run."""
+        crons = self.env['ir.cron'].sudo()
+        for xmlid in WORKER_CRONS:
+            crons |= self.env.ref(f'{self._module}.{xmlid}', raise_if_not_found=False) or crons.browse()
+        crons = crons.filtered('active')
+        due = self.env['ir.cron.trigger'].sudo().search([
+            ('cron_id', 'in', crons.ids), ('call_at', '<=', fields.Datetime.now()),
+        ]).cron_id
+        for cron in crons - due:
+            cron._trigger()
+
+    @api.model
+    def _enqueue(self, entity: str, records: List[Dict[str, Any]]) -> int:
+        """Stage the records of a webhook, and wake the workers.
+
+        Returns:
+            The number of staged records.
+        """
+        count = self._stage(entity, records, source='webhook')
+        if count:
+            self._trigger_workers()
+        return count
+
+    @api.model
+    def _get_entity_models(self) -> Dict[str, str]:
+        """Map the staged entities to the models storing them."""
+        steps = self.env['vendus.sync']._get_sync_steps()
+        return {entity: steps[entity]['model'] for entity, _label in self._fields['entity'].selection}
+
+    @api.model
+    def _get_batch_size(self) -> int:
+        return max(1, self.env['vendus.sync']._get_config_number(
+            'vendus_integration.payload_batch_size', DEFAULT_APPLY_BATCH_SIZE))
+
+    @api.model
+    def _new_run(self) -> Optional[SyncRun]:
+        """Start a sync run, so that documents can fetch their missing customers.
+
+        Without API key, the payloads are applied without run.
+        """
+        try:
+            return self.env['vendus.sync']._new_run()
+        except UserError:
+            return None
+
+    @api.model
+    def _claim(self, entity: str, limit: int) -> 'VendusPayload':
+        """Lock a batch of pending payloads of an entity, skipping the ones other workers hold.
+
+        Only the payloads staged before every pending payload of the entities
+        they depend on (see `vendus.sync._get_sync_steps`) are claimed, so that
+        a document is not applied before the customer or product staged with
+        it, even when another worker is still applying them. A dependency
+        waiting for a retry holds back the payloads staged after it until it is
+        applied or failed. The locks are held until the transaction ends.
+        """
+        depends = list(self.env['vendus.sync']._get_sync_steps()[entity].get('depends', ()))
+        self.env.cr.execute(f"""
+            SELECT id FROM {self._table}
+             WHERE state = 'pending' AND entity = %s
+               AND (date_retry IS NULL OR date_retry <= now() AT TIME ZONE 'UTC')
+               AND id < (SELECT coalesce(min(id), 2147483647) FROM {self._table}
+                          WHERE state = 'pending' AND entity = ANY(%s))
+             ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [entity, depends, limit])
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _supersede(self) -> 'VendusPayload':
+        """Mark the payloads with a newer payload of the same record as superseded.
+
+        Returns:
+            The remaining payloads, to be applied.
+        """
+        self.env.cr.execute(f"""
+            SELECT DISTINCT payload.id
+              FROM {self._table} payload
+              JOIN {self._table} newer
+                ON newer.entity = payload.entity AND newer.vendus_id = payload.vendus_id AND newer.id > payload.id
+             WHERE payload.id = ANY(%s)
+        """, [self.ids])
+        superseded = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if superseded:
+            superseded.write({'state': 'superseded', 'error': False, 'date_done': fields.Datetime.now()})
+        return self - superseded
+
+    def _upsert(self, run: Optional[SyncRun] = None) -> None:
+        model_name = self._get_entity_models()[self[:1].entity]
+        self.env[model_name].batch_upsert_from_vendus([json.loads(p.payload) for p in self], run=run)
+
+    def _apply(self, run: Optional[SyncRun] = None) -> int:
+        """Store payloads of one entity with one batch upsert.
+
+        When the batch fails, it is rolled back to a savepoint and its payloads
+        are applied one by one, so that only the faulty ones are kept back.
+
+        Returns:
+            The number of payloads failing to apply.
+        """
+        try:
+            with self.env.cr.savepoint():
+                self._upsert(run)
+        except Exception:
+            if run is not None:
+                # the customers created by the batch were rolled back
+                run.customer_ids.clear()
+            if len(self) == 1:
+                raise
+            failed = 0
+            for payload in self:
+                try:
+                    with self.env.cr.savepoint():
+                        payload._upsert(run)
+                except Exception as e:
+                    payload._mark_failed(e)
+                    failed += 1
+                else:
+                    payload._mark_done()
+            return failed
+        self._mark_done()
+        return 0
+
+    def _mark_done(self) -> None:
+        self.write({'state': 'done', 'error': False, 'date_retry': False, 'date_done': fields.Datetime.now()})
+
+    def _mark_failed(self, error: Exception) -> None:
+        """Keep payloads failing to apply, to be tried again after a delay."""
+        for payload in self:
+            attempts = payload.attempts + 1
+            payload.write({
+                'state': 'failed' if attempts >= MAX_ATTEMPTS else 'pending',
+                'attempts': attempts,
+                'error': str(error),
+                'date_retry': fields.Datetime.now() + timedelta(minutes=RETRY_DELAY_MINUTES * attempts),
+            })
+
+    @api.model
+    def _cron_apply_payloads(self, max_batches: int = BATCHES_PER_RUN) -> None:
+        """Drain the queue, one committed batch at a time.
+
+        The entities are drained after the entities they depend on. When the
+        worker stops with payloads left, the workers are triggered again.
+
+        A worker that applied payloads records its run in `vendus.sync.run`,
+        with the records created, updated or left unchanged per entity, since
+        the staged syncs only count the records they staged.
+        """
+        batch_size = self._get_batch_size()
+        query_count = lambda: self.env.cr.sql_log_count
+        date_start = fields.Datetime.now()
+        entity_models = self._get_entity_models()
+        run = None
+        failures: Dict[str, int] = {}
+        batches = 0
+        for entity, model_name in entity_models.items():
+            while batches < max_batches:
+                payloads = self._claim(entity, batch_size)
+                if not payloads:
+                    break
+                batches += 1
+                payloads = payloads._supersede()
+                if payloads:
+                    run = run or self._new_run()
+                    metrics = None
+                    if run is not None:
+                        metrics = run.entities.get(entity) or run.start_entity(entity, model_name)
+                    with run.measure(metrics, query_count) if metrics else nullcontext():
+                        try:
+                            failed = payloads._apply(run)
+                        except Exception as e:
+                            payloads._mark_failed(e)
+                            failed = len(payloads)
+                    if failed:
+                        _logger.warning("Could not apply %d of %d Vendus %s payloads", failed, len(payloads), entity)
+                        failures[entity] = failures.get(entity, 0) + failed
+                self.env['vendus.sync']._commit_progress()
+        if run is not None and run.entities:
+            for entity, metrics in run.entities.items():
+                metrics.stop()
+                if failures.get(entity):
+                    metrics.error = f"{failures[entity]} payloads could not be applied"
+            self.env['vendus.sync.run']._record(run, date_start, scope='payload worker')
+            self.env['vendus.sync']._commit_progress()
+        if batches >= max_batches:
+            self._trigger_workers()
+
+    def action_retry(self) -> None:
+        """Queue failed payloads again, with their attempts reset."""
+        if self.filtered(lambda p: p.state != 'failed'):
+            raise UserError(_("Only failed payloads can be retried."))
+        self.write({'state': 'pending', 'attempts': 0, 'date_retry': False})
+        self._trigger_workers()
+
+    @api.autovacuum
+    def _gc_applied_payloads(self) -> None:
+        """Delete the payloads applied or superseded more than a week ago."""
+        limit = fields.Datetime.subtract(fields.Datetime.now(), days=7)
+        self.search([('state', 'in', ('done', 'superseded')), ('date_done', '<', limit)]).unlink()
@@ -1,4 +1,4 @@
-from typing import Optional, Dict
+from typing import Dict
 from odoo import api, fields, models
 
 
@@ -15,6 +15,7 @@ class VendusPaymentMethod(models.Model):
         order (int): The display order of the payment method.
     """
     _name = 'vendus.payment.method'
+    _inherit = ['vendus.upsert.mixin']
     _description = 'Vendus Payment Method'
 
     vendus_id: int = fields.Integer(
@@ -39,22 +40,23 @@ class VendusPaymentMethod(models.Model):
         string='Display Order',
         help='The display order of the payment method.')
 
+    _sql_constraints = [
+        ('vendus_id_uniq', 'unique(vendus_id)', 'Vendus ID must be unique!')
+    ]
+
     @api.model
-    def create_or_update_from_vendus(self, vendus_data: Dict[str, str]) -> Optional['VendusPaymentMethod']:
+    def _prepare_vendus_values(self, vendus_data: Dict[str, str], relations: Dict[str, Dict[int, int]]) -> Dict[str, str]:
         """
-        Creates or updates a payment method from the given Vendus data.
+        Converts Vendus payment method data to record values.
 
         Args:
             vendus_data (Dict[str, str]): The data from Vendus.
+            relations (Dict[str, Dict[int, int]]): Unused, payment methods have no related records.
 
         Returns:
-            Optional[VendusPaymentMethod]: The created or updated payment method, or None if no data was provided.
+            Dict[str, str]: The values of the payment method.
         """
-        # Find the payment method in the database based on the ID from Vendus
-        payment_method = self.search([('vendus_id', '=', vendus_data['id'])])
-
-        # Create the values to write to the database
-        vals = {
+        return {
             'vendus_id': vendus_data['id'],  # The ID of the payment method in Vendus
             'name': vendus_data['title'],  # The name of the payment method
             'change': vendus_data['change'] == '1',  # Whether the payment method allows change
@@ -62,13 +64,3 @@ class VendusPaymentMethod(models.Model):
             'status': vendus_data['status'],  # The status of the payment method
             'order': vendus_data['order'],  # The display order of the payment method
         }
-
-        # If the payment method already exists, update it
-        if payment_method:
-            payment_method.write(vals)
-        # If not, create it
-        else:
-            payment_method = self.create(vals)
-
-        # Return the created or updated payment method
-        return payment_method
@@ -0,0 +1,414 @@
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Context of the move creation: no chatter message or tracking per move
+POSTING_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_create_nosubscribe': True,
+    'mail_notrack': True,
+}
+
+# Vendus document types posted as credit notes, the other ones are posted as invoices
+REFUND_TYPES = ('NC',)
+
+
+class VendusPostingJob(models.Model):
+    """
+    Posts the final Vendus documents as customer invoices, in the background.
+
+    A job takes the final documents of its period that have no Odoo move yet,
+    by increasing ID, in batches of `batch_size`. For each batch, the lines,
+    partners, products and taxes are read at once, the partners of the
+    customers not linked yet are created in one go, and the moves are created
+    with one multi-record `create` and posted together. The documents are then
+    linked to their move in a single UPDATE.
+
+    Each batch is committed together with a checkpoint, the ID of the last
+    document handled, so that a job interrupted by a crash resumes from it.
+    When a batch fails, its documents are posted one at a time. The ones still
+    failing are kept in `failed_document_ids` with their error, and are posted
+    again by `action_retry_failed`.
+
+    The unit prices of Vendus include VAT: the taxes of the products must be
+    included in the price. The items of the documents whose lines are missing
+    or incomplete, e.g. the documents of the initial load, are fetched from
+    Vendus before their batch is posted. Documents still without lines, or with
+    a line whose product has no such tax, are not posted, since their VAT is
+    unknown.
+    """
+    _name = 'vendus.posting.job'
+    _description = 'Vendus Invoice Posting Job'
+    _order = 'id desc'
+
+    name: str = fields.Char(string='Name', required=True, default=lambda self: _('Vendus Posting'))
+    company_id: models.Many2one = fields.Many2one(
+        'res.company', string='Company', required=True, default=lambda self: self.env.company)
+    journal_id: models.Many2one = fields.Many2one(
+        'account.journal', string='Journal', required=True,
+        domain="[('type', '=', 'sale'), ('company_id', '=', company_id)]")
+    partner_id: models.Many2one = fields.Many2one(
+        'res.partner', string='Default Customer', required=True,
+        help='The customer of the documents without customer, e.g. the final consumer.')
+    date_from: fields.Date = fields.Date(string='From')
+    date_to: fields.Date = fields.Date(string='To')
+    batch_size: int = fields.Integer(string='Batch Size', default=1000, required=True,
+                                     help='Number of documents posted and committed at once.')
+    state: str = fields.Selection([
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='draft', required=True, index=True)
+    total_documents: int = fields.Integer(string='Documents', readonly=True)
+    documents_done: int = fields.Integer(string='Documents Processed', readonly=True)
+    documents_failed: int = fields.Integer(string='Documents Failed', readonly=True)
+    moves_created: int = fields.Integer(string='Moves Posted', readonly=True)
+    last_document_id: int = fields.Integer(string='Checkpoint', readonly=True,
+                                           help='ID of the last document committed.')
+    failed_document_ids: fields.Many2many = fields.Many2many(
+        'vendus.document', 'vendus_posting_job_failed_document_rel', 'job_id', 'document_id',
+        string='Failed Documents', readonly=True,
+        help='The documents that could not be posted, see the errors.')
+    elapsed_seconds: float = fields.Float(string='Processing Time (s)', readonly=True)
+    progress: float = fields.Float(string='Progress', compute='_compute_progress')
+    throughput: float = fields.Float(string='Documents/s', compute='_compute_progress')
+    date_start: fields.Datetime = fields.Datetime(string='Started', readonly=True)
+    date_end: fields.Datetime = fields.Datetime(string='Finished', readonly=True)
+    error: str = fields.Text(string='Error', readonly=True)
+
+    @api.depends('total_documents', 'documents_done', 'elapsed_seconds')
+    def _compute_progress(self) -> None:
+        for job in self:
+            job.progress = 100.0 * job.documents_done / job.total_documents if job.total_documents else 0.0
+            job.throughput = job.documents_done / job.elapsed_seconds if job.elapsed_seconds else 0.0
+
+    def _commit(self) -> None:
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
+    def _get_document_domain(self) -> List[Any]:
+        """Get the domain of the documents left to post, past the checkpoint."""
+        domain = [('state', '=', 'final'), ('odoo_invoice_id', '=', False), ('id', '>', self.last_document_id)]
+        if self.date_from:
+            domain.append(('date', '>=', self.date_from))
+        if self.date_to:
+            domain.append(('date', '<=', self.date_to))
+        return domain
+
+    @api.model
+    def _link_records(self, model_name: str, field_name: str, values: Dict[int, int]) -> None:
+        """Set a many2one field to a different value on each record, in a single UPDATE.
+
+        Args:
+            model_name: The model of the records.
+            field_name: The many2one field to set.
+            values: The value of each record, by record ID.
+        """
+        if not values:
+            return
+        Model = self.env[model_name]
+        self.env.cr.execute(
+            f'''UPDATE "{Model._table}" AS t SET "{field_name}" = data.value
+                  FROM unnest(%s::int[], %s::int[]) AS data(id, value)
+                 WHERE t.id = data.id''',
+            (list(values), list(values.values())),
+        )
+        Model.invalidate_model([field_name])
+
+    def _get_partners(self, documents: 'VendusDocument') -> Dict[int, int]:
+        """Get the partner of each customer of the documents, by customer ID.
+
+        The customers without partner get one, created in one go.
+        """
+        customers = documents.customer_id
+        missing = customers.filtered(lambda customer: not customer.odoo_partner_id)
+        if missing:
+            partners = self.env['res.partner'].with_context(**POSTING_CONTEXT).create([{
+                'name': customer.name,
+                'email': customer.email,
+                'phone': customer.phone,
+                'vat': customer.vat,
+                'street': customer.address,
+                'city': customer.city,
+                'zip': customer.postal_code,
+                'country_id': customer.country_id.id,
+                'customer_rank': 1,
+            } for customer in missing])
+            self._link_records('vendus.customer', 'odoo_partner_id', dict(zip(missing.ids, partners.ids)))
+        return {customer.id: customer.odoo_partner_id.id for customer in customers}
+
+    def _get_line_taxes(self, lines: 'VendusDocumentLine') -> Dict[int, 'AccountTax']:
+        """Get the taxes of the products of the lines, by `vendus.product` ID."""
+        taxes = {}
+        for product in lines.product_id:
+            if product.tax_id:
+                product_taxes = product.tax_id
+            else:
+                product_taxes = product.odoo_product_id.taxes_id.filtered(
+                    lambda tax: tax.company_id == self.company_id)
+            taxes[product.id] = product_taxes
+        return taxes
+
+    def _get_posting_error(
+        self,
+        document: 'VendusDocument',
+        lines: List['VendusDocumentLine'],
+        taxes: Dict[int, 'AccountTax'],
+    ) -> Optional[str]:
+        """Check that the VAT of a document is known, i.e. each of its lines has a price-included tax.
+
+        Returns:
+            The reason the document cannot be posted, if any.
+        """
+        if not lines:
+            return _("%(document)s has no lines, its VAT is unknown.", document=document.name)
+        for line in lines:
+            if not line.product_id:
+                return _("%(document)s: the line %(line)s has no product, its VAT is unknown.",
+                         document=document.name, line=line.name or line.sequence)
+            line_taxes = taxes.get(line.product_id.id)
+            if not line_taxes:
+                return _("%(document)s: the product %(product)s has no tax.",
+                         document=document.name, product=line.product_id.name)
+            if not all(line_taxes.mapped('price_include')):
+                return _("%(document)s: the tax of the product %(product)s is not included in the price.",
+                         document=document.name, product=line.product_id.name)
+        return None
+
+    def _prepare_move_values(
+        self,
+        document: 'VendusDocument',
+        lines: List['VendusDocumentLine'],
+        partners: Dict[int, int],
+        taxes: Dict[int, 'AccountTax'],
+    ) -> Dict[str, Any]:
+        """Convert a document to the values of its move, see `_get_posting_error` for its requirements."""
+        invoice_lines = [{
+            'name': line.name or line.product_id.name or document.name,
+            'product_id': line.product_id.odoo_product_id.id or False,
+            'quantity': line.quantity,
+            'price_unit': line.price_unit,
+            'discount': line.discount,
+            'tax_ids': [(6, 0, taxes[line.product_id.id].ids)],
+        } for line in lines]
+        return {
+            'move_type': 'out_refund' if document.type in REFUND_TYPES else 'out_invoice',
+            'company_id': self.company_id.id,
+            'journal_id': self.journal_id.id,
+            'partner_id': partners.get(document.customer_id.id) or self.partner_id.id,
+            'invoice_date': document.date,
+            'date': document.date,
+            'ref': document.name,
+            'invoice_line_ids': [(0, 0, vals) for vals in invoice_lines],
+        }
+
+    def _fetch_missing_lines(self, documents: 'VendusDocument') -> None:
+        """Fetch from Vendus the documents whose lines are missing or lack a product, and store their lines.
+
+        Without API key, nothing is fetched and the documents fail with their error.
+        """
+        Document = self.env['vendus.document']
+        complete = Document._with_complete_lines(documents.mapped('vendus_id'))
+        missing = documents.filtered(lambda document: document.vendus_id not in complete)
+        if not missing:
+            return
+        try:
+            run = self.env['vendus.sync']._new_run()
+        except UserError:
+            return
+        details = run.client.get_many(f'documents/{document.vendus_id}' for document in missing)
+        Document.batch_upsert_from_vendus([detail for detail in details if detail], run=run)
+
+    def _post_documents(self, documents: 'VendusDocument') -> Tuple[int, Dict[int, str]]:
+        """Create and post the moves of documents, and link them to the documents.
+
+        The moves are also linked to the `vendus.invoice` of the same Vendus ID,
+        if any.
+
+        Returns:
+            The number of moves posted, and the error of each document that
+            cannot be posted, by document ID.
+        """
+        if not documents:
+            return 0, {}
+        documents.fetch(['name', 'date', 'type', 'customer_id', 'total_amount', 'vendus_id'])
+        lines_by_document = defaultdict(list)
+        lines = self.env['vendus.document.line'].search_fetch(
+            [('document_id', 'in', documents.ids)],
+            ['document_id', 'sequence', 'product_id', 'name', 'quantity', 'price_unit', 'discount'])
+        for line in lines:
+            lines_by_document[line.document_id.id].append(line)
+        taxes = self._get_line_taxes(lines)
+        failed = {}
+        for document in documents:
+            error = self._get_posting_error(document, lines_by_document[document.id], taxes)
+            if error:
+                failed[document.id] = error
+        documents = documents.filtered(lambda document: document.id not in failed)
+        if not documents:
+            return 0, failed
+        partners = self._get_partners(documents)
+
+        moves = self.env['account.move'].with_company(self.company_id).with_context(**POSTING_CONTEXT).create([
+            self._prepare_move_values(document, lines_by_document[document.id], partners, taxes)
+            for document in documents
+        ])
+        moves.action_post()
+        self._link_records('vendus.document', 'odoo_invoice_id', dict(zip(documents.ids, moves.ids)))
+        self._link_invoices({document.vendus_id: move.id for document, move in zip(documents, moves)})
+        return len(moves), failed
+
+    @api.model
+    def _link_invoices(self, moves: Dict[int, int]) -> None:
+        """Link the `vendus.invoice` records to the moves of their documents, in a single UPDATE.
+
+        Args:
+            moves: The move of each document, by Vendus ID.
+        """
+        if not moves:
+            return
+        Invoice = self.env['vendus.invoice']
+        Invoice.flush_model(['vendus_id'])
+        self.env.cr.execute(
+            f'''UPDATE "{Invoice._table}" AS t SET odoo_invoice_id = data.move_id
+                  FROM unnest(%s::varchar[], %s::int[]) AS data(vendus_id, move_id)
+                 WHERE t.vendus_id = data.vendus_id''',
+            ([str(vendus_id) for vendus_id in moves], list(moves.values())),
+        )
+        Invoice.invalidate_model(['odoo_invoice_id'])
+
+    def _post_batch(self, documents: 'VendusDocument') -> Tuple[int, Dict[int, str]]:
+        """Post a batch of documents, falling back to one document at a time when the batch fails.
+
+        Returns:
+            The number of moves posted, and the error of each document that failed, by document ID.
+        """
+        try:
+            with self.env.cr.savepoint():
+                return self._post_documents(documents)
+        except Exception as e:
+            _logger.info("Posting a batch of %d Vendus documents failed (%s), posting them one by one",
+                         len(documents), e)
+            self.env.invalidate_all()
+        posted = 0
+        failed = {}
+        for document in documents:
+            try:
+                with self.env.cr.savepoint():
+                    document_posted, document_failed = self._post_documents(document)
+            except Exception as e:
+                self.env.invalidate_all()
+                failed[document.id] = f"{document.name}: {e}"
+            else:
+                posted += document_posted
+                failed.update(document_failed)
+        return posted, failed
+
+    def _checkpoint(self, last_document_id: int, documents_done: int, moves_created: int,
+                    failed: Dict[int, str], seconds: float) -> None:
+        """
+        Record the progress of a batch and commit it along with its moves.
+
+        Args:
+            last_document_id: The ID of the last document of the batch.
+            documents_done: The number of documents of the batch.
+            moves_created: The number of moves posted by the batch.
+            failed: The error of each document that could not be posted, by document ID.
+            seconds: The time spent on the batch.
+        """
+        vals = {
+            'last_document_id': last_document_id,
+            'documents_done': self.documents_done + documents_done,
+            'documents_failed': self.documents_failed + len(failed),
+            'moves_created': self.moves_created + moves_created,
+            'elapsed_seconds': self.elapsed_seconds + seconds,
+        }
+        if failed:
+            vals['failed_document_ids'] = [(4, document_id) for document_id in failed]
+            vals['error'] = '\n'.join(filter(None, [self.error] + list(failed.values())))
+        self.write(vals)
+        self._commit()
+
+    def _process(self) -> None:
+        """
+        Post the documents of the job, from its checkpoint.
+        """
+        self.ensure_one()
+        Document = self.env['vendus.document']
+        self.write({
+            'state': 'running',
+            'date_start': self.date_start or fields.Datetime.now(),
+            'total_documents': self.documents_done + Document.search_count(self._get_document_domain()),
+        })
+        self._commit()
+        try:
+            while True:
+                documents = Document.search(self._get_document_domain(), order='id', limit=self.batch_size)
+                if not documents:
+                    break
+                start = time.monotonic()
+                self._fetch_missing_lines(documents)
+                posted, failed = self._post_batch(documents)
+                self._checkpoint(documents[-1].id, len(documents), posted, failed, time.monotonic() - start)
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.exception("Vendus posting job %s failed", self.id)
+            self.write({'state': 'failed', 'error': str(e)})
+        else:
+            self.write({'state': 'done', 'date_end': fields.Datetime.now()})
+            _logger.info("Vendus posting job %s done: %d moves posted, %d documents failed, in %.1fs",
+                         self.id, self.moves_created, self.documents_failed, self.elapsed_seconds)
+        self._commit()
+
+    @api.model
+    def _cron_process_jobs(self) -> None:
+        """
+        Process the queued jobs. A job still 'running' when the cron starts was
+        interrupted, and is resumed from its checkpoint.
+        """
+        for job in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            job._process()
+
+    def action_queue(self) -> None:
+        """
+        Queue draft or failed jobs, they start or resume from their checkpoint.
+        """
+        if self.filtered(lambda job: job.state not in ('draft', 'failed')):
+            raise UserError(_("Only draft or failed posting jobs can be queued."))
+        self.write({'state': 'queued'})
+        self.env.ref(f'{self._module}.ir_cron_post_documents')._trigger()
+
+    def action_retry_failed(self) -> None:
+        """
+        Queue the failed documents of finished jobs again, e.g. once their taxes are set.
+
+        The checkpoint is reset: the documents of the period posted since have
+        a move, so only the documents left without one are handled again. The
+        items of the ones whose lines are still missing or incomplete are
+        fetched again, see `_fetch_missing_lines`.
+        """
+        if self.filtered(lambda job: job.state not in ('done', 'failed')):
+            raise UserError(_("Only the failed documents of finished posting jobs can be retried."))
+        for job in self:
+            job.write({
+                'state': 'queued',
+                'last_document_id': 0,
+                'documents_done': job.documents_done - job.documents_failed,
+                'documents_failed': 0,
+                'failed_document_ids': [(5, 0, 0)],
+                'error': False,
+                'date_end': False,
+            })
+        self.env.ref(f'{self._module}.ir_cron_post_documents')._trigger()
+
+    def action_refresh(self) -> Dict[str, str]:
+        return {'type': 'ir.actions.client', 'tag': 'soft_reload'}
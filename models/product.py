@@ -1,8 +1,13 @@
+from typing import Dict, Iterable, Optional
+
 from odoo import api, fields, models
 from odoo.addons.l10n_pt import models as l10n_pt_models
 
+from ..lib.sync_run import SyncRun
+
 class VendusProduct(models.Model):
     _name = 'vendus.product'
+    _inherit = ['vendus.upsert.mixin']
     _description = 'Vendus Product'
 
     name = fields.Char(string='Name', required=True)
@@ -27,9 +32,30 @@ class VendusProduct(models.Model):
     ]
 
     @api.model
-    def create_or_update_from_vendus(self, vendus_data):
-        vendus_product = self.search([('vendus_id', '=', vendus_data['id'])])
-        vals = {
+    def _resolve_vendus_products(self, vendus_ids: Iterable[int], run: Optional[SyncRun] = None) -> Dict[int, int]:
+        """Map Vendus product IDs to product IDs, for a whole page of documents.
+
+        The IDs are looked up in one query. During a sync run, the products
+        still missing, e.g. created in Vendus since the last products sync, are
+        fetched concurrently and created in one batch, as the customers of
+        `vendus.customer._resolve_vendus_customers`.
+
+        Returns:
+            The product IDs by Vendus ID. Unknown products are left out.
+        """
+        vendus_ids = list(set(vendus_ids))
+        result = self._get_vendus_records(vendus_ids)
+        unknown = [vendus_id for vendus_id in vendus_ids if vendus_id not in result]
+        if unknown and run:
+            run.count_detail_calls(self._name, len(unknown))
+            payloads = run.client.get_many(f'products/{vendus_id}' for vendus_id in unknown)
+            created = self.batch_upsert_from_vendus([payload for payload in payloads if payload], run=run)
+            result.update({product.vendus_id: product.id for product in created})
+        return result
+
+    @api.model
+    def _prepare_vendus_values(self, vendus_data, relations):
+        return {
             'name': vendus_data['title'],
             'vendus_id': vendus_data['id'],
             'price': vendus_data['price'],
@@ -37,10 +63,3 @@ class VendusProduct(models.Model):
             'type': 'product' if vendus_data['type'] == 'P' else 'service',
             'unit': vendus_data['unit'],
         }
-        
-        if vendus_product:
-            vendus_product.write(vals)
-        else:
-            vendus_product = self.create(vals)
-        
-        return vendus_product
\ No newline at end of file
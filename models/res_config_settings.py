@@ -101,3 +101,138 @@ class ResConfigSettings(models.TransientModel):
         compute='_get_api_url',
         inverse='_set_api_url',
     )
+    vendus_prefetch_pages: int = fields.Integer(
+        string="Vendus Prefetch Pages",
+        config_parameter='vendus_integration.prefetch_pages',
+        default=4,
+        help="Number of result pages downloaded ahead while a page is being stored.",
+    )
+    vendus_pool_size: int = fields.Integer(
+        string="Vendus Connection Pool Size",
+        config_parameter='vendus_integration.pool_size',
+        default=10,
+        help="Maximum number of keep-alive connections to the Vendus API per worker.",
+    )
+    vendus_connect_timeout: float = fields.Float(
+        string="Vendus Connect Timeout (s)",
+        config_parameter='vendus_integration.connect_timeout',
+        default=5.0,
+    )
+    vendus_read_timeout: float = fields.Float(
+        string="Vendus Read Timeout (s)",
+        config_parameter='vendus_integration.read_timeout',
+        default=60.0,
+    )
+    vendus_rate_limit: float = fields.Float(
+        string="Vendus Rate Limit (requests/s)",
+        config_parameter='vendus_integration.rate_limit',
+        default=10.0,
+        help="Maximum sustained request rate to the Vendus API for the whole database. Set it just below the "
+             "account quota. It is split evenly between the processes calling the API, see below.",
+    )
+    vendus_rate_limit_processes: int = fields.Integer(
+        string="Vendus Rate Limit Processes",
+        config_parameter='vendus_integration.rate_limit_processes',
+        default=0,
+        help="Number of Odoo processes calling the Vendus API at once, each limited to its share of the rate "
+             "limit. 0 uses the number of cron workers, or 1 when the server runs without workers.",
+    )
+    vendus_max_retries: int = fields.Integer(
+        string="Vendus Max Retries",
+        config_parameter='vendus_integration.max_retries',
+        default=5,
+        help="Number of times a rate-limited or failed read request is retried.",
+    )
+    vendus_sync_workers: int = fields.Integer(
+        string="Vendus Concurrent Entity Syncs",
+        config_parameter='vendus_integration.sync_workers',
+        default=0,
+        help="Number of entities fetched at once by a full sync. 0 fetches every entity at once.",
+    )
+    vendus_sync_buffer_pages: int = fields.Integer(
+        string="Vendus Sync Buffer Pages",
+        config_parameter='vendus_integration.sync_buffer_pages',
+        default=20,
+        help="Number of pages an entity may fetch ahead of the pages stored, e.g. while documents wait for customers.",
+    )
+    vendus_documents_sync_interval: int = fields.Integer(
+        string="Vendus Documents Sync Interval (min)",
+        config_parameter='vendus_integration.documents_sync_interval',
+        default=5,
+        help="Minutes between two syncs of the sales documents. 0 disables the scheduled sync.",
+    )
+    vendus_customers_sync_interval: int = fields.Integer(
+        string="Vendus Customers Sync Interval (min)",
+        config_parameter='vendus_integration.customers_sync_interval',
+        default=15,
+        help="Minutes between two syncs of the customers. 0 disables the scheduled sync.",
+    )
+    vendus_products_sync_interval: int = fields.Integer(
+        string="Vendus Products Sync Interval (min)",
+        config_parameter='vendus_integration.products_sync_interval',
+        default=15,
+        help="Minutes between two syncs of the products. 0 disables the scheduled sync.",
+    )
+    vendus_reference_sync_interval: int = fields.Integer(
+        string="Vendus Reference Data Sync Interval (min)",
+        config_parameter='vendus_integration.reference_sync_interval',
+        default=1440,
+        help="Minutes between two syncs of the payment methods, document types, stores, suppliers, rooms "
+             "and tables. 0 disables the scheduled sync.",
+    )
+    vendus_reconcile_interval: int = fields.Integer(
+        string="Vendus Reconciliation Interval (min)",
+        config_parameter='vendus_integration.reconcile_interval',
+        default=1440,
+        help="Minutes between two reconciliations, which read every product and customer, and the recent "
+             "documents, again to pick up the records edited in Vendus. 0 disables the scheduled reconciliation.",
+    )
+    vendus_reconcile_days: int = fields.Integer(
+        string="Vendus Reconciliation Window (days)",
+        config_parameter='vendus_integration.reconcile_days',
+        default=31,
+        help="Days of documents read again by the reconciliation. Changes to older documents are not picked up.",
+    )
+    vendus_reference_cache_ttl: float = fields.Float(
+        string="Vendus Reference Data Cache TTL (h)",
+        config_parameter='vendus_integration.reference_cache_ttl',
+        default=168.0,
+        help="Hours during which unchanged reference data is not stored again. After it, the next sync stores "
+             "every record once more. 0 stores them on every sync.",
+    )
+    vendus_sync_apply_mode: str = fields.Selection([
+        ('staged', 'Staged, applied by the payload workers'),
+        ('direct', 'Directly by the sync'),
+    ], string="Vendus Sync Apply Mode",
+        config_parameter='vendus_integration.sync_apply_mode',
+        default='staged',
+        help="Staged syncs only insert the fetched records in the payload queue, which the payload worker crons "
+             "apply in parallel, so that fetching does not wait for the database.",
+    )
+    vendus_payload_batch_size: int = fields.Integer(
+        string="Vendus Payload Batch Size",
+        config_parameter='vendus_integration.payload_batch_size',
+        default=1000,
+        help="Number of staged payloads a payload worker applies at once.",
+    )
+    vendus_webhook_secret: Optional[str] = fields.Char(
+        string="Vendus Webhook Secret",
+        config_parameter='vendus_integration.webhook_secret',
+        help="Shared secret of the Vendus webhooks, sent in the X-Vendus-Webhook-Secret header of the calls to "
+             "/vendus/webhook/documents and /vendus/webhook/customers. The webhooks are refused while it is empty.",
+    )
+    vendus_load_chunk_size: int = fields.Integer(
+        string="Vendus Initial Load Chunk Size",
+        config_parameter='vendus_integration.load_chunk_size',
+        default=10000,
+        help="Number of records the initial load of the history merges and commits at once.",
+    )
+
+    def set_values(self) -> None:
+        """Save the settings, and reschedule the Vendus sync crons on their new intervals."""
+        super().set_values()
+        self.env['vendus.sync']._update_sync_crons()
+
+    def action_vendus_load_history(self) -> None:
+        """Start the initial load of the Vendus history in the background, see `vendus.bulk.load`."""
+        self.env['vendus.bulk.load'].action_start()
@@ -0,0 +1,101 @@
+import json
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from odoo import api, fields, models
+
+from ..lib.vendus_client import ConditionalResponse
+
+# Hours an unchanged response is trusted, before its records are stored again
+DEFAULT_CACHE_TTL_HOURS = 168
+
+
+class VendusResponseCache(models.Model):
+    """
+    The last response of a Vendus endpoint returning reference data, e.g. stores.
+
+    The syncs of reference data send the ETag and Last-Modified of the cached
+    response with their request, and store nothing when Vendus answers 304 Not
+    Modified. Vendus endpoints that ignore these headers return the full list.
+    If its content hash matches the cached one, the records are not stored
+    again either, unless the cache entry is older than the TTL. The TTL comes
+    from `vendus_integration.reference_cache_ttl`, in hours.
+    """
+    _name = 'vendus.response.cache'
+    _description = 'Vendus Response Cache'
+    _order = 'endpoint, params_key'
+    _rec_name = 'endpoint'
+
+    endpoint: str = fields.Char(string='Endpoint', required=True, readonly=True)
+    params_key: str = fields.Char(string='Parameters', required=True, readonly=True, default='{}',
+                                  help='The URL parameters of the request, as canonical JSON.')
+    body: str = fields.Text(string='Body', readonly=True)
+    etag: str = fields.Char(string='ETag', readonly=True)
+    last_modified: str = fields.Char(string='Last-Modified', readonly=True)
+    content_hash: str = fields.Char(string='Content Hash', readonly=True)
+    date_fetched: fields.Datetime = fields.Datetime(string='Fetched On', readonly=True,
+                                                    help='When the body was last downloaded and stored.')
+
+    _sql_constraints = [
+        ('endpoint_params_uniq', 'unique(endpoint, params_key)', 'There can only be one cached response per request!')
+    ]
+
+    @api.model
+    def _params_key(self, params: Optional[Dict[str, Any]] = None) -> str:
+        return json.dumps(params or {}, sort_keys=True, default=str)
+
+    @api.model
+    def _get_entry(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> 'VendusResponseCache':
+        return self.sudo().search([('endpoint', '=', endpoint), ('params_key', '=', self._params_key(params))], limit=1)
+
+    @api.model
+    def _get_ttl(self) -> timedelta:
+        hours = self.env['vendus.sync']._get_config_number(
+            'vendus_integration.reference_cache_ttl', DEFAULT_CACHE_TTL_HOURS, float)
+        return timedelta(hours=max(0.0, hours))
+
+    @api.model
+    def _get_validators(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Get what a conditional request needs to know of the cached response.
+
+        The entries older than the TTL are ignored, so that their records are
+        stored again.
+
+        Returns:
+            The `etag`, `last_modified` and `content_hash` of the cached
+            response, empty when there is no fresh entry.
+        """
+        entry = self._get_entry(endpoint, params)
+        if not entry or not entry.date_fetched or entry.date_fetched + self._get_ttl() < fields.Datetime.now():
+            return {}
+        return {'etag': entry.etag, 'last_modified': entry.last_modified, 'content_hash': entry.content_hash}
+
+    @api.model
+    def _store(self, endpoint: str, params: Optional[Dict[str, Any]], response: ConditionalResponse) -> None:
+        """Cache a response whose records were stored."""
+        vals = {
+            'body': response.body,
+            'etag': response.etag,
+            'last_modified': response.last_modified,
+            'content_hash': response.content_hash,
+            'date_fetched': fields.Datetime.now(),
+        }
+        entry = self._get_entry(endpoint, params)
+        if entry:
+            entry.write(vals)
+        else:
+            self.sudo().create(dict(vals, endpoint=endpoint, params_key=self._params_key(params)))
+
+    @api.model
+    def _get_cached_data(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Get the JSON of the cached response of an endpoint, e.g. the document types.
+
+        Returns:
+            The data, or None when the endpoint was not cached.
+        """
+        entry = self._get_entry(endpoint, params)
+        return json.loads(entry.body) if entry.body else None
+
+    def action_invalidate(self) -> None:
+        """Forget the cached responses, so that the next syncs store their records again."""
+        self.sudo().unlink()
@@ -2,6 +2,7 @@ from odoo import api, fields, models
 
 class VendusRoom(models.Model):
     _name = 'vendus.room'
+    _inherit = ['vendus.upsert.mixin']
     _description = 'Vendus Room'
 
     vendus_id = fields.Integer(string='Vendus ID', required=True)
@@ -9,17 +10,15 @@ class VendusRoom(models.Model):
     capacity = fields.Integer(string='Capacity')
     status = fields.Selection([('on', 'Active'), ('off', 'Inactive')], string='Status')
 
+    _sql_constraints = [
+        ('vendus_id_uniq', 'unique(vendus_id)', 'Vendus ID must be unique!')
+    ]
+
     @api.model
-    def create_or_update_from_vendus(self, vendus_data):
-        room = self.search([('vendus_id', '=', vendus_data['id'])])
-        vals = {
+    def _prepare_vendus_values(self, vendus_data, relations):
+        return {
             'vendus_id': vendus_data['id'],
             'name': vendus_data['title'],
             'capacity': vendus_data.get('capacity'),
             'status': vendus_data['status'],
         }
-        if room:
-            room.write(vals)
-        else:
-            room = self.create(vals)
-        return room
\ No newline at end of file
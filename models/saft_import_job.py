@@ -0,0 +1,121 @@
+import logging
+from typing import Dict, Optional
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class SaftImportJob(models.Model):
+    """
+    A SAF-T import running in the background.
+
+    The import wizard hands its file over to a job, which is processed by the
+    `ir_cron_saft_import` cron in chunks of `chunk_size` journal entries. Each
+    chunk is committed together with a checkpoint: the number of entries read
+    and the TransactionID of the last one. A job interrupted by a crash or a
+    failure resumes from its checkpoint, skipping the entries already imported.
+    """
+    _name = 'account.saft.import.job'
+    _description = 'SAF-T Import Job'
+    _order = 'id desc'
+
+    name: str = fields.Char(string='File Name', required=True)
+    company_id: models.Many2one = fields.Many2one('res.company', string='Company', required=True)
+    attachment_id: models.Many2one = fields.Many2one('ir.attachment', string='SAF-T File', required=True, ondelete='restrict')
+    state: str = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='queued', required=True, index=True)
+    chunk_size: int = fields.Integer(string='Chunk Size', default=1000, required=True,
+                                     help='Number of journal entries imported and committed at once.')
+    workers: int = fields.Integer(string='Worker Processes', default=0,
+                                  help='Number of processes converting journal entries to moves. 0 converts them in the cron process.')
+    total_entries: int = fields.Integer(string='Journal Entries', readonly=True)
+    entries_done: int = fields.Integer(string='Entries Processed', readonly=True)
+    moves_created: int = fields.Integer(string='Moves Created', readonly=True)
+    last_transaction_id: str = fields.Char(string='Checkpoint', readonly=True,
+                                           help='TransactionID of the last entry committed.')
+    elapsed_seconds: float = fields.Float(string='Processing Time (s)', readonly=True)
+    progress: float = fields.Float(string='Progress', compute='_compute_progress')
+    throughput: float = fields.Float(string='Entries/s', compute='_compute_progress')
+    date_start: fields.Datetime = fields.Datetime(string='Started', readonly=True)
+    date_end: fields.Datetime = fields.Datetime(string='Finished', readonly=True)
+    error: str = fields.Text(string='Error', readonly=True)
+
+    @api.depends('total_entries', 'entries_done', 'elapsed_seconds')
+    def _compute_progress(self) -> None:
+        for job in self:
+            job.progress = 100.0 * job.entries_done / job.total_entries if job.total_entries else 0.0
+            job.throughput = job.entries_done / job.elapsed_seconds if job.elapsed_seconds else 0.0
+
+    def _commit(self) -> None:
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
+    def _set_total_entries(self, total_entries: int) -> None:
+        if total_entries != self.total_entries:
+            self.write({'total_entries': total_entries})
+            self._commit()
+
+    def _checkpoint(self, entries_done: int, last_transaction_id: Optional[str], moves_created: int, seconds: float) -> None:
+        """
+        Record the progress of a chunk and commit it along with its moves.
+
+        Args:
+            entries_done: The number of journal entries read so far.
+            last_transaction_id: The TransactionID of the last entry read.
+            moves_created: The number of moves created by the chunk.
+            seconds: The time spent on the chunk.
+        """
+        self.write({
+            'entries_done': entries_done,
+            'last_transaction_id': last_transaction_id,
+            'moves_created': self.moves_created + moves_created,
+            'elapsed_seconds': self.elapsed_seconds + seconds,
+        })
+        self._commit()
+
+    def _process(self) -> None:
+        """
+        Run the import of the job, from its checkpoint.
+        """
+        self.ensure_one()
+        self.write({'state': 'running', 'error': False, 'date_start': self.date_start or fields.Datetime.now()})
+        self._commit()
+        wizard = self.env['account.saft.import.wizard'].new({'company_id': self.company_id.id})
+        try:
+            with wizard._open_attachment_stream(self.attachment_id) as stream:
+                index = wizard._import_stream(stream, job=self)
+        except Exception as e:
+            self.env.cr.rollback()
+            _logger.exception("SAF-T import job %s failed", self.id)
+            self.write({'state': 'failed', 'error': str(e)})
+        else:
+            self.write({'state': 'done', 'date_end': fields.Datetime.now()})
+            _logger.info("SAF-T import job %s done: %s", self.id,
+                         ', '.join(f'{phase} {seconds:.1f}s' for phase, seconds in sorted(index.timings.items())))
+        self._commit()
+
+    @api.model
+    def _cron_process_jobs(self) -> None:
+        """
+        Process the queued jobs. A job still 'running' when the cron starts was
+        interrupted, and is resumed from its checkpoint.
+        """
+        for job in self.search([('state', 'in', ('queued', 'running'))], order='id'):
+            job._process()
+
+    def action_resume(self) -> None:
+        """
+        Queue failed jobs again, they resume from their checkpoint.
+        """
+        if self.filtered(lambda job: job.state != 'failed'):
+            raise UserError(_("Only failed imports can be resumed."))
+        self.write({'state': 'queued'})
+        self.env.ref(f'{self._module}.ir_cron_saft_import')._trigger()
+
+    def action_refresh(self) -> Dict[str, str]:
+        return {'type': 'ir.actions.client', 'tag': 'soft_reload'}
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from odoo import api, fields, models
+
+# The key of a summary row: date, store, document type and payment method
+SummaryKey = Tuple[Any, Optional[int], Optional[str], Optional[int]]
+
+
+class VendusSalesSummary(models.Model):
+    """
+    The final Vendus documents summed per day, store, document type and payment method.
+
+    The dashboard graphs read this table instead of grouping `vendus.document`,
+    so they stay fast whatever the size of the history. The document upsert
+    keeps it up to date: the contribution of the documents of a page before the
+    upsert is subtracted and their new one is added, with one
+    `INSERT ... ON CONFLICT DO UPDATE` (see `_add_documents`). Documents
+    changed by other means are accounted for by `_rebuild`, which recomputes a
+    date range from the documents.
+    """
+    _name = 'vendus.sales.summary'
+    _description = 'Vendus Daily Sales Summary'
+    _order = 'date desc, id'
+    _rec_name = 'date'
+
+    date: fields.Date = fields.Date(string='Date', required=True, readonly=True)
+    store_id: fields.Many2one = fields.Many2one('vendus.store', string='Store', readonly=True, ondelete='set null')
+    type: fields.Selection = fields.Selection(
+        selection=lambda self: self.env['vendus.document']._fields['type'].selection,
+        string='Document Type', readonly=True)
+    payment_method_id: fields.Many2one = fields.Many2one(
+        'vendus.payment.method', string='Payment Method', readonly=True, ondelete='set null')
+    document_count: int = fields.Integer(string='Documents', readonly=True)
+    total_amount: float = fields.Float(string='Total Amount', readonly=True)
+
+    def init(self) -> None:
+        # The conflict target of the incremental updates. A missing store, type
+        # or payment method is a key of its own, which NULLs would not be.
+        self.env.cr.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS vendus_sales_summary_key_uniq
+                ON {self._table} (date, (coalesce(store_id, 0)), (coalesce(type, '')), (coalesce(payment_method_id, 0)))
+        """)
+
+    @api.model
+    def _get_contributions(self, document_ids: Iterable[int]) -> Dict[SummaryKey, Tuple[int, float]]:
+        """Sum the final documents among the given ones per summary key, in one query."""
+        self.env['vendus.document'].flush_model(
+            ['date', 'store_id', 'type', 'payment_method_id', 'total_amount', 'state'])
+        self.env.cr.execute("""
+            SELECT date, store_id, type, payment_method_id, count(*), sum(total_amount)
+              FROM vendus_document
+             WHERE id = ANY(%s) AND state = 'final' AND date IS NOT NULL
+             GROUP BY date, store_id, type, payment_method_id
+        """, [list(document_ids)])
+        return {tuple(row[:4]): (row[4], row[5] or 0.0) for row in self.env.cr.fetchall()}
+
+    @api.model
+    def _add_documents(
+        self,
+        before: Dict[SummaryKey, Tuple[int, float]],
+        after: Dict[SummaryKey, Tuple[int, float]],
+    ) -> None:
+        """Replace the contribution of documents to the summary, see `_get_contributions`.
+
+        Args:
+            before: The contribution of the documents before they changed.
+            after: The contribution of the documents once changed.
+        """
+        deltas: Dict[SummaryKey, list] = defaultdict(lambda: [0, 0.0])
+        for sign, contributions in ((-1, before), (1, after)):
+            for key, (count, amount) in contributions.items():
+                deltas[key][0] += sign * count
+                deltas[key][1] += sign * amount
+        deltas = {key: delta for key, delta in deltas.items() if delta[0] or abs(delta[1]) > 1e-9}
+        if not deltas:
+            return
+        # a consistent order, so that concurrent upserts lock the rows without deadlocking
+        keys = sorted(deltas, key=lambda key: (key[0], key[1] or 0, key[2] or '', key[3] or 0))
+        self.env.cr.execute(f"""
+            INSERT INTO {self._table}
+                (date, store_id, type, payment_method_id, document_count, total_amount,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT date, store_id, type, payment_method_id, document_count, total_amount,
+                   %s, now() AT TIME ZONE 'UTC', %s, now() AT TIME ZONE 'UTC'
+              FROM unnest(%s::date[], %s::int[], %s::varchar[], %s::int[], %s::int[], %s::float8[])
+                AS delta(date, store_id, type, payment_method_id, document_count, total_amount)
+                ON CONFLICT (date, (coalesce(store_id, 0)), (coalesce(type, '')), (coalesce(payment_method_id, 0)))
+                DO UPDATE SET document_count = {self._table}.document_count + EXCLUDED.document_count,
+                              total_amount = {self._table}.total_amount + EXCLUDED.total_amount,
+                              write_uid = EXCLUDED.write_uid,
+                              write_date = EXCLUDED.write_date
+        """, [
+            self.env.uid, self.env.uid,
+            [key[0] for key in keys], [key[1] for key in keys], [key[2] for key in keys], [key[3] for key in keys],
+            [deltas[key][0] for key in keys], [deltas[key][1] for key in keys],
+        ])
+        self.env.cr.execute(f"DELETE FROM {self._table} WHERE document_count = 0 AND date = ANY(%s)",
+                            [list({key[0] for key in keys})])
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild(self, date_from: Optional[fields.Date] = None, date_to: Optional[fields.Date] = None) -> None:
+        """Recompute the summary of a date range from the documents.
+
+        Args:
+            date_from: The first day to rebuild. Defaults to the first document.
+            date_to: The last day to rebuild. Defaults to the last document.
+        """
+        self.env['vendus.document'].flush_model()
+        where = ["TRUE"]
+        params = []
+        if date_from:
+            where.append("date >= %s")
+            params.append(fields.Date.to_date(date_from))
+        if date_to:
+            where.append("date <= %s")
+            params.append(fields.Date.to_date(date_to))
+        condition = ' AND '.join(where)
+        self.env.cr.execute(f"DELETE FROM {self._table} WHERE {condition}", params)
+        self.env.cr.execute(f"""
+            INSERT INTO {self._table}
+                (date, store_id, type, payment_method_id, document_count, total_amount,
+                 create_uid, create_date, write_uid, write_date)
+            SELECT date, store_id, type, payment_method_id, count(*), coalesce(sum(total_amount), 0),
+                   %s, now() AT TIME ZONE 'UTC', %s, now() AT TIME ZONE 'UTC'
+              FROM vendus_document
+             WHERE state = 'final' AND date IS NOT NULL AND {condition}
+             GROUP BY date, store_id, type, payment_method_id
+        """, [self.env.uid, self.env.uid] + params)
+        self.invalidate_model()
@@ -2,6 +2,7 @@ from odoo import api, fields, models
 
 class VendusStore(models.Model):
     _name = 'vendus.store'
+    _inherit = ['vendus.upsert.mixin']
     _description = 'Vendus Store'
 
     vendus_id = fields.Integer(string='Vendus ID', required=True)
@@ -15,10 +16,13 @@ class VendusStore(models.Model):
     phone = fields.Char(string='Phone')
     status = fields.Selection([('on', 'Active'), ('off', 'Inactive')], string='Status')
 
+    _sql_constraints = [
+        ('vendus_id_uniq', 'unique(vendus_id)', 'Vendus ID must be unique!')
+    ]
+
     @api.model
-    def create_or_update_from_vendus(self, vendus_data):
-        store = self.search([('vendus_id', '=', vendus_data['id'])])
-        vals = {
+    def _prepare_vendus_values(self, vendus_data, relations):
+        return {
             'vendus_id': vendus_data['id'],
             'name': vendus_data['title'],
             'type': vendus_data['type'],
@@ -30,8 +34,3 @@ class VendusStore(models.Model):
             'phone': vendus_data['phone'],
             'status': vendus_data['status'],
         }
-        if store:
-            store.write(vals)
-        else:
-            store = self.create(vals)
-        return store
\ No newline at end of file
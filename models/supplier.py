@@ -2,6 +2,7 @@ from odoo import api, fields, models
 
 class VendusSupplier(models.Model):
     _name = 'vendus.supplier'
+    _inherit = ['vendus.upsert.mixin']
     _description = 'Vendus Supplier'
 
     vendus_id = fields.Integer(string='Vendus ID', required=True)
@@ -14,10 +15,13 @@ class VendusSupplier(models.Model):
     postal_code = fields.Char(string='Postal Code')
     country = fields.Char(string='Country')
 
+    _sql_constraints = [
+        ('vendus_id_uniq', 'unique(vendus_id)', 'Vendus ID must be unique!')
+    ]
+
     @api.model
-    def create_or_update_from_vendus(self, vendus_data):
-        supplier = self.search([('vendus_id', '=', vendus_data['id'])])
-        vals = {
+    def _prepare_vendus_values(self, vendus_data, relations):
+        return {
             'vendus_id': vendus_data['id'],
             'name': vendus_data['name'],
             'contact_name': vendus_data.get('contact_name'),
@@ -28,8 +32,3 @@ class VendusSupplier(models.Model):
             'postal_code': vendus_data.get('postal_code'),
             'country': vendus_data.get('country'),
         }
-        if supplier:
-            supplier.write(vals)
-        else:
-            supplier = self.create(vals)
-        return supplier
\ No newline at end of file
@@ -1,7 +1,30 @@
-import requests
-from odoo import api, models, fields, _
-from odoo.exceptions import UserError, ValidationError
-from typing import Dict, List, Optional
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo import api, models, fields, tools, _
+from odoo.exceptions import UserError
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..lib.scheduler import DEFAULT_BUFFER_SIZE, SyncTask, run_tasks
+from ..lib.sync_run import DEFAULT_CUSTOMER_CACHE_SIZE, EntityMetrics, SyncRun
+from ..lib.vendus_client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_READ_TIMEOUT,
+    ClientStats,
+    VendusClient,
+    get_client,
+)
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_PER_PAGE = 100
+DEFAULT_PREFETCH_PAGES = 4
+# Days of documents read again by the reconciliation runs
+DEFAULT_RECONCILE_DAYS = 31
 
 class VendusSync(models.AbstractModel):
     """Abstract model for Vendus synchronization."""
@@ -25,6 +48,71 @@ class VendusSync(models.AbstractModel):
         """
         return self.env['ir.config_parameter'].sudo().get_param('vendus_integration.api_url', 'https://www.vendus.pt/ws/v1.1/')
 
+    @api.model
+    def _get_config_number(self, key: str, default: float, cast=int) -> float:
+        """Read a numeric configuration parameter, falling back to `default`."""
+        value = self.env['ir.config_parameter'].sudo().get_param(key, default)
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return default
+
+    @api.model
+    def _get_client(self) -> VendusClient:
+        """Get the Vendus API client for a sync run.
+
+        The configuration is read once here, and the client (with its pool of
+        keep-alive connections) is shared with the following runs of this
+        worker. Sync runs resolve it once, see `_new_run`.
+
+        Raises:
+            UserError: If the API key is not configured.
+        """
+        api_key = self._get_vendus_api_key()
+        if not api_key:
+            raise UserError(_('Vendus API key is not configured.'))
+        return get_client(
+            self._get_vendus_api_url(),
+            api_key,
+            pool_size=max(1, self._get_config_number('vendus_integration.pool_size', DEFAULT_POOL_SIZE)),
+            connect_timeout=self._get_config_number(
+                'vendus_integration.connect_timeout', DEFAULT_CONNECT_TIMEOUT, float),
+            read_timeout=self._get_config_number(
+                'vendus_integration.read_timeout', DEFAULT_READ_TIMEOUT, float),
+            rate_limit=self._get_rate_limit(),
+            max_retries=max(0, self._get_config_number('vendus_integration.max_retries', DEFAULT_MAX_RETRIES)),
+        )
+
+    @api.model
+    def _get_rate_limit(self) -> float:
+        """Get the share of the Vendus request rate this process may use.
+
+        The token bucket of the client only sees the calls of its own process,
+        so the configured `vendus_integration.rate_limit`, the quota of the
+        account, is split evenly between the processes calling the API at once:
+        `vendus_integration.rate_limit_processes`, which defaults to the number
+        of cron workers (the syncs and payload workers run as crons), or 1 when
+        Odoo runs its crons as threads of a single process.
+        """
+        rate = self._get_config_number('vendus_integration.rate_limit', DEFAULT_RATE_LIMIT, float)
+        default_processes = (tools.config.get('max_cron_threads') or 1) if tools.config.get('workers') else 1
+        processes = self._get_config_number('vendus_integration.rate_limit_processes', 0) or default_processes
+        return rate / max(1, processes)
+
+    @api.model
+    def _new_run(self) -> SyncRun:
+        """Start a sync run, resolving the API client once for all its entity syncs."""
+        return SyncRun(
+            self._get_client(),
+            customer_cache_size=self._get_config_number(
+                'vendus_integration.customer_cache_size', DEFAULT_CUSTOMER_CACHE_SIZE),
+        )
+
+    @api.model
+    def _get_prefetch_pages(self) -> int:
+        """Get the number of pages fetched ahead while a page is being stored."""
+        return max(1, self._get_config_number('vendus_integration.prefetch_pages', DEFAULT_PREFETCH_PAGES))
+
     def _make_api_request(
         self,
         endpoint: str,
@@ -32,6 +120,7 @@ class VendusSync(models.AbstractModel):
         params: Optional[Dict[str, str]] = None,
         data: Optional[Dict[str, str]] = None,
         headers: Optional[Dict[str, str]] = None,
+        client: Optional[VendusClient] = None,
     ) -> Dict[str, str]:
         """Make a request to the Vendus API.
 
@@ -41,6 +130,7 @@ class VendusSync(models.AbstractModel):
             params: The URL parameters to pass.
             data: The JSON data to send in the request body.
             headers: The headers to send with the request.
+            client: The client of the current sync run. Defaults to `_get_client`.
 
         Returns:
             The JSON response from the API.
@@ -48,179 +138,605 @@ class VendusSync(models.AbstractModel):
         Raises:
             UserError: If the API request fails.
         """
-        api_key = self._get_vendus_api_key()
-        api_url = self._get_vendus_api_url()
+        client = client or self._get_client()
+        return client.request(endpoint, method=method, params=params, data=data, headers=headers)
 
-        if not api_key:
-            raise UserError(_('Vendus API key is not configured.'))
+    @api.model
+    def _iter_api_pages(
+        self,
+        endpoint: str,
+        key: str,
+        params: Optional[Dict[str, str]] = None,
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+        prefetch: Optional[int] = None,
+        client: Optional[VendusClient] = None,
+        stats: Optional[ClientStats] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over every page of a paginated Vendus endpoint.
+
+        While the caller is storing a page, up to `prefetch` following pages are
+        already being downloaded by a bounded thread pool. The walk stops at the
+        first short (or missing) page, and pages fetched past the end are
+        discarded.
+
+        Args:
+            endpoint: The endpoint to read.
+            key: The key holding the records when the API wraps them in an object.
+            params: Extra URL parameters, sent with every page.
+            page: The first page to read. Defaults to 1.
+            per_page: The number of records per page.
+            prefetch: The number of pages to fetch ahead. Defaults to the
+                `vendus_integration.prefetch_pages` parameter.
+            client: The client of the current sync run. Defaults to `_get_client`.
+            stats: Extra counters the calls are also counted in.
+
+        When both `prefetch` and `client` are given, the environment is not
+        used, and the pages can be iterated from another thread.
+
+        Yields:
+            The records of each non-empty page, in page order.
+        """
+        client = client or self._get_client()
+        prefetch = prefetch or self._get_prefetch_pages()
+        base_params = dict(params or {}, per_page=per_page)
+
+        def fetch(page_number: int) -> List[Dict[str, Any]]:
+            data = client.get(endpoint, params=dict(base_params, page=page_number), allow_not_found=True, stats=stats)
+            if isinstance(data, dict):
+                data = data.get(key)
+            return data or []
+
+        executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix='vendus_fetch')
+        pending = deque()
+        next_page = page
+        try:
+            while len(pending) < prefetch:
+                pending.append(executor.submit(fetch, next_page))
+                next_page += 1
+            while pending:
+                records = pending.popleft().result()
+                if records:
+                    yield records
+                if len(records) < per_page:
+                    break
+                pending.append(executor.submit(fetch, next_page))
+                next_page += 1
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @api.model
+    def _get_delta_cursors(self) -> Dict[str, str]:
+        """Get the high-water mark kind used by each paginated entity.
+
+        - `id`: pages are read newest first and the walk stops at the first
+          record at or below the last stored Vendus ID.
+        - `date`: only records dated on or after the last stored date are
+          requested. The last day is downloaded again, but its records at or
+          below the last stored Vendus ID are dropped, so they are neither
+          staged nor upserted again.
+
+        The Vendus API has no modification filter, so these cursors only see new
+        records: a product or customer edited in Vendus, or an older document
+        canceled, is not read again by the regular syncs. The reconciliation
+        runs catch up with them, see `_get_reconcile_since`.
+        """
+        return {
+            'products': 'id',
+            'customers': 'id',
+            'documents': 'date',
+        }
 
-        headers = headers or {}
-        headers.update({
-            'Accept': 'application/json',
-            'Content-Type': 'application/json',
-        })
+    @api.model
+    def _get_reconcile_since(self, entity: str) -> Optional[fields.Date]:
+        """Get where a reconciliation run reads an entity from, ignoring its cursor.
 
-        url = f"{api_url}{endpoint}"
-        params = params or {}
-        params['api_key'] = api_key
+        The products and customers are read in full. The documents are read
+        from `vendus_integration.reconcile_days` days ago: changes to older
+        documents are not picked up. The upsert skips the unchanged payloads,
+        so only the records edited in Vendus are written.
 
-        try:
-            response = requests.request(
-                method,
-                url,
-                headers=headers,
-                params=params,
-                json=data
-            )
-
-            # Handle errors
-            if response.status_code == 400:
-                raise ValidationError(_('Bad Request: Could not parse request'))
-            elif response.status_code == 401:
-                raise UserError(_('Unauthorized: Authentication failed'))
-            elif response.status_code == 403:
-                raise UserError(_('Forbidden: Authenticated user does not have access'))
-            elif response.status_code == 404:
-                raise ValidationError(_('Not Found: Resource not found'))
-            elif response.status_code == 415:
-                raise ValidationError(_('Unsupported Media Type: Invalid content-type header'))
-            elif response.status_code == 422:
-                raise ValidationError(_('Unprocessable Entry: Validation error occurred'))
-            elif response.status_code == 429:
-                raise UserError(_('Too Many Requests: Request rejected due to rate limiting'))
-            elif response.status_code >= 500:
-                raise UserError(_('Internal Server Error: An unexpected error occurred'))
-
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            raise UserError(_(f'Error communicating with Vendus API: {str(e)}'))
+        Returns:
+            The first date of documents to read, or None to read every record.
+        """
+        if self._get_delta_cursors().get(entity) != 'date':
+            return None
+        days = self._get_config_number('vendus_integration.reconcile_days', DEFAULT_RECONCILE_DAYS)
+        return fields.Date.subtract(fields.Date.context_today(self), days=max(0, days))
+
+    @api.model
+    def _commit_progress(self) -> None:
+        """Commit the work done so far, so a later failure does not discard it."""
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
+    @api.model
+    def _use_staging(self) -> bool:
+        """Whether the syncs stage the fetched records in `vendus.payload` instead of storing them."""
+        mode = self.env['ir.config_parameter'].sudo().get_param('vendus_integration.sync_apply_mode', 'staged')
+        return mode != 'direct'
+
+    @api.model
+    def _store_records(self, entity: str, model_name: str, records: List[Dict[str, Any]], run: SyncRun) -> None:
+        """Store a batch of fetched records, and commit.
+
+        With staging, the records whose payload hash matches the stored record,
+        and that have no pending payload, are dropped, and the other ones are inserted in `vendus.payload` with
+        one query. The payload workers are woken to apply them, so that
+        fetching does not wait for the upserts. Otherwise they are upserted
+        right away.
+        """
+        if self._use_staging():
+            Model = self.env[model_name]
+            Payload = self.env['vendus.payload']
+            vendus_ids = [Model._normalize_vendus_id(r['id']) for r in records if r]
+            hashes = Model._get_vendus_hashes(vendus_ids)
+            # a pending payload would overwrite the record afterwards, so the latest one is staged anyway
+            pending = Payload._get_pending_vendus_ids(entity, vendus_ids)
+            changed = [
+                r for r in records if r and (
+                    int(r['id']) in pending
+                    or hashes.get(Model._normalize_vendus_id(r['id']), (None, None))[1]
+                    != Model._hash_vendus_payload(r))
+            ]
+            staged = Payload._stage(entity, changed) if changed else 0
+            run.count_upserts(model_name, unchanged=len(records) - len(changed), staged=staged)
+            if staged:
+                Payload._trigger_workers()
+        else:
+            self.env[model_name].batch_upsert_from_vendus(records, run=run)
+        self._commit_progress()
+
+    @api.model
+    def _get_sync_steps(self) -> Dict[str, Dict[str, Any]]:
+        """Get the entity syncs of a full run, and their dependencies.
+
+        Each step may define:
+        - `model`: the model storing the records, if any.
+        - `endpoint`: the endpoint of the entity. Defaults to the entity.
+        - `depends`: the entities that must be stored first.
+
+        The entities of `_get_delta_cursors` are paginated and read from their
+        cursor, the other ones are read with a single request.
+        """
+        return {
+            'products': {'model': 'vendus.product'},
+            'customers': {'model': 'vendus.customer'},
+            # Documents reference their customer, store and payment method, and their lines the products
+            'documents': {
+                'model': 'vendus.document',
+                'depends': ('customers', 'products', 'stores', 'payment_methods'),
+            },
+            'payment_methods': {'model': 'vendus.payment.method', 'endpoint': 'documents/paymentmethods/'},
+            'document_types': {'model': None, 'endpoint': 'documents/types/'},
+            'stores': {'model': 'vendus.store'},
+            'suppliers': {'model': 'vendus.supplier'},
+            'rooms': {'model': 'vendus.room'},
+            'tables': {'model': 'vendus.table'},
+        }
+
+    @api.model
+    def _plan_paginated(
+        self,
+        entity: str,
+        model_name: str,
+        run: SyncRun,
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+        sort: Optional[str] = None,
+        full: bool = False,
+        stats: Optional[ClientStats] = None,
+        depends: Tuple[str, ...] = (),
+        since: Optional[fields.Date] = None,
+    ) -> SyncTask:
+        """Prepare the sync of a paginated entity, only reading records past its high-water mark.
+
+        The task fetches the pages (stopping at the cursor) without using the
+        environment. Each page is stored (see `_store_records`) and committed,
+        and the cursor in `vendus.sync.state` is advanced once every page was
+        stored.
+
+        Args:
+            entity: The entity, which is also the endpoint and the response key.
+            model_name: The model storing the records.
+            run: The current sync run.
+            page: The first page of results to retrieve.
+            per_page: The number of results to retrieve per page.
+            sort: The sort order. An explicit order disables the `id` cursor.
+            full: Ignore the cursor and read the full history.
+            stats: Extra counters the API calls are also counted in.
+            depends: The entities to store first.
+            since: Ignore the cursor and read the records dated from this date.
+        """
+        state = self.env['vendus.sync.state']._get_state(entity)
+        cursor = self._get_delta_cursors().get(entity)
+        params = {}
+        if sort:
+            params['sort'] = sort
+        last_vendus_id = 0
+        stored_vendus_id = 0
+        if since:
+            params['since'] = fields.Date.to_string(since)
+        elif not full and cursor == 'id' and not sort:
+            params['sort'] = '-id'
+            last_vendus_id = state.last_vendus_id
+        elif not full and cursor == 'date' and state.last_date:
+            params['since'] = fields.Date.to_string(state.last_date)
+            # the records of the last day that were already stored
+            stored_vendus_id = state.last_vendus_id
+        prefetch = self._get_prefetch_pages()
+        progress = {'max_id': 0, 'max_date': None}
+
+        def fetch() -> Iterator[List[Dict[str, Any]]]:
+            for records in self._iter_api_pages(entity, entity, params=params, page=page, per_page=per_page,
+                                                prefetch=prefetch, client=run.client, stats=stats):
+                if stored_vendus_id:
+                    records = [r for r in records if int(r['id']) > stored_vendus_id]
+                    if records:
+                        yield records
+                    continue
+                if not last_vendus_id:
+                    yield records
+                    continue
+                new_records = [r for r in records if int(r['id']) > last_vendus_id]
+                if new_records:
+                    yield new_records
+                if len(new_records) < len(records):
+                    return
+
+        def apply(records: List[Dict[str, Any]]) -> None:
+            for record in records:
+                progress['max_id'] = max(progress['max_id'], int(record['id']))
+                if record.get('date') and (not progress['max_date'] or record['date'] > progress['max_date']):
+                    progress['max_date'] = record['date']
+            self._store_records(entity, model_name, records, run)
+
+        def finish() -> None:
+            state.advance(vendus_id=progress['max_id'], date=progress['max_date'])
+            self._commit_progress()
+
+        return SyncTask(entity, fetch, apply, finish, depends=depends)
+
+    @api.model
+    def _plan_reference(
+        self,
+        entity: str,
+        endpoint: str,
+        model_name: Optional[str],
+        run: SyncRun,
+        stats: Optional[ClientStats] = None,
+        depends: Tuple[str, ...] = (),
+    ) -> SyncTask:
+        """Prepare the sync of an entity read with a single request, such as stores.
+
+        The request is conditional on the response cached in
+        `vendus.response.cache`: when Vendus answers 304 Not Modified, or the
+        same body as the cached one, nothing is stored. Otherwise the records
+        are stored, and the response is cached once they all were.
+
+        Args:
+            entity: The entity.
+            endpoint: The endpoint returning every record of the entity.
+            model_name: The model storing the records. Without model, the
+                records are read but not stored.
+            run: The current sync run.
+            stats: Extra counters the API calls are also counted in.
+            depends: The entities to store first.
+        """
+        Cache = self.env['vendus.response.cache']
+        validators = Cache._get_validators(endpoint)
+        fetched = {}
+
+        def fetch() -> Iterator[List[Dict[str, Any]]]:
+            response = fetched['response'] = run.client.get_conditional(
+                endpoint, etag=validators.get('etag'), last_modified=validators.get('last_modified'), stats=stats)
+            fetched['unchanged'] = not response.modified or response.content_hash == validators.get('content_hash')
+            if not fetched['unchanged'] and response.data:
+                yield response.data
+
+        def apply(records: List[Dict[str, Any]]) -> None:
+            if model_name:
+                self._store_records(entity, model_name, records, run)
+
+        def finish() -> None:
+            response = fetched['response']
+            if not fetched['unchanged']:
+                Cache._store(endpoint, None, response)
+                self._commit_progress()
+            elif response.modified and model_name:
+                run.count_upserts(model_name, unchanged=len(response.data or []))
+
+        return SyncTask(entity, fetch, apply, finish, depends=depends)
+
+    @api.model
+    def _plan_step(
+        self, entity: str, run: SyncRun, stats: Optional[ClientStats] = None, reconcile: bool = False,
+    ) -> SyncTask:
+        """Prepare the sync of an entity of `_get_sync_steps`.
+
+        With `reconcile`, paginated entities are read again regardless of their
+        cursor, see `_get_reconcile_since`.
+        """
+        step = self._get_sync_steps()[entity]
+        depends = tuple(step.get('depends', ()))
+        if entity in self._get_delta_cursors():
+            since = self._get_reconcile_since(entity) if reconcile else None
+            return self._plan_paginated(entity, step['model'], run, stats=stats, depends=depends,
+                                        full=reconcile, since=since)
+        return self._plan_reference(entity, step.get('endpoint', entity), step.get('model'), run,
+                                    stats=stats, depends=depends)
+
+    @api.model
+    def _run_task(self, task: SyncTask) -> None:
+        """Run a sync task in this thread, storing each batch once fetched."""
+        for batch in task.fetch():
+            task.apply(batch)
+        if task.finish:
+            task.finish()
+
+    @api.model
+    def _sync_paginated(
+        self,
+        entity: str,
+        model_name: str,
+        page: int = 1,
+        per_page: int = DEFAULT_PER_PAGE,
+        sort: Optional[str] = None,
+        run: Optional[SyncRun] = None,
+        full: bool = False,
+    ) -> None:
+        """Sync a paginated entity on its own, see `_plan_paginated`."""
+        run = run or self._new_run()
+        self._run_task(self._plan_paginated(entity, model_name, run, page=page, per_page=per_page,
+                                            sort=sort, full=full))
 
     @api.model
     def sync_products(
         self,
         page: int = 1,
-        per_page: int = 20,
+        per_page: int = DEFAULT_PER_PAGE,
         sort: Optional[str] = None,
+        run: Optional[SyncRun] = None,
+        full: bool = False,
     ) -> None:
         """Sync products from Vendus.
 
+        Only products newer than the last run are read, unless `full` is set.
+        The next pages are prefetched in the background.
+
         Args:
-            page: The page of results to retrieve. Defaults to 1.
-            per_page: The number of results to retrieve per page. Defaults to 20.
+            page: The first page of results to retrieve. Defaults to 1.
+            per_page: The number of results to retrieve per page. Defaults to 100.
             sort: The sort order. Defaults to None.
+            run: The current sync run. Defaults to a new run.
+            full: Read every product, ignoring the high-water mark.
         """
-        params = {
-            'page': page,
-            'per_page': per_page,
-        }
-        if sort:
-            params['sort'] = sort
-
-        products_data = self._make_api_request('products', params=params)
-        for product_data in products_data.get('products', []):
-            self.env['vendus.product'].create_or_update_from_vendus(product_data)
+        self._sync_paginated('products', 'vendus.product', page=page, per_page=per_page,
+                             sort=sort, run=run, full=full)
 
     @api.model
     def sync_customers(
         self,
         page: int = 1,
-        per_page: int = 20,
+        per_page: int = DEFAULT_PER_PAGE,
         sort: Optional[str] = None,
+        run: Optional[SyncRun] = None,
+        full: bool = False,
     ) -> None:
         """Sync customers from Vendus.
 
+        Only customers newer than the last run are read, unless `full` is set.
+        The next pages are prefetched in the background.
+
         Args:
-            page: The page of results to retrieve. Defaults to 1.
-            per_page: The number of results to retrieve per page. Defaults to 20.
+            page: The first page of results to retrieve. Defaults to 1.
+            per_page: The number of results to retrieve per page. Defaults to 100.
             sort: The sort order. Defaults to None.
+            run: The current sync run. Defaults to a new run.
+            full: Read every customer, ignoring the high-water mark.
         """
-        params = {
-            'page': page,
-            'per_page': per_page,
-        }
-        if sort:
-            params['sort'] = sort
-
-        customers_data = self._make_api_request('customers', params=params)
-        for customer_data in customers_data.get('customers', []):
-            self.env['vendus.customer'].create_or_update_from_vendus(customer_data)
+        self._sync_paginated('customers', 'vendus.customer', page=page, per_page=per_page,
+                             sort=sort, run=run, full=full)
 
     @api.model
     def sync_documents(
         self,
         page: int = 1,
-        per_page: int = 20,
+        per_page: int = DEFAULT_PER_PAGE,
         sort: Optional[str] = None,
+        run: Optional[SyncRun] = None,
+        full: bool = False,
     ) -> None:
         """Sync documents from Vendus.
 
+        Only documents dated on or after the last stored date are read, unless
+        `full` is set. The next pages are prefetched in the background.
+
         Args:
-            page: The page of results to retrieve. Defaults to 1.
-            per_page: The number of results to retrieve per page. Defaults to 20.
+            page: The first page of results to retrieve. Defaults to 1.
+            per_page: The number of results to retrieve per page. Defaults to 100.
             sort: The sort order. Defaults to None.
+            run: The current sync run. Defaults to a new run.
+            full: Read every document, ignoring the high-water mark.
         """
-        params = {
-            'page': page,
-            'per_page': per_page,
-        }
-        if sort:
-            params['sort'] = sort
+        self._sync_paginated('documents', 'vendus.document', page=page, per_page=per_page,
+                             sort=sort, run=run, full=full)
 
-        documents_data = self._make_api_request('documents', params=params)
-        for document_data in documents_data.get('documents', []):
-            self.env['vendus.document'].create_or_update_from_vendus(document_data)
+    @api.model
+    def _sync_reference(self, entity: str, run: Optional[SyncRun] = None) -> None:
+        """Sync a non-paginated entity of `_get_sync_steps` on its own."""
+        run = run or self._new_run()
+        self._run_task(self._plan_step(entity, run))
 
     @api.model
-    def sync_payment_methods(self) -> None:
+    def sync_payment_methods(self, run: Optional[SyncRun] = None) -> None:
         """Sync payment methods from Vendus."""
-        payment_methods = self._make_api_request('documents/paymentmethods/')
-        for payment_method in payment_methods:
-            self.env['vendus.payment.method'].create_or_update_from_vendus(payment_method)
+        self._sync_reference('payment_methods', run=run)
 
     @api.model
-    def sync_document_types(self) -> None:
-        """Sync document types from Vendus."""
-        document_types = self._make_api_request('documents/types/')
-        # Process and store document types
+    def sync_document_types(self, run: Optional[SyncRun] = None) -> None:
+        """Sync document types from Vendus.
+
+        Document types are not stored in a model, their last response is kept
+        in `vendus.response.cache`.
+        """
+        self._sync_reference('document_types', run=run)
 
     @api.model
-    def sync_stores(self) -> None:
+    def sync_stores(self, run: Optional[SyncRun] = None) -> None:
         """Sync stores from Vendus."""
-        stores_data = self._make_api_request('stores')
-        for store_data in stores_data:
-            self.env['vendus.store'].create_or_update_from_vendus(store_data)
+        self._sync_reference('stores', run=run)
 
     @api.model
-    def sync_suppliers(self) -> None:
+    def sync_suppliers(self, run: Optional[SyncRun] = None) -> None:
         """Sync suppliers from Vendus."""
-        suppliers_data = self._make_api_request('suppliers')
-        for supplier_data in suppliers_data:
-            self.env['vendus.supplier'].create_or_update_from_vendus(supplier_data)
+        self._sync_reference('suppliers', run=run)
 
     @api.model
-    def sync_rooms(self) -> None:
+    def sync_rooms(self, run: Optional[SyncRun] = None) -> None:
         """Sync rooms from Vendus."""
-        rooms_data = self._make_api_request('rooms')
-        for room_data in rooms_data:
-            self.env['vendus.room'].create_or_update_from_vendus(room_data)
+        self._sync_reference('rooms', run=run)
 
     @api.model
-    def sync_tables(self) -> None:
+    def sync_tables(self, run: Optional[SyncRun] = None) -> None:
         """Sync tables from Vendus."""
-        tables_data = self._make_api_request('tables')
-        for table_data in tables_data:
-            self.env['vendus.table'].create_or_update_from_vendus(table_data)
-
-    @api.model
-    def sync_all(self) -> None:
-        """Sync all Vendus data."""
-        self.sync_products()
-        self.sync_customers()
-        self.sync_documents()
-        self.sync_payment_methods()
-        self.sync_document_types()
-        self.sync_stores()
-        self.sync_suppliers()
-        self.sync_rooms()
-        self.sync_tables()
\ No newline at end of file
+        self._sync_reference('tables', run=run)
+
+    @api.model
+    def _measure_task(self, task: SyncTask, run: SyncRun, metrics: EntityMetrics) -> SyncTask:
+        """Wrap a task so that its writes are counted in the metrics of its entity."""
+        query_count = lambda: self.env.cr.sql_log_count
+
+        def apply(batch: Any) -> None:
+            with run.measure(metrics, query_count):
+                task.apply(batch)
+
+        def finish() -> None:
+            with run.measure(metrics, query_count):
+                if task.finish:
+                    task.finish()
+            metrics.stop()
+
+        return SyncTask(task.name, task.fetch, apply, finish, depends=task.depends)
+
+    @api.model
+    def _run_sync_steps(self, run: SyncRun, entities: Optional[List[str]] = None, reconcile: bool = False) -> None:
+        """Sync entities of `_get_sync_steps`, fetching them concurrently.
+
+        The entities are fetched by a pool of threads, while this thread stores
+        their pages in dependency order (see `run_tasks`). A failing entity is
+        rolled back to its last committed page and its error is recorded, so
+        that the other entities are still synced. The run caches are cleared,
+        as they may hold rolled back records.
+
+        Args:
+            run: The current sync run, which collects the metrics of each entity.
+            entities: The entities to sync. Defaults to all of them.
+            reconcile: Read the paginated entities again regardless of their cursor.
+        """
+        query_count = lambda: self.env.cr.sql_log_count
+        tasks = []
+        for entity, step in self._get_sync_steps().items():
+            if entities is not None and entity not in entities:
+                continue
+            metrics = run.start_entity(entity, step.get('model'))
+            with run.measure(metrics, query_count):
+                task = self._plan_step(entity, run, stats=metrics.stats, reconcile=reconcile)
+            tasks.append(self._measure_task(task, run, metrics))
+
+        def on_error(task: SyncTask, error: BaseException) -> None:
+            if self.env.registry.in_test_mode():
+                raise error
+            self.env.cr.rollback()
+            run.customer_ids.clear()
+            _logger.error("Vendus sync of %s failed", task.name, exc_info=error)
+            metrics = run.entities[task.name]
+            metrics.error = str(error)
+            metrics.stop()
+
+        run_tasks(
+            tasks,
+            max_workers=self._get_config_number('vendus_integration.sync_workers', 0) or None,
+            buffer_size=max(1, self._get_config_number('vendus_integration.sync_buffer_pages', DEFAULT_BUFFER_SIZE)),
+            on_error=on_error,
+        )
+
+    @api.model
+    def sync_entities(self, entities: Optional[List[str]] = None, reconcile: bool = False) -> 'VendusSyncRun':
+        """Sync some entities of `_get_sync_steps`, as one recorded run.
+
+        Independent entities are fetched concurrently, and stored in dependency
+        order, see `_run_sync_steps`. The dependencies that are not synced are
+        ignored: e.g. documents synced alone fetch their missing customers. The
+        run and the metrics of each entity are recorded in `vendus.sync.run`.
+
+        Args:
+            entities: The entities to sync. Defaults to all of them.
+            reconcile: Read the paginated entities again regardless of their
+                cursor, to pick up the records edited in Vendus, see
+                `_get_reconcile_since`.
+
+        Returns:
+            The recorded run.
+        """
+        date_start = fields.Datetime.now()
+        run = self._new_run()
+        self._run_sync_steps(run, entities, reconcile=reconcile)
+        sync_run = self.env['vendus.sync.run']._record(run, date_start, entities)
+        self._commit_progress()
+
+        _logger.info("Vendus sync of %s done in %.1fs: %d API calls, %d retries, %.1fs throttled, p95 latency %.2fs",
+                     sync_run.scope, sync_run.duration, sync_run.api_calls, sync_run.retries,
+                     sync_run.throttled_seconds, sync_run.latency_p95)
+        for metrics in run.entities.values():
+            _logger.info("Vendus sync of %s in %.1fs: %d created, %d updated, %d unchanged, %d detail calls, "
+                         "%d queries%s",
+                         metrics.entity, metrics.duration, metrics.created, metrics.updated,
+                         metrics.unchanged, metrics.detail_calls, metrics.query_count,
+                         f", failed: {metrics.error}" if metrics.error else '')
+        return sync_run
+
+    @api.model
+    def sync_all(self) -> 'VendusSyncRun':
+        """Sync all Vendus data, see `sync_entities`.
+
+        The scheduled syncs run per entity group, each at its own interval (see
+        `_get_sync_crons`); this full sync is kept for manual runs.
+        """
+        return self.sync_entities()
+
+    @api.model
+    def _get_sync_crons(self) -> Dict[str, Tuple[str, int]]:
+        """Get the scheduled syncs, and the parameter holding their interval.
+
+        Returns:
+            The configuration parameter holding the interval in minutes, and
+            its default, by cron XML ID. An interval of 0 disables the cron.
+        """
+        return {
+            'ir_cron_sync_documents': ('vendus_integration.documents_sync_interval', 5),
+            'ir_cron_sync_customers': ('vendus_integration.customers_sync_interval', 15),
+            'ir_cron_sync_products': ('vendus_integration.products_sync_interval', 15),
+            'ir_cron_sync_reference': ('vendus_integration.reference_sync_interval', 1440),
+            'ir_cron_reconcile': ('vendus_integration.reconcile_interval', 1440),
+        }
+
+    @api.model
+    def _get_cron_interval_values(self, minutes: int) -> Dict[str, Any]:
+        """Convert an interval in minutes to the values of a cron, in the largest exact unit."""
+        if minutes <= 0:
+            return {'active': False}
+        for unit, length in (('days', 1440), ('hours', 60)):
+            if minutes % length == 0:
+                return {'active': True, 'interval_number': minutes // length, 'interval_type': unit}
+        return {'active': True, 'interval_number': minutes, 'interval_type': 'minutes'}
+
+    @api.model
+    def _update_sync_crons(self) -> None:
+        """Reschedule the sync crons from their configured intervals."""
+        for xmlid, (key, default) in self._get_sync_crons().items():
+            cron = self.env.ref(f'{self._module}.{xmlid}', raise_if_not_found=False)
+            if cron:
+                cron.sudo().write(self._get_cron_interval_values(self._get_config_number(key, default)))
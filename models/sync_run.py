@@ -0,0 +1,159 @@
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from odoo import api, fields, models
+
+from ..lib.sync_run import SyncRun
+
+# Number of days sync runs are kept
+SYNC_RUN_RETENTION_DAYS = 90
+
+
+class VendusSyncRun(models.Model):
+    """
+    The log of a `vendus.sync` run, with one line per synced entity.
+
+    Runs are recorded once every entity sync has ended, from the
+    `EntityMetrics` collected by the `SyncRun`. Their lines feed the sync trend graphs of the
+    dashboard, showing when Vendus or the database slows down.
+    """
+    _name = 'vendus.sync.run'
+    _description = 'Vendus Sync Run'
+    _order = 'date_start desc, id desc'
+    _rec_name = 'date_start'
+
+    date_start: fields.Datetime = fields.Datetime(string='Started', required=True, readonly=True, index=True)
+    date_end: fields.Datetime = fields.Datetime(string='Finished', readonly=True)
+    scope: str = fields.Char(string='Entities', readonly=True,
+                             help='The entities synced by the run, e.g. by the documents cron.')
+    state: str = fields.Selection([
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', required=True, readonly=True, default='done')
+    duration: float = fields.Float(string='Wall Time (s)', readonly=True)
+    api_calls: int = fields.Integer(string='API Calls', readonly=True)
+    retries: int = fields.Integer(string='Retries', readonly=True)
+    throttled_seconds: float = fields.Float(string='Throttled (s)', readonly=True)
+    bytes_received: int = fields.Integer(string='Bytes Received', readonly=True)
+    latency_p50: float = fields.Float(string='Latency p50 (s)', readonly=True,
+                                      help='Median latency of the API calls, as the upper bound of its histogram bucket.')
+    latency_p95: float = fields.Float(string='Latency p95 (s)', readonly=True,
+                                      help='95th percentile latency of the API calls, as the upper bound of its histogram bucket.')
+    created: int = fields.Integer(string='Created', readonly=True)
+    updated: int = fields.Integer(string='Updated', readonly=True)
+    unchanged: int = fields.Integer(string='Unchanged', readonly=True)
+    staged: int = fields.Integer(string='Staged', readonly=True,
+                                 help='Records queued in vendus.payload, to be stored by the payload workers.')
+    detail_calls: int = fields.Integer(string='Detail Calls', readonly=True,
+                                       help='API calls reading a single record, e.g. the items of a document.')
+    query_count: int = fields.Integer(string='SQL Queries', readonly=True)
+    line_ids: fields.One2many = fields.One2many('vendus.sync.run.line', 'run_id', string='Entities', readonly=True)
+    error: str = fields.Text(string='Errors', readonly=True)
+
+    @api.model
+    def _record(self, run: SyncRun, date_start: fields.Datetime, entities: Optional[List[str]] = None,
+                scope: Optional[str] = None) -> 'VendusSyncRun':
+        """Store a finished sync run and the metrics of its entities.
+
+        Args:
+            run: The finished sync run.
+            date_start: When the run started.
+            entities: The entities the run was asked to sync. Defaults to all.
+            scope: The label of the run, instead of its entities, e.g. for the
+                runs of the payload workers.
+
+        Returns:
+            The created run.
+        """
+        stats = run.client_stats()
+        lines = [self.env['vendus.sync.run.line']._prepare_values(metrics.as_dict()) for metrics in run.entities.values()]
+        errors = [f"{line['entity']}: {line['error']}" for line in lines if line['error']]
+        return self.sudo().create({
+            'date_start': date_start,
+            'date_end': fields.Datetime.now(),
+            'scope': scope or (', '.join(entities) if entities else 'all'),
+            'state': 'failed' if errors else 'done',
+            'duration': run.elapsed(),
+            'api_calls': stats['calls'],
+            'retries': stats['retries'],
+            'throttled_seconds': stats['throttled_seconds'],
+            'bytes_received': stats['bytes_received'],
+            'latency_p50': run.latency_percentile(50),
+            'latency_p95': run.latency_percentile(95),
+            'created': sum(line['created'] for line in lines),
+            'updated': sum(line['updated'] for line in lines),
+            'unchanged': sum(line['unchanged'] for line in lines),
+            'staged': sum(line['staged'] for line in lines),
+            'detail_calls': sum(line['detail_calls'] for line in lines),
+            'query_count': sum(line['query_count'] for line in lines),
+            'line_ids': [(0, 0, line) for line in lines],
+            'error': '\n'.join(errors) or False,
+        })
+
+    @api.model
+    def action_sync_now(self) -> Dict[str, Any]:
+        """Run a full sync and reload the run log."""
+        self.env['vendus.sync'].sync_all()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
+
+    @api.autovacuum
+    def _gc_sync_runs(self) -> None:
+        """Delete the runs older than the retention period."""
+        limit = fields.Datetime.now() - timedelta(days=SYNC_RUN_RETENTION_DAYS)
+        self.sudo().search([('date_start', '<', limit)]).unlink()
+
+
+class VendusSyncRunLine(models.Model):
+    """The metrics of one entity in a `vendus.sync.run`."""
+    _name = 'vendus.sync.run.line'
+    _description = 'Vendus Sync Run Entity'
+    _order = 'date_start desc, id'
+    _rec_name = 'entity'
+
+    run_id: models.Many2one = fields.Many2one('vendus.sync.run', string='Run', required=True, ondelete='cascade', index=True)
+    date_start: fields.Datetime = fields.Datetime(related='run_id.date_start', store=True, string='Run Started')
+    entity: str = fields.Char(string='Entity', required=True, readonly=True, index=True)
+    duration: float = fields.Float(string='Wall Time (s)', readonly=True, group_operator='avg')
+    api_calls: int = fields.Integer(string='API Calls', readonly=True)
+    retries: int = fields.Integer(string='Retries', readonly=True)
+    throttled_seconds: float = fields.Float(string='Throttled (s)', readonly=True)
+    bytes_received: int = fields.Integer(string='Bytes Received', readonly=True)
+    latency_p50: float = fields.Float(string='Latency p50 (s)', readonly=True, group_operator='avg')
+    latency_p95: float = fields.Float(string='Latency p95 (s)', readonly=True, group_operator='max')
+    created: int = fields.Integer(string='Created', readonly=True)
+    updated: int = fields.Integer(string='Updated', readonly=True)
+    unchanged: int = fields.Integer(string='Unchanged', readonly=True)
+    staged: int = fields.Integer(string='Staged', readonly=True)
+    detail_calls: int = fields.Integer(string='Detail Calls', readonly=True)
+    query_count: int = fields.Integer(string='SQL Queries', readonly=True)
+    records_per_second: float = fields.Float(string='Records/s', compute='_compute_rates', store=True, group_operator='avg')
+    queries_per_record: float = fields.Float(string='Queries/Record', compute='_compute_rates', store=True, group_operator='avg')
+    error: str = fields.Text(string='Error', readonly=True)
+
+    @api.depends('duration', 'created', 'updated', 'unchanged', 'staged', 'query_count')
+    def _compute_rates(self) -> None:
+        for line in self:
+            records = line.created + line.updated + line.unchanged + line.staged
+            line.records_per_second = records / line.duration if line.duration else 0.0
+            line.queries_per_record = line.query_count / records if records else 0.0
+
+    @api.model
+    def _prepare_values(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert the metrics of an entity (see `EntityMetrics.as_dict`) to line values."""
+        return {
+            'entity': metrics['entity'],
+            'duration': metrics['duration'],
+            'api_calls': metrics['api_calls'],
+            'retries': metrics['retries'],
+            'throttled_seconds': metrics['throttled_seconds'],
+            'bytes_received': metrics['bytes_received'],
+            'latency_p50': metrics['latency_p50'],
+            'latency_p95': metrics['latency_p95'],
+            'created': metrics['created'],
+            'updated': metrics['updated'],
+            'unchanged': metrics['unchanged'],
+            'staged': metrics['staged'],
+            'detail_calls': metrics['detail_calls'],
+            'query_count': metrics['query_count'],
+            'error': metrics['error'],
+        }
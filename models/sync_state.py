@@ -0,0 +1,80 @@
+from typing import Optional
+from odoo import api, fields, models
+
+
+class VendusSyncState(models.Model):
+    """
+    Stores the high-water mark of each synchronized Vendus entity.
+
+    The `vendus.sync` model reads the cursor of an entity before a run, only asks
+    Vendus for records past it, and advances it in the same transaction as the
+    last stored page. A run that fails midway leaves the cursor untouched, so the
+    next run reads the same records again.
+    """
+    _name = 'vendus.sync.state'
+    _description = 'Vendus Sync State'
+    _rec_name = 'entity'
+
+    entity: str = fields.Char(
+        string='Entity',
+        required=True,
+        index=True,
+        help='The synchronized entity, e.g. products or documents.')
+    last_vendus_id: int = fields.Integer(
+        string='Last Vendus ID',
+        help='The highest Vendus ID stored by a completed run.')
+    last_date: fields.Date = fields.Date(
+        string='Last Date',
+        help='The latest record date stored by a completed run.')
+    last_sync_date: fields.Datetime = fields.Datetime(
+        string='Last Sync Date',
+        readonly=True,
+        help='When the cursor was last advanced.')
+    load_page: int = fields.Integer(
+        string='Next Load Page',
+        readonly=True,
+        help='The next page read by the initial load, see vendus.bulk.load. 0 when no load was started.')
+    date_loaded: fields.Datetime = fields.Datetime(
+        string='Loaded On',
+        readonly=True,
+        help='When the initial load of the entity completed.')
+
+    _sql_constraints = [
+        ('entity_uniq', 'unique(entity)', 'There can only be one sync state per entity!')
+    ]
+
+    @api.model
+    def _get_state(self, entity: str) -> 'VendusSyncState':
+        """Get the sync state of an entity, creating it when missing."""
+        state = self.sudo().search([('entity', '=', entity)], limit=1)
+        if not state:
+            state = self.sudo().create({'entity': entity})
+        return state
+
+    def advance(
+        self,
+        vendus_id: Optional[int] = None,
+        date: Optional[fields.Date] = None,
+    ) -> None:
+        """Move the cursor forward. Values behind the current cursor are ignored.
+
+        Args:
+            vendus_id: The highest Vendus ID stored.
+            date: The latest record date stored.
+        """
+        self.ensure_one()
+        vals = {}
+        if vendus_id and vendus_id > self.last_vendus_id:
+            vals['last_vendus_id'] = vendus_id
+        date = fields.Date.to_date(date)
+        if date and (not self.last_date or date > self.last_date):
+            vals['last_date'] = date
+        vals['last_sync_date'] = fields.Datetime.now()
+        self.sudo().write(vals)
+
+    def action_reset(self) -> None:
+        """Clear the cursor so that the next run reads the full history."""
+        self.sudo().write({
+            'last_vendus_id': 0,
+            'last_date': False,
+        })
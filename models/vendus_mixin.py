@@ -0,0 +1,231 @@
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from odoo import api, fields, models
+
+from ..lib.sync_run import SyncRun
+
+
+class VendusUpsertMixin(models.AbstractModel):
+    """
+    Batch upsert of Vendus payloads, shared by every `vendus.*` model.
+
+    A model inheriting this mixin declares a `vendus_id` field, with a
+    `unique(vendus_id)` constraint whose index serves the lookups of the upsert,
+    and implements `_prepare_vendus_values`. `batch_upsert_from_vendus` then stores a whole page
+    of payloads with one query resolving the existing `vendus_id`s, one
+    multi-record `create` for the new records and one `write` per group of
+    records receiving identical values.
+
+    Related records needed by the values (e.g. the customer of a document) are
+    resolved once per page in `_prefetch_vendus_relations`, and handed to
+    `_prepare_vendus_values` as `relations`. Records depending on the upserted
+    ones (e.g. the lines of a document) are stored in `_post_vendus_upsert`,
+    once per page. When the page is stored by a sync run, the run is passed
+    along so that its caches and API client can be used.
+    """
+    _name = 'vendus.upsert.mixin'
+    _description = 'Vendus Upsert Mixin'
+
+    vendus_hash: str = fields.Char(
+        string='Vendus Payload Hash', readonly=True, copy=False,
+        help='SHA-1 of the last Vendus payload stored on the record.')
+
+    @api.model
+    def _normalize_vendus_id(self, value: Any) -> Any:
+        """Convert a Vendus ID to the type of the `vendus_id` field."""
+        if self._fields['vendus_id'].type == 'char':
+            return str(value)
+        return int(value)
+
+    @api.model
+    def _prefetch_vendus_relations(
+        self, payloads: List[Dict[str, Any]], run: Optional[SyncRun] = None,
+    ) -> Dict[str, Any]:
+        """Resolve the related records needed by a page of payloads.
+
+        Args:
+            payloads: The page of Vendus payloads.
+            run: The current sync run, if any.
+
+        Returns:
+            The mappings passed as `relations` to `_prepare_vendus_values`.
+        """
+        return {}
+
+    @api.model
+    def _has_unresolved_vendus_references(self, vendus_data: Dict[str, Any], relations: Dict[str, Any]) -> bool:
+        """Whether a payload refers to records missing from `relations`, e.g. a store not synced yet.
+
+        The hash of such a record is not stored, so that the record is upserted
+        again, and its references resolved, on the next pass.
+
+        Args:
+            vendus_data: The data from Vendus.
+            relations: The mappings returned by `_prefetch_vendus_relations`.
+        """
+        return False
+
+    @api.model
+    def _prepare_vendus_values(self, vendus_data: Dict[str, Any], relations: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Vendus payload to the values of a new record.
+
+        Args:
+            vendus_data: The data from Vendus.
+            relations: The mappings returned by `_prefetch_vendus_relations`.
+        """
+        raise NotImplementedError()
+
+    @api.model
+    def _prepare_vendus_update_values(self, vendus_data: Dict[str, Any], relations: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Vendus payload to the values written on an existing record.
+
+        Defaults to `_prepare_vendus_values`.
+        """
+        return self._prepare_vendus_values(vendus_data, relations)
+
+    @api.model
+    def _post_vendus_upsert(
+        self,
+        changed: Dict[Any, Dict[str, Any]],
+        record_ids: Dict[Any, int],
+        relations: Dict[str, Any],
+        run: Optional[SyncRun] = None,
+    ) -> None:
+        """Store what depends on the created or updated records of a page, e.g. the lines of documents.
+
+        Args:
+            changed: The payloads of the created or updated records, by Vendus ID.
+            record_ids: The record IDs, by Vendus ID.
+            relations: The mappings returned by `_prefetch_vendus_relations`.
+            run: The current sync run, if any.
+        """
+
+    @api.model
+    def _hash_vendus_payload(self, vendus_data: Dict[str, Any]) -> str:
+        """Compute a hash of a Vendus payload, independent of the order of its keys."""
+        payload = json.dumps(vendus_data, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    @api.model
+    def _get_vendus_hashes(self, vendus_ids: List[Any]) -> Dict[Any, Tuple[int, Optional[str]]]:
+        """Map the given Vendus IDs to the IDs and payload hashes of the existing records, in one query."""
+        records = self.with_context(active_test=False).search_fetch(
+            [('vendus_id', 'in', vendus_ids)], ['vendus_id', 'vendus_hash'])
+        return {record.vendus_id: (record.id, record.vendus_hash) for record in records}
+
+    @api.model
+    def _store_vendus_hashes(self, hashes: Dict[int, Optional[str]]) -> None:
+        """Set the payload hash of the given records in a single UPDATE.
+
+        Args:
+            hashes: The new hash of each record, by record ID, None to clear it.
+        """
+        if not hashes:
+            return
+        self.env.cr.execute(
+            f'''UPDATE "{self._table}" AS t SET vendus_hash = data.hash
+                  FROM unnest(%s::int[], %s::varchar[]) AS data(id, hash)
+                 WHERE t.id = data.id''',
+            (list(hashes), list(hashes.values())),
+        )
+        self.invalidate_model(['vendus_hash'])
+
+    @api.model
+    def _get_vendus_records(self, vendus_ids: List[Any]) -> Dict[Any, int]:
+        """Map the given Vendus IDs to the IDs of the existing records, in one query."""
+        records = self.with_context(active_test=False).search_fetch(
+            [('vendus_id', 'in', vendus_ids)], ['vendus_id'])
+        return {record.vendus_id: record.id for record in records}
+
+    @api.model
+    def batch_upsert_from_vendus(
+        self, payloads: List[Dict[str, Any]], run: Optional[SyncRun] = None,
+    ) -> models.Model:
+        """Create or update records from a page of Vendus payloads.
+
+        Payloads repeating a Vendus ID are merged, the last one wins. Payloads
+        whose hash matches the `vendus_hash` of the existing record are left
+        untouched, and records referring to records not stored yet are stored
+        without hash (see `_has_unresolved_vendus_references`). The number of created, updated and unchanged records is
+        added to the counters of the run.
+
+        Args:
+            payloads: The data from Vendus.
+            run: The current sync run, if any.
+
+        Returns:
+            The created, updated or unchanged records, in the order of the payloads.
+        """
+        by_vendus_id: Dict[Any, Dict[str, Any]] = {}
+        for vendus_data in payloads:
+            if vendus_data:
+                by_vendus_id[self._normalize_vendus_id(vendus_data['id'])] = vendus_data
+        if not by_vendus_id:
+            return self.browse()
+
+        payload_hashes = {
+            vendus_id: self._hash_vendus_payload(vendus_data)
+            for vendus_id, vendus_data in by_vendus_id.items()
+        }
+        existing = self._get_vendus_hashes(list(by_vendus_id))
+        record_ids = {vendus_id: record_id for vendus_id, (record_id, dummy) in existing.items()}
+        changed = {
+            vendus_id: vendus_data for vendus_id, vendus_data in by_vendus_id.items()
+            if vendus_id not in existing or existing[vendus_id][1] != payload_hashes[vendus_id]
+        }
+        relations = self._prefetch_vendus_relations(list(changed.values()), run=run) if changed else {}
+
+        to_create: List[Dict[str, Any]] = []
+        create_keys: List[Any] = []
+        updates: Dict[str, List[int]] = defaultdict(list)
+        update_values: Dict[str, Dict[str, Any]] = {}
+        updated_hashes: Dict[int, str] = {}
+        for vendus_id, vendus_data in changed.items():
+            payload_hash = payload_hashes[vendus_id]
+            if self._has_unresolved_vendus_references(vendus_data, relations):
+                # stored without hash, to be upserted again once its references exist
+                payload_hash = None
+            if vendus_id in record_ids:
+                vals = self._prepare_vendus_update_values(vendus_data, relations)
+                group = json.dumps(vals, sort_keys=True, default=str)
+                updates[group].append(record_ids[vendus_id])
+                update_values[group] = vals
+                updated_hashes[record_ids[vendus_id]] = payload_hash
+            else:
+                vals = self._prepare_vendus_values(vendus_data, relations)
+                vals.setdefault('vendus_id', vendus_id)
+                vals['vendus_hash'] = payload_hash or False
+                to_create.append(vals)
+                create_keys.append(vendus_id)
+
+        for group, ids in updates.items():
+            self.browse(ids).write(update_values[group])
+        # the hashes differ on every record, set them apart so that the writes stay grouped
+        self._store_vendus_hashes(updated_hashes)
+        if to_create:
+            record_ids.update(zip(create_keys, self.create(to_create).ids))
+        if changed:
+            self._post_vendus_upsert(changed, record_ids, relations, run=run)
+
+        if run is not None:
+            run.count_upserts(self._name, created=len(to_create), updated=len(updated_hashes),
+                              unchanged=len(by_vendus_id) - len(changed))
+        return self.browse([record_ids[vendus_id] for vendus_id in by_vendus_id])
+
+    @api.model
+    def create_or_update_from_vendus(self, vendus_data: Dict[str, Any]) -> Optional[models.Model]:
+        """Create or update a single record from Vendus data.
+
+        Thin wrapper around `batch_upsert_from_vendus`.
+
+        Args:
+            vendus_data: The data from Vendus.
+
+        Returns:
+            The created or updated record, or None if no data was provided.
+        """
+        if not vendus_data:
+            return None
+        return self.batch_upsert_from_vendus([vendus_data])
@@ -1,2 +1,3 @@
 from typing import List
 from .saft_import_wizard import SaftImportWizard
+from .sales_summary_rebuild_wizard import SalesSummaryRebuildWizard
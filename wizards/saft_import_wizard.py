@@ -1,8 +1,60 @@
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
-import base64
-import xml.etree.ElementTree as ET
-from typing import Optional, List, Dict, Any
+import io
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
+from typing import IO, Iterator, Optional, List, Dict, Any, Tuple
+
+from ..lib import saft_parser
+
+# Paths, below the AuditFile root, of the SAF-T records imported one at a time
+SAFT_ACCOUNT = ('MasterFiles', 'GeneralLedgerAccounts', 'Account')
+SAFT_CUSTOMER = ('MasterFiles', 'Customer')
+SAFT_NUMBER_OF_ENTRIES = ('GeneralLedgerEntries', 'NumberOfEntries')
+SAFT_JOURNAL_ID = ('GeneralLedgerEntries', 'Journal', 'JournalID')
+SAFT_JOURNAL_DESCRIPTION = ('GeneralLedgerEntries', 'Journal', 'Description')
+SAFT_TRANSACTION = ('GeneralLedgerEntries', 'Journal', 'Transaction')
+
+# Number of records created per ORM call
+CREATE_BATCH_SIZE = 500
+
+# Number of transactions converted per task of the process pool
+SHARD_SIZE = 200
+
+
+class SaftIndex:
+    """
+    In-memory indexes filled by the single pass over a SAF-T file
+
+    Master data is small and kept whole, so every phase can look it up. Journal
+    entries are not kept: they are turned into moves while the file is read, and
+    only counted here.
+    """
+
+    def __init__(self) -> None:
+        self.nsmap: Dict[str, str] = {}
+        # AccountID -> account values
+        self.accounts: Dict[str, Dict[str, Any]] = {}
+        # CustomerID -> partner values
+        self.customers: Dict[str, Dict[str, Any]] = {}
+        # JournalID -> Description
+        self.journals: Dict[str, str] = {}
+        # JournalID -> number of transactions read
+        self.transactions: Dict[str, int] = {}
+        self.last_transaction_id: Optional[str] = None
+        # Declared by GeneralLedgerEntries/NumberOfEntries
+        self.number_of_entries: int = 0
+        # Phase -> seconds spent in it, see `_import_stream`
+        self.timings: Dict[str, float] = {}
+
+    def add_time(self, phase: str, started: float) -> None:
+        """
+        Add the time elapsed since `started` (a `time.monotonic()`) to a phase
+        """
+        self.timings[phase] = self.timings.get(phase, 0.0) + time.monotonic() - started
 
 class SaftImportWizard(models.TransientModel):
     """
@@ -11,27 +63,62 @@ class SaftImportWizard(models.TransientModel):
     It will allow the user to upload a SAF-T file and then import the data from the file
     into Odoo. The wizard will handle the import process, including parsing the XML file,
     preparing the data, and then importing it into Odoo.
+
+    The file is never loaded in memory as a whole: it is read from the attachment
+    stream with `iterparse`, every record is processed as soon as it is complete,
+    and then cleared along with its previous siblings. Peak memory therefore does
+    not depend on the size of the file.
     """
     _name = 'account.saft.import.wizard'
     _description = 'SAF-T Import Wizard'
 
     company_id: models.Many2one = fields.Many2one('res.company', string='Company', required=True, default=lambda self: self.env.company)
-    attachment_id: Optional[bytes] = fields.Binary(string='SAF-T File', required=True)
+    attachment_id: Optional[bytes] = fields.Binary(string='SAF-T File')
     attachment_name: Optional[str] = fields.Char(string='File Name')
+    chunk_size: int = fields.Integer(string='Chunk Size', default=1000,
+                                     help='Number of journal entries imported and committed at once.')
+    workers: int = fields.Integer(string='Worker Processes', default=0,
+                                  help='Number of processes converting journal entries to moves while this one '
+                                       'writes them. 0 converts them in this process.')
+    job_id: models.Many2one = fields.Many2one('account.saft.import.job', string='Import Job', readonly=True)
+    job_state: str = fields.Selection(related='job_id.state')
+    job_progress: float = fields.Float(related='job_id.progress')
+    job_throughput: float = fields.Float(related='job_id.throughput')
+    job_entries_done: int = fields.Integer(related='job_id.entries_done')
+    job_total_entries: int = fields.Integer(related='job_id.total_entries')
+    job_error: str = fields.Text(related='job_id.error')
 
     def _get_account_types(self) -> Dict[str, str]:
+        """
+        Account types by SNC account code prefix
+
+        The longest matching prefix wins, see `_get_account_type`.
+        """
         if self.company_id.country_code != 'PT':
             return super()._get_account_types()
         return {
-            '101': 'asset_fixed',
-            '102': 'asset_current',
-            '201': 'liability_non_current',
-            '202': 'liability_current',
-            '301': 'equity',
-            '401': 'income',
-            '501': 'expense',
+            '1': 'asset_cash',
+            '21': 'asset_receivable',
+            '22': 'liability_payable',
+            '2': 'liability_current',
+            '3': 'asset_current',
+            '4': 'asset_fixed',
+            '5': 'equity',
+            '6': 'expense',
+            '7': 'income',
+            '8': 'equity',
         }
-    def _get_cleaned_namespace(self, tree: ET.ElementTree) -> Dict[str, str]:
+
+    def _get_account_type(self, code: str, account_types: Dict[str, str]) -> str:
+        """
+        Get the account type of an account code from the longest matching prefix
+        """
+        for length in range(len(code), 0, -1):
+            if code[:length] in account_types:
+                return account_types[code[:length]]
+        return 'asset_current'
+
+    def _get_cleaned_namespace(self, tree: etree._Element) -> Dict[str, str]:
         """
         Clean up namespace for easier parsing
 
@@ -39,153 +126,466 @@ class SaftImportWizard(models.TransientModel):
         to parse. It removes any unnecessary namespaces and replaces them with the 'saft'
         namespace.
         """
-        print("Getting cleaned namespace")
         nsmap = {k: v for k, v in tree.nsmap.items() if k}
         if None in tree.nsmap:
             nsmap['saft'] = tree.nsmap[None]
         return nsmap
 
-    def _prepare_account_data(self, tree: ET.ElementTree) -> ET.ElementTree:
+    def _get_saft_attachment(self) -> models.Model:
         """
-        Adjust for Portuguese SAF-T
+        Get the ir.attachment holding the uploaded SAF-T file
+        """
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', 'attachment_id'),
+        ], limit=1)
+        if not attachment:
+            raise UserError(_("Please upload a SAF-T file."))
+        return attachment
 
-        This method is used to adjust the XML data for Portuguese SAF-T. It replaces the
-        'GeneralLedgerAccounts' node with 'StandardAccountID' to make it easier to parse.
+    def _open_attachment_stream(self, attachment: models.Model) -> IO[bytes]:
         """
-        if self.company_id.country_code == 'PT':
-            nsmap = self._get_cleaned_namespace(tree)
-            account_id_nodes = tree.findall('.//saft:GeneralLedgerAccounts', nsmap)
-            for account_id_node in account_id_nodes:
-                account_id_node.tag = account_id_node.tag.replace('GeneralLedgerAccounts', 'StandardAccountID')
+        Open a SAF-T attachment as a binary stream
 
-        return tree
+        The file is read from the filestore when the attachment is stored there, so it
+        is never decoded or copied in memory.
+        """
+        attachment = attachment.sudo()
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(attachment.raw)
 
-    def _prepare_partner_data(self, tree: ET.ElementTree) -> ET.ElementTree:
+    def _open_saft_stream(self) -> IO[bytes]:
         """
-        Handle partner-specific data in Portuguese SAF-T
+        Open the uploaded SAF-T file as a binary stream
+        """
+        return self._open_attachment_stream(self._get_saft_attachment())
+
+    def _iter_saft_records(self, stream: IO[bytes], paths: Tuple[Tuple[str, ...], ...], index: SaftIndex) -> Iterator[Tuple[Tuple[str, ...], etree._Element]]:
+        """
+        Stream the SAF-T records found at the given paths
+
+        Each record is yielded once its end tag is parsed, together with its path. When
+        the caller asks for the next record, the previous one is cleared and detached
+        from the tree. Everything else (e.g. SourceDocuments) is cleared as soon as it
+        is parsed. The namespace map is computed once, from the root element, and stored
+        in `index.nsmap`.
+        """
+        path: List[str] = []
+        record_depth: Optional[int] = None
+        try:
+            for event, elem in etree.iterparse(stream, events=('start', 'end'), huge_tree=True):
+                if event == 'start':
+                    if not path:
+                        index.nsmap = self._get_cleaned_namespace(elem)
+                    path.append(etree.QName(elem).localname)
+                    if record_depth is None and tuple(path[1:]) in paths:
+                        record_depth = len(path)
+                    continue
+                if record_depth == len(path):
+                    yield tuple(path[1:]), elem
+                    record_depth = None
+                if record_depth is None:
+                    elem.clear(keep_tail=True)
+                    parent = elem.getparent()
+                    if parent is not None:
+                        while elem.getprevious() is not None:
+                            del parent[0]
+                path.pop()
+        except etree.XMLSyntaxError:
+            raise UserError(_("Invalid file format. Please upload a valid SAF-T XML file."))
+
+    def _prepare_account_data(self, account: etree._Element, account_types: Dict[str, str], nsmap: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Adjust for Portuguese SAF-T
 
-        This method is used to handle partner-specific data in Portuguese SAF-T. It removes
-        any nodes with the 'CustomerID' node that have 'N/A' as their value.
+        This method converts a 'GeneralLedgerAccounts/Account' node to account values. Only
+        movement accounts (GroupingCategory 'GM') are imported, the aggregation accounts of
+        the SNC chart only group them.
         """
-        if self.company_id.country_code == 'PT':
-            nsmap = self._get_cleaned_namespace(tree)
-            partner_id_nodes = tree.findall('.//saft:CustomerID', nsmap)
-            for partner_id_node in partner_id_nodes:
-                if partner_id_node.text == 'N/A':
-                    partner_id_node.getparent().remove(partner_id_node)
+        grouping_category = account.findtext('saft:GroupingCategory', None, nsmap)
+        if grouping_category and grouping_category != 'GM':
+            return None
+        code = account.findtext('saft:AccountID', '', nsmap).strip()
+        return {
+            'code': code,
+            'name': account.findtext('saft:AccountDescription', code, nsmap),
+            'account_type': self._get_account_type(code, account_types),
+            'company_id': self.company_id.id,
+        }
 
-        return tree
+    def _prepare_partner_data(self, customer: etree._Element, nsmap: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Handle partner-specific data in Portuguese SAF-T
+
+        This method converts a 'MasterFiles/Customer' node to partner values. Customers
+        with 'N/A' as their CustomerID are skipped.
+        """
+        customer_id = customer.findtext('saft:CustomerID', '', nsmap).strip()
+        if not customer_id or customer_id == 'N/A':
+            return None
+        vat = customer.findtext('saft:CustomerTaxID', '', nsmap).strip()
+        return {
+            'ref': customer_id,
+            'name': customer.findtext('saft:CompanyName', customer_id, nsmap),
+            'vat': vat if vat and vat != '999999990' else False,
+            'company_id': self.company_id.id,
+        }
 
-    def _prepare_move_data(self, journal_tree: ET.ElementTree, default_currency: str, journal_id_saft: str, journal_id: int, map_accounts: Dict[str, int], map_taxes: Dict[str, int], map_currencies: Dict[str, int], map_partners: Dict[str, int]) -> Dict[str, Any]:
+    def _prepare_move_data(self, journal_tree: etree._Element, default_currency: str, journal_id_saft: str, journal_id: int, map_accounts: Dict[str, int], map_taxes: Dict[str, int], map_currencies: Dict[str, int], map_partners: Dict[str, int], nsmap: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
         """
         Adjust journal move data for Portuguese SAF-T
 
         This method is used to adjust the journal move data for Portuguese SAF-T. It takes
         the journal tree, default currency, journal ID from the SAF-T file, journal ID from
-        Odoo, and the mappings for accounts, taxes, currencies, and partners as arguments.
+        Odoo, the mappings for accounts, taxes, currencies, and partners, and the namespace
+        map of the file (computed from the journal when not given) as arguments.
 
-        It should return a dictionary with the following keys:
+        It returns one dictionary per 'Transaction' of the journal, with the following keys:
         - journal_id: The ID of the journal in Odoo
         - date: The date of the move
-        - ref: The reference of the move
-        - line_ids: A list of move lines
-
-        The method should be implemented to extract the necessary data from the SAF-T file
-        and prepare the move data accordingly.
-        """
-        if self.company_id.country_code == 'PT':
-            nsmap = self._get_cleaned_namespace(journal_tree)
-            journal_tree = journal_tree.find('.//saft:Journal', nsmap)
-
-        # Extract the date and reference from the SAF-T file
-        date = journal_tree.find('saft:Date', nsmap).text
-        ref = journal_tree.find('saft:Reference', nsmap).text
-
-        # Extract the move lines from the SAF-T file
-        move_lines: List[Dict[str, Any]] = []
-        for journal_entry in journal_tree.findall('saft:JournalEntry', nsmap):
-            debit_account_id = map_accounts[journal_entry.find('saft:DebitAccount', nsmap).text]
-            credit_account_id = map_accounts[journal_entry.find('saft:CreditAccount', nsmap).text]
-            debit_amount = float(journal_entry.find('saft:DebitAmount', nsmap).text)
-            credit_amount = float(journal_entry.find('saft:CreditAmount', nsmap).text)
-            currency_id = map_currencies[journal_entry.find('saft:Currency', nsmap).text]
-            partner_id = map_partners[journal_entry.find('saft:CustomerID', nsmap).text]
-            move_lines.append((0, 0, {
-                'account_id': debit_account_id,
-                'partner_id': partner_id,
-                'debit': debit_amount,
-                'credit': credit_amount,
-                'currency_id': currency_id,
-            }))
-
-        print("Preparing move data")
-        return {
-            'journal_id': journal_id,
-            'date': date,
-            'ref': ref,
-            'line_ids': move_lines,
-        }
+        - ref: The reference of the move (the SAF-T TransactionID)
+        - line_ids: A list of move lines, from the DebitLine and CreditLine nodes
 
-    def import_file(self) -> Dict[str, str]:
+        The general ledger of a SAF-T file is expressed in the company currency, so
+        `default_currency`, `map_taxes` and `map_currencies` are not used for now.
         """
-        Import the SAF-T file
+        nsmap = nsmap or self._get_cleaned_namespace(journal_tree)
 
-        This method is used to import the SAF-T file into Odoo. It takes the SAF-T file as
-        input and then processes it to extract the necessary data to import into Odoo.
+        return [
+            self._prepare_transaction_data(transaction, journal_id, map_accounts, map_partners, nsmap)
+            for transaction in journal_tree.iterfind('saft:Transaction', nsmap)
+        ]
 
-        The method should return a dictionary with the following keys:
-        - type: The type of the action to perform after the import (e.g. 'ir.actions.act_window_close')
+    def _prepare_transaction_data(self, transaction: etree._Element, journal_id: int, map_accounts: Dict[str, int], map_partners: Dict[str, int], nsmap: Dict[str, str]) -> Dict[str, Any]:
         """
-        self.ensure_one()
-        if not self.attachment_id:
-            raise UserError(_("Please upload a SAF-T file."))
+        Convert one 'Transaction' node to the values of an account.move
 
+        See `_prepare_move_data` and `saft_parser.prepare_transaction`.
+        """
         try:
-            saft_file: bytes = base64.b64decode(self.attachment_id)
-            tree: ET.ElementTree = ET.fromstring(saft_file)
-        except Exception as e:
-            raise UserError(_("Invalid file format. Please upload a valid SAF-T XML file."))
+            return saft_parser.prepare_transaction(transaction, journal_id, map_accounts, map_partners, nsmap)
+        except saft_parser.UnknownAccountError as e:
+            raise self._unknown_account_error(e)
+
+    def _unknown_account_error(self, error: saft_parser.UnknownAccountError) -> UserError:
+        return UserError(_("Account %s used by transaction %s is not in the SAF-T file.",
+                           error.account_code, error.transaction_id))
+
+    def _create_in_batches(self, model_name: str, records: Iterator[Tuple[str, Dict[str, Any]]], mapping: Dict[str, int]) -> None:
+        """
+        Create the given (key, values) records with multi-record creates of
+        CREATE_BATCH_SIZE records, and store the new IDs in `mapping` under their key
+        """
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+
+        def flush():
+            created = self.env[model_name].create([vals for _key, vals in batch])
+            mapping.update(zip([key for key, _vals in batch], created.ids))
+            batch.clear()
+
+        for key, vals in records:
+            batch.append((key, vals))
+            if len(batch) >= CREATE_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+
+    def _index_master_record(self, path: Tuple[str, ...], record: etree._Element, index: SaftIndex, account_types: Dict[str, str]) -> None:
+        """
+        Add an Account or Customer record to the index
+        """
+        if path == SAFT_ACCOUNT:
+            vals = self._prepare_account_data(record, account_types, index.nsmap)
+            if vals:
+                index.accounts[vals['code']] = vals
+        else:
+            vals = self._prepare_partner_data(record, index.nsmap)
+            if vals:
+                index.customers[vals['ref']] = vals
+
+    def _import_accounts(self, index: SaftIndex) -> Dict[str, int]:
+        """
+        Map the accounts of the file to Odoo accounts, creating only the missing ones
+
+        Existing accounts of the company are matched on their code, in one query.
+        """
+        existing = self.env['account.account'].search_fetch([
+            ('company_id', '=', self.company_id.id),
+            ('code', 'in', list(index.accounts)),
+        ], ['code'])
+        map_accounts: Dict[str, int] = {account.code: account.id for account in existing}
+        missing = ((code, vals) for code, vals in index.accounts.items() if code not in map_accounts)
+        self._create_in_batches('account.account', missing, map_accounts)
+        return map_accounts
+
+    def _import_partners(self, index: SaftIndex) -> Dict[str, int]:
+        """
+        Map the customers of the file to partners, creating only the missing ones
+
+        Partners of the company (or shared ones) are matched on their reference, then on
+        their VAT, in one query. Customers of the file sharing a VAT get one partner.
+        """
+        refs = list(index.customers)
+        vats = list({vals['vat'] for vals in index.customers.values() if vals['vat']})
+        existing = self.env['res.partner'].with_context(active_test=False).search_fetch([
+            ('company_id', 'in', [self.company_id.id, False]),
+            '|', ('ref', 'in', refs), ('vat', 'in', vats),
+        ], ['ref', 'vat'])
+        by_ref = {partner.ref: partner.id for partner in existing if partner.ref}
+        by_vat = {partner.vat: partner.id for partner in existing if partner.vat}
 
-        # Process the SAF-T file
-        tree = self._prepare_account_data(tree)
-        tree = self._prepare_partner_data(tree)
-
-        # Import accounts
-        account_types: Dict[str, str] = self._get_account_types()
-        map_accounts: Dict[str, int] = {}
-        for account in tree.findall('.//saft:StandardAccountID', self._get_cleaned_namespace(tree)):
-            account_id = int(account.text)
-            account_type = account_types[account_type]
-            account_odoo_id = self.env['account.account'].create({
-                'name': account_id,
-                'code': account_id,
-                'user_type_id': self.env.ref('account.data_account_type_' + account_type).id,
-                'company_id': self.company_id.id,
-            }).id
-            map_accounts[account_id] = account_odoo_id
-
-        # Import partners
         map_partners: Dict[str, int] = {}
-        for partner in tree.findall('.//saft:Partner', self._get_cleaned_namespace(tree)):
-            partner_id = partner.find('saft:CustomerID', self._get_cleaned_namespace(tree)).text
-            partner_odoo_id = self.env['res.partner'].create({
-                'name': partner_id,
-                'company_id': self.company_id.id,
-            }).id
-            map_partners[partner_id] = partner_odoo_id
-
-        # Import moves
+        missing: Dict[str, Dict[str, Any]] = {}
+        # VAT -> CustomerID of the first missing customer with that VAT
+        first_ref_by_vat: Dict[str, str] = {}
+        # CustomerID -> CustomerID whose partner it shares
+        aliases: Dict[str, str] = {}
+        for ref, vals in index.customers.items():
+            vat = vals['vat']
+            partner_id = by_ref.get(ref) or (vat and by_vat.get(vat))
+            if partner_id:
+                map_partners[ref] = partner_id
+            elif vat and vat in first_ref_by_vat:
+                aliases[ref] = first_ref_by_vat[vat]
+            else:
+                missing[ref] = vals
+                if vat:
+                    first_ref_by_vat[vat] = ref
+        self._create_in_batches('res.partner', iter(missing.items()), map_partners)
+        for ref, first_ref in aliases.items():
+            map_partners[ref] = map_partners[first_ref]
+        return map_partners
+
+    def _import_master_data(self, index: SaftIndex) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Import the accounts and customers of the file, timing each in `index.timings`
+
+        Returns the account and partner maps.
+        """
+        started = time.monotonic()
+        map_accounts = self._import_accounts(index)
+        index.add_time('accounts', started)
+        started = time.monotonic()
+        map_partners = self._import_partners(index)
+        index.add_time('partners', started)
+        return map_accounts, map_partners
+
+    def _create_moves(self, moves: List[Dict[str, Any]]) -> int:
+        """
+        Create a batch of moves, skipping the transactions already imported
+
+        A transaction is already imported when the company has a move with its
+        TransactionID as reference in the same journal. Returns the number of moves
+        created.
+        """
+        existing = self.env['account.move'].search_fetch([
+            ('company_id', '=', self.company_id.id),
+            ('ref', 'in', [move['ref'] for move in moves]),
+            ('journal_id', 'in', list({move['journal_id'] for move in moves})),
+        ], ['ref', 'journal_id'])
+        imported = {(move.ref, move.journal_id.id) for move in existing}
+        new_moves = [move for move in moves if (move['ref'], move['journal_id']) not in imported]
+        if new_moves:
+            self.env['account.move'].create(new_moves)
+        return len(new_moves)
+
+    def _get_journal_map(self) -> Dict[str, int]:
         journals = self.env['account.journal'].search([('company_id', '=', self.company_id.id)])
         map_journals: Dict[str, int] = {}
         for journal in journals:
-            journal_id = journal.code
-            journal_id_saft = journal.name
-            map_journals[journal_id_saft] = journal.id
-        for journal in tree.findall('.//saft:Journal', self._get_cleaned_namespace(tree)):
-            journal_id_saft = journal.find('saft:JournalID', self._get_cleaned_namespace(tree)).text
-            journal_id = map_journals[journal_id_saft]
-            move_data = self._prepare_move_data(journal, self.company_id.currency_id.name, journal_id_saft, journal_id, map_accounts, {}, {}, map_partners)
-            self.env['account.move'].create(move_data)
-
-        print("Importing move data")
-        return {'type': 'ir.actions.act_window_close'}
\ No newline at end of file
+            map_journals[journal.code] = journal.id
+            map_journals.setdefault(journal.name, journal.id)
+        return map_journals
+
+    def _get_process_pool(self, workers: int, map_accounts: Dict[str, int], map_partners: Dict[str, int], nsmap: Dict[str, str]) -> Optional[ProcessPoolExecutor]:
+        """
+        Start the pool converting transactions, or None to convert them in this process
+
+        Workers are forked, so they start without importing Odoo again; they never use
+        the inherited database connection. The maps are handed over once, when the
+        workers start.
+        """
+        if workers <= 0 or 'fork' not in multiprocessing.get_all_start_methods():
+            return None
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=saft_parser.init_worker,
+            initargs=(map_accounts, map_partners, nsmap),
+        )
+
+    def _import_stream(self, stream: IO[bytes], job: Optional[models.Model] = None, workers: Optional[int] = None) -> SaftIndex:
+        """
+        Import a SAF-T file in a single pass
+
+        MasterFiles come first in a SAF-T file, so accounts and customers are indexed
+        as they are read, and created when the first transaction is reached.
+        Transactions are then turned into moves and created in batches while the rest
+        of the file is read, so a journal never has to be held in memory as a whole.
+
+        With `workers`, transactions are serialized in shards of SHARD_SIZE and
+        converted to move values by a process pool, while this process keeps reading
+        the file and is the only one writing moves, in the order of the file.
+
+        When run by an `account.saft.import.job`, batches have the size of the job's
+        chunks and each one is checkpointed (and committed) through the job. A resumed
+        job skips, without converting them, the transactions of its checkpoint.
+
+        The time spent in each phase is returned in `index.timings`: 'accounts' and
+        'partners' (matching and creating master data), 'convert' (turning
+        transactions into move values, or waiting for the pool to do so), 'write'
+        (creating moves and checkpointing) and 'parse' (reading the file, the rest).
+        """
+        import_started = time.monotonic()
+        index = SaftIndex()
+        account_types = self._get_account_types()
+        map_journals = self._get_journal_map()
+        maps: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None
+        chunk_size = job.chunk_size if job else CREATE_BATCH_SIZE
+        skip = job.entries_done if job else 0
+        workers = (job.workers if job else self.workers) if workers is None else workers
+        pool: Optional[ProcessPoolExecutor] = None
+        # (future, entries read, last TransactionID) of the shards being converted
+        pending: deque = deque()
+        shard: List[Tuple[int, bytes]] = []
+        journal_id_saft = ''
+        entries_read = 0
+        # Entries whose moves are in `batch` or already written
+        entries_prepared = skip
+        last_prepared_id = job.last_transaction_id if job else None
+        batch: List[Dict[str, Any]] = []
+        chunk_started = time.monotonic()
+
+        def flush():
+            nonlocal chunk_started
+            started = time.monotonic()
+            created = self._create_moves(batch) if batch else 0
+            if job:
+                job._checkpoint(entries_prepared, last_prepared_id, created, time.monotonic() - chunk_started)
+            index.add_time('write', started)
+            batch.clear()
+            chunk_started = time.monotonic()
+
+        def collect(moves: List[Dict[str, Any]], entries: int, last_id: Optional[str]):
+            nonlocal entries_prepared, last_prepared_id
+            batch.extend(moves)
+            entries_prepared, last_prepared_id = entries, last_id
+            if len(batch) >= chunk_size:
+                flush()
+
+        def collect_shard():
+            future, entries, last_id = pending.popleft()
+            started = time.monotonic()
+            try:
+                moves = future.result()
+            except saft_parser.UnknownAccountError as e:
+                raise self._unknown_account_error(e)
+            index.add_time('convert', started)
+            collect(moves, entries, last_id)
+
+        def submit_shard():
+            pending.append((pool.submit(saft_parser.prepare_shard, list(shard)), entries_read, index.last_transaction_id))
+            shard.clear()
+            while len(pending) > 2 * workers:
+                collect_shard()
+
+        paths = (SAFT_ACCOUNT, SAFT_CUSTOMER, SAFT_NUMBER_OF_ENTRIES, SAFT_JOURNAL_ID, SAFT_JOURNAL_DESCRIPTION, SAFT_TRANSACTION)
+        try:
+            for path, record in self._iter_saft_records(stream, paths, index):
+                if path in (SAFT_ACCOUNT, SAFT_CUSTOMER):
+                    self._index_master_record(path, record, index, account_types)
+                    continue
+                if path == SAFT_NUMBER_OF_ENTRIES:
+                    index.number_of_entries = int(record.text or 0)
+                    if job:
+                        job._set_total_entries(index.number_of_entries)
+                    continue
+                if path == SAFT_JOURNAL_ID:
+                    journal_id_saft = (record.text or '').strip()
+                    if journal_id_saft not in map_journals:
+                        raise UserError(_("No journal with code or name %s in company %s.", journal_id_saft, self.company_id.name))
+                    continue
+                if path == SAFT_JOURNAL_DESCRIPTION:
+                    index.journals[journal_id_saft] = record.text or ''
+                    continue
+
+                entries_read += 1
+                index.transactions[journal_id_saft] = index.transactions.get(journal_id_saft, 0) + 1
+                index.last_transaction_id = record.findtext('saft:TransactionID', None, index.nsmap)
+                if entries_read <= skip:
+                    if entries_read == skip and index.last_transaction_id != job.last_transaction_id:
+                        raise UserError(_("The SAF-T file does not match the checkpoint of the import: expected transaction %s, found %s.",
+                                          job.last_transaction_id, index.last_transaction_id))
+                    continue
+                if maps is None:
+                    maps = self._import_master_data(index)
+                    pool = self._get_process_pool(workers, maps[0], maps[1], index.nsmap)
+                map_accounts, map_partners = maps
+
+                if pool is None:
+                    started = time.monotonic()
+                    move = self._prepare_transaction_data(record, map_journals[journal_id_saft], map_accounts, map_partners, index.nsmap)
+                    index.add_time('convert', started)
+                    collect([move], entries_read, index.last_transaction_id)
+                    continue
+                shard.append((map_journals[journal_id_saft], etree.tostring(record)))
+                if len(shard) >= SHARD_SIZE:
+                    submit_shard()
+
+            if maps is None:
+                self._import_master_data(index)
+            if shard:
+                submit_shard()
+            while pending:
+                collect_shard()
+            if batch:
+                flush()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        index.timings['parse'] = max(0.0, time.monotonic() - import_started - sum(index.timings.values()))
+        return index
+
+    def import_file(self) -> Dict[str, Any]:
+        """
+        Import the SAF-T file
+
+        This method is used to import the SAF-T file into Odoo. The file is handed over
+        to an `account.saft.import.job`, which imports it in the background in chunks
+        of `chunk_size` journal entries. The wizard stays open to show the progress of
+        the job.
+
+        The method returns the action reopening the wizard.
+        """
+        self.ensure_one()
+        # bin_size avoids loading the file content just to check it is there
+        if not self.with_context(bin_size=True).attachment_id:
+            raise UserError(_("Please upload a SAF-T file."))
+
+        attachment = self._get_saft_attachment()
+        job = self.env['account.saft.import.job'].create({
+            'name': self.attachment_name or attachment.name,
+            'company_id': self.company_id.id,
+            'attachment_id': attachment.id,
+            'chunk_size': max(1, self.chunk_size),
+            'workers': max(0, self.workers),
+        })
+        # Hand the file over to the job without copying it: the wizard is transient
+        attachment.write({'res_model': job._name, 'res_id': job.id, 'res_field': False})
+        self.job_id = job
+        self.env.ref(f'{self._module}.ir_cron_saft_import')._trigger()
+        return self.action_refresh()
+
+    def action_refresh(self) -> Dict[str, Any]:
+        """
+        Reopen the wizard, showing the current progress of its job
+        """
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
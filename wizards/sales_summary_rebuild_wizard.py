@@ -0,0 +1,23 @@
+from typing import Any, Dict
+
+from odoo import fields, models
+
+
+class SalesSummaryRebuildWizard(models.TransientModel):
+    """
+    Rebuild the daily sales summary of a date range from the Vendus documents.
+
+    The summary is kept up to date by the document upsert. A rebuild is only
+    needed after documents were changed by other means, e.g. by hand or by SQL.
+    """
+    _name = 'vendus.sales.summary.rebuild.wizard'
+    _description = 'Rebuild Vendus Sales Summary'
+
+    date_from: fields.Date = fields.Date(string='From', help='Leave empty to start from the first document.')
+    date_to: fields.Date = fields.Date(string='To', help='Leave empty to end with the last document.')
+
+    def action_rebuild(self) -> Dict[str, Any]:
+        """Rebuild the summary of the range, and show it."""
+        self.ensure_one()
+        self.env['vendus.sales.summary']._rebuild(self.date_from, self.date_to)
+        return self.env['ir.actions.act_window']._for_xml_id(f'{self._module}.action_vendus_sales_summary')